@@ -0,0 +1,83 @@
+"""
+Compares the time of calls of an undecorated method, of a method decorated
+with the former enter_function (inspect.signature at each call) and of
+methods decorated with enter_function with debugging disabled (with
+arguments and with only self).
+
+Usage (the utils package of SlicerCART requires the Slicer python):
+    Slicer --no-splash --no-main-window --python-script \
+        SlicerCART/dev/benchmarks/benchmark_enter_function.py [calls]
+"""
+import functools
+import inspect
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', '..', 'src'))
+
+from utils.debugging_helpers import bind_enter_function
+
+# Debugging is disabled during the benchmark.
+ENABLE_DEBUG = False
+
+
+def former_enter_function(func):
+    """
+    enter_function before it was bound at decoration time.
+    """
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        def print_enter_function(self_of_cls, *args, **kwargs):
+            if ENABLE_DEBUG:
+                print('\n *** enter_function ***:', func.__name__,
+                      '*** from class ***:', self_of_cls.__class__.__name__,
+                      '\n')
+
+        print_enter_function(self, *args, **kwargs)
+        if len(inspect.signature(func).parameters) == 1:
+            return func(self)
+        return func(self, *args, **kwargs)
+    return wrapper
+
+
+def method(self, value):
+    return value
+
+
+def method_with_only_self(self):
+    return self
+
+
+class Benchmark:
+    undecorated = method
+    former = former_enter_function(method)
+    disabled = bind_enter_function(method, False)
+    disabled_with_only_self = bind_enter_function(method_with_only_self,
+                                                  False)
+
+
+def time_calls(function, number_of_calls, *args):
+    """
+    Get the mean duration of a call in nanoseconds.
+    """
+    start = time.perf_counter()
+    for _ in range(number_of_calls):
+        function(*args)
+    return (time.perf_counter() - start) * 1e9 / number_of_calls
+
+
+def main(number_of_calls=1000000):
+    instance = Benchmark()
+    for name in ('undecorated', 'former', 'disabled'):
+        duration = time_calls(getattr(instance, name), number_of_calls, 1)
+        print(f'{name}: {duration:.0f} ns/call')
+    duration = time_calls(instance.disabled_with_only_self, number_of_calls)
+    print(f'disabled_with_only_self: {duration:.0f} ns/call')
+
+
+if __name__ == '__main__':
+    main(*[int(argument) for argument in sys.argv[1:2]])
+    if 'slicer' in sys.modules:
+        sys.modules['slicer'].util.exit()
@@ -0,0 +1,54 @@
+"""
+Compares the time needed to resolve all the working list filenames to their
+paths with the former substring search over all paths and with the filename
+index built by WorkFiles. Synthetic BIDS-like paths are used (no file is
+created). The substring search is timed on a sample of filenames and
+extrapolated to all cases.
+
+Usage (the scripts package of SlicerCART requires the Slicer python):
+    Slicer --no-splash --no-main-window --python-script \
+        SlicerCART/dev/benchmarks/benchmark_filename_index.py [cases ...]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', '..', 'src'))
+
+from scripts.WorkFiles import WorkFiles
+
+# Number of filenames searched with the substring search.
+SAMPLE_SIZE = 500
+
+
+def main(numbers_of_cases=(10000, 50000)):
+    for number_of_cases in numbers_of_cases:
+        paths = [os.path.join('/data', f'sub-{i:06d}', 'anat',
+                              f'sub-{i:06d}_T2w.nii.gz')
+                 for i in range(number_of_cases)]
+        filenames = [os.path.basename(path) for path in paths]
+        sample_size = min(SAMPLE_SIZE, number_of_cases)
+
+        start = time.perf_counter()
+        for filename in filenames[-sample_size:]:
+            [path for path in paths if filename in path]
+        substring_time = ((time.perf_counter() - start)
+                          * number_of_cases / sample_size)
+
+        # Index built by WorkFiles when the cases are loaded.
+        start = time.perf_counter()
+        path_by_filename, _ = WorkFiles.build_filename_index(None, paths)
+        [path_by_filename[filename] for filename in filenames]
+        index_time = time.perf_counter() - start
+
+        print(f'{number_of_cases} cases: substring search '
+              f'{substring_time:.2f} s (extrapolated), filename index '
+              f'{index_time:.3f} s')
+
+
+if __name__ == '__main__':
+    numbers_of_cases = [int(argument) for argument in sys.argv[1:]]
+    main(numbers_of_cases or (10000, 50000))
+    if 'slicer' in sys.modules:
+        sys.modules['slicer'].util.exit()
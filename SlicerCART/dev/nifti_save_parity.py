@@ -0,0 +1,131 @@
+"""
+Checks that the NIfTI segmentations written from the labelmap array (see
+saveNiiSegmentation) match the ones written by the former saving code, which
+went through slicer.util.saveNode:
+- save_uint8 true: saveNode to a temporary file, read back with nibabel and
+  cast to uint8;
+- save_uint8 false: saveNode to the final file (scalar type of the labelmap).
+Both paths are run on the same labelmap node, for uint8 and int16 labelmaps
+with an oblique geometry (or on a labelmap file given as argument). The
+files are compared on data type, affine, shape and voxels.
+
+Usage (requires the Slicer python):
+    Slicer --no-splash --no-main-window --python-script \
+        SlicerCART/dev/nifti_save_parity.py [labelmap.nii.gz]
+Exits with status 1 if a difference is found.
+"""
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'src'))
+
+import numpy as np
+import nibabel as nib
+import slicer
+
+import batch_workers
+from utils.VolumeIO import VolumeIO
+
+
+def compare_nifti_files(path, other_path):
+    """
+    Get the differences of data type, affine, shape and voxels of two NIfTI
+    files.
+    :return: list of difference descriptions (empty if none).
+    """
+    image = nib.load(path)
+    other_image = nib.load(other_path)
+    differences = []
+    if image.get_data_dtype() != other_image.get_data_dtype():
+        differences.append(f'data type: {image.get_data_dtype()} != '
+                           f'{other_image.get_data_dtype()}')
+    if not np.allclose(image.affine, other_image.affine, atol=1e-5):
+        differences.append(f'affine:\n{image.affine}\n!=\n'
+                           f'{other_image.affine}')
+    if image.shape != other_image.shape:
+        differences.append(f'shape: {image.shape} != {other_image.shape}')
+    elif not np.array_equal(np.asanyarray(image.dataobj),
+                            np.asanyarray(other_image.dataobj)):
+        differences.append('voxel values differ')
+    return differences
+
+
+def create_labelmap_node(dtype):
+    """
+    Create a labelmap node with random labels and an oblique geometry.
+    """
+    random = np.random.default_rng(0)
+    array = random.integers(0, 5, size=(12, 20, 16)).astype(dtype)
+    node = slicer.mrmlScene.AddNewNodeByClass('vtkMRMLLabelMapVolumeNode',
+                                              f'parity_{np.dtype(dtype)}')
+    slicer.util.updateVolumeFromArray(node, array)
+
+    angle = np.deg2rad(20)
+    rotation = np.array([[np.cos(angle), -np.sin(angle), 0],
+                         [np.sin(angle), np.cos(angle), 0],
+                         [0, 0, 1]])
+    ijk_to_ras = np.eye(4)
+    ijk_to_ras[:3, :3] = rotation @ np.diag([0.8, 0.9, 2.5])
+    ijk_to_ras[:3, 3] = [-40.5, 12.25, 7.0]
+    node.SetIJKToRASMatrix(slicer.util.vtkMatrixFromArray(ijk_to_ras))
+    return node
+
+
+def save_former(labelmap_node, path, save_uint8):
+    """
+    Former saving code of saveNiiSegmentation.
+    """
+    if save_uint8:
+        temp_path = f'{path}.temp.nii.gz'
+        slicer.util.saveNode(labelmap_node, temp_path)
+        nii = nib.load(temp_path)
+        data = nii.get_fdata().astype(np.uint8)
+        new_nii = nib.Nifti1Image(data, affine=nii.affine, header=nii.header)
+        new_nii.set_data_dtype(np.uint8)
+        nib.save(new_nii, path)
+        os.remove(temp_path)
+    else:
+        slicer.util.saveNode(labelmap_node, path)
+
+
+def save_current(labelmap_node, path, save_uint8):
+    """
+    Current saving code of saveNiiSegmentation (array copied on the main
+    thread, written by the segmentation writer).
+    """
+    data, affine = VolumeIO.get_labelmap_array(
+        None, labelmap_node, np.uint8 if save_uint8 else None)
+    batch_workers.write_labelmap_nifti(data, affine, path)
+
+
+def main(labelmap_path=None):
+    if labelmap_path is None:
+        nodes = [create_labelmap_node(np.uint8),
+                 create_labelmap_node(np.int16)]
+    else:
+        nodes = [slicer.util.loadLabelVolume(labelmap_path)]
+
+    failed = False
+    folder = tempfile.mkdtemp()
+    for node in nodes:
+        for save_uint8 in (True, False):
+            name = f'{node.GetName()}_save_uint8_{save_uint8}'
+            former_path = os.path.join(folder, f'{name}_former.nii.gz')
+            current_path = os.path.join(folder, f'{name}_current.nii.gz')
+            save_former(node, former_path, save_uint8)
+            save_current(node, current_path, save_uint8)
+
+            differences = compare_nifti_files(former_path, current_path)
+            print(f'{name}: {"DIFFERENT" if differences else "same"}')
+            for difference in differences:
+                print(f'    {difference}')
+            failed = failed or bool(differences)
+        slicer.mrmlScene.RemoveNode(node)
+    return failed
+
+
+if __name__ == '__main__':
+    failed = main(*sys.argv[1:2])
+    slicer.util.exit(1 if failed else 0)
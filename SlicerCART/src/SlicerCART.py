@@ -100,17 +100,46 @@ class SlicerCARTWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
         self._parameterNode = None
         self._updatingGUIFromParameterNode = False
         # LLG CODE BELOW
-        self.predictions_names = None
+        # Decodes the next cases of the remaining list in background.
+        self.prefetcher = None
+        # Optional on-disk cache of the decoded volumes (see VolumeCache).
+        self.volume_cache = None
+        # Overlap metrics of the compared segmentation versions.
+        self.segmentation_metrics = SegmentationMetrics()
+        # Segmentation status of the cases, and status painted in the UI case
+        # list by row (see update_case_list_colors).
+        self.case_status_index = None
+        self.case_list_status = {}
+        # Optional SQLite database of the project (see MetadataStore).
+        self.metadata_store = None
+        # Header-only geometry checks, and cases already warned about.
+        self.geometry_validator = None
+        self.geometry_warned_cases = set()
+        # Writes the saved segmentations in background; the timer reports
+        # the written and failed saves while some are pending.
+        self.segmentation_writer = SegmentationWriter()
+        self.segmentation_writer_timer = qt.QTimer()
+        self.segmentation_writer_timer.setInterval(250)
+        self.segmentation_writer_timer.timeout.connect(
+            self.on_segmentation_writer_poll)
+        # Imports the predictions in background (see
+        # onImportPredictionsButton).
+        self.import_predictions_runner = BatchRunner()
+        # Checks the geometry of the working list in background (see
+        # validate_geometry).
+        self.geometry_validation_runner = BatchRunner()
+        # Compares the annotators in background (see
+        # onInterRaterAgreementButton).
+        self.inter_rater_agreement_runner = BatchRunner()
 
         # ----- ANW Addition  ----- : Initialize called var to False so the
         # timer only stops once
         self.called = False
         self.called_onLoadSegmentation = False
 
-        # Create a temp file that serves as a flag to determine if output folder
-        # has been selected or not.
-        ConfigPath.create_temp_file()
-        Debug.print(self, '*** temp file created. BE CAREFUL! ***')
+        # The output folder is not selected yet: the initial configuration
+        # file is used (see ConfigPath.get_config_file_path).
+        ConfigPath.reset_session()
         self.config_yaml = ConfigPath.open_project_config_file()
         self.DefaultDir = ConfigPath.DEFAULT_VOLUMES_DIRECTORY
 
@@ -168,6 +197,13 @@ class SlicerCARTWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
         # To communicate classification version labels when loading
         # classification
         self.classification_version_labels = None
+        # Classification widgets by type and name, reused by the successive
+        # builds of the classification grid; widgets currently in the grid,
+        # and hash of the classification configuration they were built for
+        # (see set_classification_config_ui).
+        self.classification_widget_pool = {}
+        self.classification_grid_widgets = []
+        self.classification_config_hash = None
 
         # MB: code below added in the configuration setup since its absence
         # created issues when trying to load cases after selecting a volume
@@ -185,10 +221,16 @@ class SlicerCARTWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
             'clicked(bool)', self.onSelectVolumesFolderButton)
         self.ui.SlicerDirectoryListView.clicked.connect(
             self.getCurrentTableItem)
+        # Resolved at each click: the span profiler re-binds the method
+        # when it is enabled after setup (see SpanProfiler.configure).
         self.ui.SaveSegmentationButton.connect(
-            'clicked(bool)', self.onSaveSegmentationButton)
+            'clicked(bool)', lambda: self.onSaveSegmentationButton())
         self.ui.SelectOutputFolder.connect(
             'clicked(bool)', self.onSelectOutputFolder)
+        self.ui.ImportPredictionsButton.connect(
+            'clicked(bool)', self.onImportPredictionsButton)
+        self.ui.InterRaterAgreementButton.connect(
+            'clicked(bool)', self.onInterRaterAgreementButton)
         self.ui.LoadSegmentation.connect(
             'clicked(bool)',  self.onLoadSegmentation)
         self.ui.ToggleSegmentation.connect(
@@ -291,6 +333,28 @@ class SlicerCARTWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
         # Closes Data Probe upon landing in SlicerCART
         self.close_data_probe_on_startup()
 
+    @enter_function
+    def cleanup(self):
+        """
+        Called when the application closes and the module widget is
+        destroyed.
+        """
+        if self.prefetcher is not None:
+            self.prefetcher.shutdown()
+            self.prefetcher = None
+        if self.volume_cache is not None:
+            self.volume_cache.shutdown()
+            self.volume_cache = None
+        self.segmentation_metrics.shutdown()
+        self.import_predictions_runner.cancel()
+        self.geometry_validation_runner.cancel()
+        self.inter_rater_agreement_runner.cancel()
+        # Do not lose the segmentations still being written.
+        self.segmentation_writer_timer.stop()
+        self.segmentation_writer.shutdown()
+        if hasattr(self, 'WorkFiles'):
+            self.WorkFiles.save_remaining_list()
+
     @enter_function
     def close_data_probe_on_startup(self):
         """
@@ -514,17 +578,110 @@ class SlicerCARTWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
         # an already selected output folder. Uncomment to do above.
         # self.config_yaml = ConfigPath.open_project_config_file()
 
-        # clear classification widgets
-        for i in reversed(range(self.ui.ClassificationGridLayout.count())):
-            if self.ui.ClassificationGridLayout.itemAt(i).widget() is not None:
-                self.ui.ClassificationGridLayout.itemAt(i).widget().setParent(
-                    None)
+        # The grid is rebuilt only if the classification configuration
+        # changed (e.g. not on each case switch); the values of the widgets
+        # are reset by resetClassificationInformation.
+        config_hash = self.get_classification_config_hash()
+        if config_hash == self.classification_config_hash:
+            return
 
+        self.clear_classification_grid()
         comboboxesStartRow = (
             self.setupCheckboxes(3, self.config_yaml))
         freetextStartRow = self.setupComboboxes(comboboxesStartRow,
                                                 self.config_yaml)
         self.setupFreeText(freetextStartRow, self.config_yaml["freetextboxes"])
+        self.classification_config_hash = config_hash
+        # Widgets reused from previous grids keep their values.
+        self.resetClassificationInformation()
+
+    @enter_function
+    def get_classification_config_hash(self):
+        """
+        Get the hash of the classification labels of the configuration and
+        of the combobox version used to build the classification grid.
+        """
+        content = {
+            element: self.config_yaml.get(element)
+            for element in CLASSIFICATION_BOXES_LIST}
+        content['combobox version'] = ConfigPath.get_latest_combobox_version(
+            self.config_yaml)
+        return hashlib.sha1(json.dumps(
+            content, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    @enter_function
+    def clear_classification_grid(self):
+        """
+        Remove the widgets of the classification grid. The widgets are
+        hidden and kept for the next build of the grid (see
+        get_classification_widget).
+        """
+        layout = self.ui.ClassificationGridLayout
+        for widget in self.classification_grid_widgets:
+            layout.removeWidget(widget)
+            widget.hide()
+        # Widgets added to the grid elsewhere are not reused.
+        for i in reversed(range(layout.count())):
+            if layout.itemAt(i).widget() is not None:
+                layout.itemAt(i).widget().setParent(None)
+        self.classification_grid_widgets = []
+        # The grid must be rebuilt by set_classification_config_ui.
+        self.classification_config_hash = None
+
+    @enter_function
+    def get_classification_widget(self, key, widget_class, row, column):
+        """
+        Add a classification widget to the classification grid, reused from
+        a previous build of the grid if possible.
+        :param key: tuple (type of widget, label name) identifying the widget.
+        :param widget_class: class of the widget (e.g. qt.QCheckBox).
+        :param row: row of the widget in the grid.
+        :param column: column of the widget in the grid.
+        :return: the widget.
+        """
+        widget = self.classification_widget_pool.get(key)
+        if widget is None:
+            widget = widget_class()
+            self.classification_widget_pool[key] = widget
+        self.ui.ClassificationGridLayout.addWidget(widget, row, column)
+        widget.show()
+        self.classification_grid_widgets.append(widget)
+        return widget
+
+    @enter_function
+    def apply_classification_state(self, checkboxes=None, comboboxes=None,
+                                   freetextboxes=None):
+        """
+        Set the values of classification widgets at once: signals of the
+        widgets are blocked and the grid is repainted once at the end.
+        :param checkboxes: dictionary label name -> checked state.
+        :param comboboxes: dictionary label name -> text of the option.
+        :param freetextboxes: dictionary label name -> text.
+        """
+        widgets = []
+        for values, widgets_by_name in (
+                (checkboxes, self.checkboxWidgets),
+                (comboboxes, self.comboboxWidgets),
+                (freetextboxes, self.freeTextBoxes)):
+            for name, value in (values or {}).items():
+                if not isinstance(widgets_by_name.get(name), qt.QWidget):
+                    continue
+                widgets.append((widgets_by_name[name], value))
+
+        grid_widget = self.ui.ClassificationGridLayout.parentWidget()
+        grid_widget.setUpdatesEnabled(False)
+        try:
+            for widget, value in widgets:
+                widget.blockSignals(True)
+                if isinstance(widget, qt.QCheckBox):
+                    widget.setChecked(value)
+                elif isinstance(widget, qt.QComboBox):
+                    widget.setCurrentText(value)
+                else:
+                    widget.setText(value)
+                widget.blockSignals(False)
+        finally:
+            grid_widget.setUpdatesEnabled(True)
 
     @enter_function
     def set_master_volume_intensity_mask_according_to_modality(self):
@@ -561,15 +718,14 @@ class SlicerCARTWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
         if classif_label["checkboxes"] != None:
             for i, (objectName, label) in (
                     enumerate(iteration_dict["checkboxes"].items())):
-                checkbox = qt.QCheckBox()
-                checkbox.setText(label)
-                checkbox.setObjectName(objectName)
-
                 row_index = i / number_of_columns + 1
                 column_index = i % number_of_columns
 
-                self.ui.ClassificationGridLayout.addWidget(
-                    checkbox, row_index, column_index)
+                checkbox = self.get_classification_widget(
+                    ('checkboxes', objectName), qt.QCheckBox, row_index,
+                    column_index)
+                checkbox.setText(label)
+                checkbox.setObjectName(objectName)
                 self.checkboxWidgets[objectName] = checkbox
 
         return row_index + 1
@@ -606,19 +762,29 @@ class SlicerCARTWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
                     for comboBoxName, options in classif_label[
                         "comboboxes"][combobox_version].items():
 
-                        comboboxLabel = qt.QLabel(
+                        comboboxLabel = self.get_classification_widget(
+                            ('combobox label', comboBoxName), qt.QLabel,
+                            row_index, 0)
+                        comboboxLabel.setText(
                             comboBoxName.replace("_", " ").capitalize() + " :")
                         comboboxLabel.setStyleSheet("font-weight: bold")
-                        self.ui.ClassificationGridLayout.addWidget(
-                            comboboxLabel, row_index, 0)
 
-                        combobox = qt.QComboBox()
+                        combobox = self.get_classification_widget(
+                            ('comboboxes', comboBoxName), qt.QComboBox,
+                            row_index, 1)
                         combobox.setObjectName(comboBoxName)
 
-                        for optionKey, optionLabel in options.items():
-                            combobox.addItem(optionLabel, optionKey)
-                        self.ui.ClassificationGridLayout.addWidget(combobox,
-                                                                   row_index, 1)
+                        # Options are added again only if they changed (e.g.
+                        # other combobox version).
+                        items = [(combobox.itemText(index),
+                                  combobox.itemData(index))
+                                 for index in range(combobox.count)]
+                        if items != [(optionLabel, optionKey)
+                                     for optionKey, optionLabel
+                                     in options.items()]:
+                            combobox.clear()
+                            for optionKey, optionLabel in options.items():
+                                combobox.addItem(optionLabel, optionKey)
                         self.comboboxWidgets[comboBoxName] = combobox
                         row_index = row_index + 1
 
@@ -641,14 +807,15 @@ class SlicerCARTWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
 
             for i, (freeTextObjectName, freeTextLabel) \
                     in enumerate(columns_to_check.items()):
-                freeTextQLabel = qt.QLabel(freeTextLabel.capitalize() + " :")
+                freeTextQLabel = self.get_classification_widget(
+                    ('freetextbox label', freeTextObjectName), qt.QLabel,
+                    row_index, 0)
+                freeTextQLabel.setText(freeTextLabel.capitalize() + " :")
                 freeTextQLabel.setStyleSheet("font-weight: bold")
-                self.ui.ClassificationGridLayout.addWidget(
-                    freeTextQLabel, row_index, 0)
-                lineEdit = qt.QLineEdit()
+                lineEdit = self.get_classification_widget(
+                    ('freetextboxes', freeTextObjectName), qt.QLineEdit,
+                    row_index, 1)
                 self.freeTextBoxes[freeTextObjectName] = lineEdit
-                self.ui.ClassificationGridLayout.addWidget(lineEdit, row_index,
-                                                           1)
                 row_index = row_index + 1
 
     @enter_function
@@ -757,15 +924,11 @@ class SlicerCARTWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
         if file_structure_valid == False:
             return  # don't load any patient cases
 
-        self.CasesPaths = sorted(glob(
-            f'{self.CurrentFolder}{os.sep}**{os.sep}'
-            f'{ConfigPath.INPUT_FILE_EXTENSION}',
-            recursive=True))
-
-        # Remove the volumes in the folder 'derivatives' (creates issues for
-        # loading cases)
-        self.CasesPaths = [item for item in self.CasesPaths if 'derivatives' not
-                           in item]
+        # The volumes in the folder 'derivatives' are excluded during the
+        # discovery (creates issues for loading cases).
+        self.CasesPaths = CaseDiscovery(self.CurrentFolder,
+                                        ConfigPath.INPUT_FILE_EXTENSION,
+                                        self.outputFolder).discover()
 
         if not self.CasesPaths:
             message = ('No files found in the selected directory!'
@@ -804,6 +967,8 @@ class SlicerCARTWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
         """
         self.ui.SlicerDirectoryListView.clear()
         self.ui.SlicerDirectoryListView.addItems(self.Cases)
+        self.case_list_status = {}
+        self.update_case_list_colors()
 
         self.currentCase_index = 0  # THIS IS THE CENTRAL THING THAT HELPS
         # FOR CASE NAVIGATION
@@ -825,8 +990,7 @@ class SlicerCARTWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
         Set the patient to be displayed in UI case list and Slicer Viewer from
         filename.
         """
-        index = self.WorkFiles.find_index_from_filename(filename,
-                                                        self.Cases)
+        index = self.WorkFiles.find_working_list_index(filename)
         currentCasePath = self.WorkFiles.find_path_from_filename(filename)
 
         self.currentCase = filename
@@ -840,10 +1004,30 @@ class SlicerCARTWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
         """
 
         self.config_yaml = ConfigPath.open_project_config_file()
+        # Persist the remaining list of the previous output folder if any.
+        if hasattr(self, 'WorkFiles'):
+            self.WorkFiles.save_remaining_list()
         # Instantiate a WorkFiles class object to facilitate cases lists
         # management.
         self.WorkFiles = WorkFiles(self.CurrentFolder, self.outputFolder)
 
+        if self.prefetcher is not None:
+            self.prefetcher.shutdown()
+            self.prefetcher = None
+        if self.volume_cache is not None:
+            self.volume_cache.shutdown()
+            self.volume_cache = None
+        if ConfigPath.VOLUME_CACHE_MB > 0:
+            self.volume_cache = VolumeCache(
+                ConfigPath.VOLUME_CACHE_DIRECTORY
+                or os.path.join(self.outputFolder, CONF_FOLDER_NAME,
+                                VOLUME_CACHE_FOLDER_NAME),
+                ConfigPath.VOLUME_CACHE_MB)
+        if ConfigPath.PREFETCH_DEPTH > 0:
+            self.prefetcher = VolumePrefetcher(
+                ConfigPath.PREFETCH_DEPTH, ConfigPath.PREFETCH_MEMORY_CAP_MB,
+                volume_cache=self.volume_cache)
+
         # Set up working list appropriateness compared to volumes folder
         # selected.
         if self.WorkFiles.check_working_list() == False:
@@ -865,19 +1049,33 @@ class SlicerCARTWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
             return
 
         # Re-assignation of self.Cases and self.CasesPath based on working list.
-        self.Cases = self.WorkFiles.get_working_list_filenames(self)
+        self.Cases = self.WorkFiles.get_working_list_filenames()
         self.CasesPaths = self.WorkFiles.get_working_list_filepaths(self.Cases)
+
+        self.case_status_index = CaseStatusIndex(self.outputFolder,
+                                                 self.CurrentFolder)
+        self.case_status_index.refresh(self.CasesPaths)
+
+        # The configuration of the output folder may enable the profiler.
+        SpanProfiler.configure(ConfigPath.ENABLE_SPAN_PROFILER,
+                               self.outputFolder)
+
+        self.validate_geometry()
+
+        self.metadata_store = None
+        if ConfigPath.METADATA_STORE:
+            self.metadata_store = MetadataStore(self.outputFolder)
+            # Saves made without the store since the last import.
+            self.metadata_store.import_output_folder(
+                self.metadata_store.get_last_import_time())
+
         self.reset_ui()
 
         # Get the first case of remaining list (considers if empty).
-        remaining_list_filenames = (
-            self.WorkFiles.get_remaining_list_filenames(self))
+        remaining_list_first = self.WorkFiles.get_first_remaining_filename()
 
-        if self.WorkFiles.check_remaining_first_element(
-                remaining_list_filenames):
+        if remaining_list_first is not None:
             Debug.print(self, 'First case in remaining list ok.')
-            remaining_list_first = self.WorkFiles.get_remaining_list_filenames(
-                self)[0]
         else:
             Debug.print(self, 'Remaining list empty. Select case from working '
                               'list (working list should never be empty).')
@@ -1055,10 +1253,10 @@ class SlicerCARTWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
         # timer reset if we come back to same case
         self.called = False
 
+        self.warn_geometry_issues()
+
         slicer.mrmlScene.Clear()
-        slicer.util.loadVolume(self.currentCasePath)
-        self.VolumeNode = \
-            slicer.util.getNodesByClass('vtkMRMLScalarVolumeNode')[0]
+        self.VolumeNode = self.load_volume_node(self.currentCasePath)
         self.updateCaseAll()
         # Adjust windowing (no need to use self. since this is used locally)
         Vol_displayNode = self.VolumeNode.GetDisplayNode()
@@ -1081,6 +1279,61 @@ class SlicerCARTWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
         if self.ui.ToggleSegmentation.isChecked():
             self.toggle_segmentation_masks()
 
+        self.prefetch_next_cases()
+
+    @enter_function
+    def load_volume_node(self, path):
+        """
+        Load a volume in the scene, from the prefetched cases, from a memory
+        map of uncompressed files or from the volume cache if possible.
+        Volumes loaded from their compressed file are added to the volume
+        cache.
+
+        Args:
+        path: path of the volume file to load.
+        """
+        volume = None
+        if self.prefetcher is not None:
+            volume = self.prefetcher.pop(path)
+
+        if volume is None:
+            # Uncompressed files are copied from a memory map into the node.
+            volume = VolumeIO.read_volume_array_mmap(self, path)
+
+        if volume is None and self.volume_cache is not None:
+            volume = self.volume_cache.get(path)
+
+        if volume is not None:
+            array, affine = volume
+            return VolumeIO.create_volume_node(
+                self, array, affine, VolumeIO.get_volume_node_name(self, path))
+
+        volume_node = slicer.util.loadVolume(path)
+        if self.volume_cache is not None:
+            # Copy: the voxels of the node are released with the scene.
+            ijk_to_ras = vtk.vtkMatrix4x4()
+            volume_node.GetIJKToRASMatrix(ijk_to_ras)
+            self.volume_cache.put(
+                path, np.array(slicer.util.arrayFromVolume(volume_node)),
+                slicer.util.arrayFromVTKMatrix(ijk_to_ras))
+        return volume_node
+
+    @enter_function
+    def prefetch_next_cases(self):
+        """
+        Schedule the decoding of the cases following the current case in the
+        remaining list.
+        """
+        if self.prefetcher is None or not hasattr(self, 'WorkFiles'):
+            return
+
+        next_cases = self.WorkFiles.get_next_remaining_filenames(
+            self.currentCase, self.prefetcher.depth)
+        next_paths = [self.WorkFiles.find_path_from_filename(filename)
+                      for filename in next_cases]
+        self.prefetcher.prefetch(
+            [path for path in next_paths if path is not None])
+
     @enter_function
     def updateCurrentOutputPathAndCurrentVolumeFilename(self):
         """
@@ -1143,7 +1396,7 @@ class SlicerCARTWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
         
         Args:.
         """
-        # self.update_case_list_colors()
+        self.update_case_list_colors()
         self.ui.SlicerDirectoryListView.setCurrentItem(
             self.ui.SlicerDirectoryListView.item(self.currentCase_index))
         self.update_current_segmentation_status()
@@ -1657,99 +1910,48 @@ class SlicerCARTWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
         
         Args:.
         """
-        # Try/Except to prevent crashing when selecting another file in the
-        # UI case list if no classification_config_yaml file is already created.
-        version = ConfigPath.get_combobox_version()
-        try:
-            self.config_yaml["checkboxes"]
-            for i, (objectName, label) \
-                    in enumerate(self.config_yaml["checkboxes"].items()):
-                self.checkboxWidgets[objectName].setChecked(False)
-            for i, (comboBoxName, options) \
-                    in enumerate(
-                self.config_yaml["comboboxes"][version].items()):
-                self.comboboxWidgets[
-                    comboBoxName].currentText = list(options.items())[0][1]
-            for i, (freeTextBoxObjectName, label) \
-                    in enumerate(self.config_yaml["freetextboxes"].items()):
-                self.freeTextBoxes[freeTextBoxObjectName].setText("")
-        except:
-            pass
+        # All widgets of the grid are reset at once (unchecked checkboxes,
+        # first option of the comboboxes, empty free text boxes). Getattr
+        # prevents crashing when selecting another file in the UI case list
+        # if the classification grid is not built yet.
+        checkboxWidgets = getattr(self, 'checkboxWidgets', {})
+        comboboxWidgets = getattr(self, 'comboboxWidgets', {})
+        freeTextBoxes = getattr(self, 'freeTextBoxes', {})
+        if not (checkboxWidgets or comboboxWidgets or freeTextBoxes):
+            return
+        self.apply_classification_state(
+            checkboxes={name: False for name in checkboxWidgets},
+            comboboxes={name: combobox.itemText(0)
+                        for name, combobox in comboboxWidgets.items()
+                        if isinstance(combobox, qt.QComboBox)},
+            freetextboxes={name: "" for name in freeTextBoxes})
 
     @enter_function
-    def getClassificationInformation(self):
+    def get_classification_store(self):
         """
-        Get all classification information available from both existing csv
-        file and from the current SlicerCART module. Then, update all
-        information available to an updated dataframe.
-        return: dataframe with all previous and actual classification labels.
-        """
-        self.outputClassificationInformationFile = (
-            os.path.join(self.currentOutputPath,
-                         '{}_ClassificationInformation.csv'.format(
-                             self.currentVolumeFilename)))
-        df = None
-        if os.path.exists(
-                self.outputClassificationInformationFile) and os.path.isfile(
-            self.outputClassificationInformationFile):
-            df = pd.read_csv(self.outputClassificationInformationFile)
-
-        label_string_slicer = ""
-        data_string_slicer = ""
-
-        if df is not None:
-            # Means that classification csv file already exists.
-            Debug.print(
-                self, 'Classification csv file already exists. To '
-                              'update.')
-
-            # Get Slicer Classification data only
-            label_string_slicer, data_string_slicer = (
-                self.get_classif_config_data())
-            Debug.print(self,
-                        'Got classification details from Slicer.')
-
-            # Add Slicer Classification data header to csv df
-            df = self.add_missing_columns_to_df(df, label_string_slicer)
-            # Extract column names into a dictionary
-            columns_dict = self.extract_header_from_df(df)
-
-            # Extract previous data into a dictionary
-            data_dict = {col: df[col].tolist() for col in df.columns}
-
-            # Update classification data with annotation information (e.g.
-            # annotator names, degree, revision step, etc.)
-            data_string_slicer.update(self.build_current_classif_dictionary())
-
-            # Check if any columns in actual classification labels has been
-            # removed, and add -- if the column that has been removed
-            data_string_slicer = (
-                self.add_mark_for_removed_columns(df, data_string_slicer))
-
-            # Ensure each element of the dictionary is ready to be converted
-            # in df
-            data_string_slicer = (
-                self.convert_string_values_to_list_element(data_string_slicer))
-
-            # At this point, previous dict and new dict should have the same
-            # format: combine the dictionaries
-            combined_df = self.combine_dict(data_dict, data_string_slicer)
-            df = combined_df
-
-        else:
-            # Classification csv file does not exist already.
-            label_string, data_string = self.get_classif_config_data()
-            info_dict = self.build_current_classif_dictionary()
-
-            data_dict = {}
-            data_dict.update(info_dict)
-            data_dict.update(data_string)
+        Get the classification store of the current case.
+        """
+        return ClassificationStore(os.path.join(
+            self.currentOutputPath,
+            f'{self.currentVolumeFilename}'
+            f'{CLASSIFICATION_INFORMATION_SUFFIX}'))
 
-            # Ensure dictionary is ready to be converted to df
-            data_dict = self.convert_string_values_to_list_element(data_dict)
-            df = pd.DataFrame(data_dict)
+    @enter_function
+    def getClassificationInformation(self):
+        """
+        Get the classification information of the current SlicerCART module
+        (annotation information and classification labels). Previous
+        classifications are not read: columns of the csv file that are not
+        in the record are marked when saving (see ClassificationStore.append).
+        return: dictionary column name -> value of the classification to save.
+        """
+        label_string, data_string = self.get_classif_config_data()
 
-        return df
+        # Annotation information (e.g. annotator names, degree, revision
+        # step, etc.) first, as in the csv files.
+        record = self.build_current_classif_dictionary()
+        record.update(data_string)
+        return record
 
     @enter_function
     def get_classif_config_data(self):
@@ -1784,44 +1986,21 @@ class SlicerCARTWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
         if classif_label != None:
 
             try:
-                self.outputClassificationInformationFile = (
-                    os.path.join(self.currentOutputPath,
-                                 '{}_ClassificationInformation.csv'.format(
-                                     self.currentVolumeFilename)))
-                df = None
-                if (os.path.exists(
-                        self.outputClassificationInformationFile)
-                        and os.path.isfile(
-                            self.outputClassificationInformationFile)):
-                    df = pd.read_csv(self.outputClassificationInformationFile)
-
-                if df is not None:
-                    column_names = self.extract_header_from_df(df)
+                store = self.get_classification_store()
+                if store.get_file_state() is not None:
+                    # Column schema from the sidecar of the csv file (the csv
+                    # file is parsed only if it was modified elsewhere).
+                    column_names = store.get_label_columns()
 
                     csv_columns_dict = {'checkboxes': {}, 'freetextboxes': {}}
                     for key, value in column_names.items():
-                        if value == 'checkboxes':
-                            tag = key.split(":")[0][2:-1]
-                            if tag in classif_label['checkboxes']:
-                                temp_dict = {}
-                                temp_dict[tag] = (
-                                    tag.replace("_", " ").capitalize())
-                                csv_columns_dict[
-                                    'checkboxes'][
-                                    tag] = tag.replace("_", " ").capitalize()
                         # Not required to rebuild comboboxes here since already
                         # using a version control system.
-                        # if value == 'comboboxes':
-                        #     print('comboboxes', value)
-                        if value == 'freetextboxes':
-                            tag = key.split(":")[0][2:-1]
-                            if tag in classif_label['freetextboxes']:
-                                temp_dict = {}
-                                temp_dict[tag] = (
+                        if value in csv_columns_dict:
+                            tag = store.parse_column(key)[0]
+                            if tag in classif_label[value]:
+                                csv_columns_dict[value][tag] = (
                                     tag.replace("_", " ").capitalize())
-                                csv_columns_dict[
-                                    'freetextboxes'][
-                                    tag] = tag.replace("_", " ").capitalize()
 
                     return csv_columns_dict
             except:
@@ -1981,19 +2160,12 @@ class SlicerCARTWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
         classification label as values.
         """
         label_string = {}
-        columns_name = list(df.columns.tolist())  # Get a list of column names
-
-        for col in columns_name:
-            try:
-                # Attempt to evaluate the string as a dictionary
-                col_dict = eval(col)
-                if isinstance(col_dict, dict):
-                    # Extract the single key-value pair from the dictionary
-                    for key, value in col_dict.items():
-                        label_string[col] = value
-            except (SyntaxError, NameError, ValueError):
-                # Handle cases where col is not a valid dictionary
-                label_string[col] = col
+        for col in df.columns.tolist():
+            # Classification label columns are formatted as
+            # "{'<label name>': '<type of label>'}"; other columns are kept
+            # as is.
+            kind = ClassificationStore.parse_column(self, col)[1]
+            label_string[col] = col if kind is None else kind
 
         return label_string
 
@@ -2056,25 +2228,47 @@ class SlicerCARTWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
         # Save if annotator_name is not empty and timer started:
         if self.annotator_name and self.time is not None:
 
-            self.saveSegmentationInformation(currentSegmentationVersion)
-
             # If not working, the solution is likely to add here:
             # self.config_yaml = ConfigPath.open_project_config_file() # Get
             # latest/appropriate configuration
             # self.config_yaml = ConfigPath.set_config_value(
             # self.config_yaml) # Set appropriate values for configuration
 
+            # The data to save is copied now; the files are written by the
+            # segmentation writer while the next case is loading.
+            paths = []
+            steps = []
             if 'nrrd' in ConfigPath.INPUT_FILE_EXTENSION:
-                self.saveNrrdSegmentation(currentSegmentationVersion)
+                write_step = self.saveNrrdSegmentation(
+                    currentSegmentationVersion)
+                if write_step is not None:
+                    paths.append(self.outputSegmFile)
+                    steps.append(write_step)
 
             if 'nii' in ConfigPath.INPUT_FILE_EXTENSION:
-                self.saveNiiSegmentation(currentSegmentationVersion)
-
-            msg_box = qt.QMessageBox()
-            msg_box.setWindowTitle("Success")
-            msg_box.setIcon(qt.QMessageBox.Information)
-            msg_box.setText("Segmentation saved successfully!")
-            msg_box.exec()
+                write_step = self.saveNiiSegmentation(
+                    currentSegmentationVersion)
+                if write_step is not None:
+                    paths.append(self.outputSegmFileNifti)
+                    steps.append(write_step)
+
+            # Once the segmentation files are written.
+            steps.append(partial(
+                self.get_segmentation_version_counter().record_save,
+                currentSegmentationVersion))
+            steps.extend(
+                self.saveSegmentationInformation(currentSegmentationVersion))
+
+            result = {'output_folder': self.outputFolder,
+                      'case': self.currentCase,
+                      'annotator': self.annotator_name,
+                      'version': currentSegmentationVersion,
+                      'information_path': self.outputSegmentationInformationFile}
+            self.segmentation_writer.submit(
+                f'{self.currentCase} {currentSegmentationVersion}', paths,
+                steps, result)
+            self.on_segmentation_writer_poll()
+            self.segmentation_writer_timer.start()
 
         # If annotator_name empty or timer not started.
         else:
@@ -2087,13 +2281,49 @@ class SlicerCARTWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
             elif self.time is None:
                 print("Error: timer is not started for some unknown reason.")
 
-        # self.update_case_list_colors()
-
         # One segment has been saved, which allows to load the next case from
         # now.
         self.saved_selected = True
         self.select_next_remaining_case()
 
+    @enter_function
+    def on_segmentation_writer_poll(self):
+        """
+        Report the segmentations written since the last call: update the
+        case status index and the case list colors, put the cases of the
+        failed saves back into the remaining list, warn the user about them
+        and display the number of pending saves.
+        """
+        failures = []
+        for description, result, error in self.segmentation_writer.poll():
+            if error is not None:
+                failures.append(f'{description}: {error}')
+                # The case left the remaining list when the save was
+                # queued: put it back so that it is not skipped.
+                if (result is not None
+                        and result['output_folder'] == self.outputFolder):
+                    self.WorkFiles.restore_remaining_list(result['case'])
+            elif (self.case_status_index is not None
+                  and result['output_folder'] == self.outputFolder):
+                self.case_status_index.record_save(
+                    result['case'], result['annotator'], result['version'],
+                    result['information_path'])
+                self.update_case_list_colors()
+
+        pending_count = self.segmentation_writer.get_pending_count()
+        self.ui.PendingWritesStatus.setText(f'Pending saves : {pending_count}')
+        if pending_count == 0:
+            self.segmentation_writer_timer.stop()
+
+        if failures:
+            message = ('SEGMENTATION NOT SAVED!\n\n'
+                       'Writing failed for:\n'
+                       + '\n'.join(failures)
+                       + '\n\nThese cases were put back into the remaining '
+                         'list. Please check the output folder and save '
+                         'them again.')
+            Dev.show_message_box(self, message, box_title='ATTENTION!')
+
     @enter_function
     def select_next_remaining_case(self):
         """
@@ -2108,11 +2338,9 @@ class SlicerCARTWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
                     f'self.currentCase_index + 1 = '
                     f'{self.currentCase_index + 1}')
 
-        remaining_list_filenames = self.WorkFiles.get_remaining_list_filenames()
-
-        if ((remaining_list_filenames == [])
-                or (remaining_list_filenames == None)
-                or (len(remaining_list_filenames) == 0)):
+        # The remaining list is kept in memory by WorkFiles: the operations
+        # below do not depend on the number of cases.
+        if self.WorkFiles.get_remaining_list_count() == 0:
             Debug.print(self, 'Remaining list empty!')
             next_case_name = self.select_next_working_case()
 
@@ -2122,18 +2350,17 @@ class SlicerCARTWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
 
             return
 
-        if self.currentCase in remaining_list_filenames:
-            current_case_index = self.WorkFiles.find_index_from_filename(
-                self.currentCase, remaining_list_filenames)
-            next_case_index = current_case_index + 1
+        if self.WorkFiles.is_in_remaining_list(self.currentCase):
+            next_case_names = self.WorkFiles.get_next_remaining_filenames(
+                self.currentCase)
 
-            if next_case_index >= len(remaining_list_filenames):
+            if next_case_names == []:
                 Debug.print(self, 'This is the last case!')
                 next_case_name = self.currentCase  # So, remain on the last
                 # case.
 
             else:
-                next_case_name = remaining_list_filenames[next_case_index]
+                next_case_name = next_case_names[0]
 
             self.WorkFiles.adjust_remaining_list(self.currentCase)
 
@@ -2152,9 +2379,10 @@ class SlicerCARTWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
         Select the next case to be displayed from the working list.
         """
 
-        working_list_filenames = self.WorkFiles.get_working_list_filenames()
-        index_in_working_list = self.WorkFiles.find_index_from_filename(
-            self.currentCase, working_list_filenames)
+        # self.Cases is the working list (see manage_workflow).
+        working_list_filenames = self.Cases
+        index_in_working_list = self.WorkFiles.find_working_list_index(
+            self.currentCase)
 
         # Means that segmentation have already been saved.
         if self.saved_selected:
@@ -2234,15 +2462,17 @@ class SlicerCARTWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
         """
         Note that NRRD segmentation save in uint8 by default in contrast to
         .nii.gz format.
+        :return: step of the segmentation writer job writing the .seg.nrrd
+        file (None if the file exists and must not be replaced).
         """
         # Save .seg.nrrd file
         self.outputSegmFile = os.path.join(
             self.currentOutputPath,
             "{}_{}.seg.nrrd".format(
                 self.currentVolumeFilename, currentSegmentationVersion))
-        if not os.path.isfile(self.outputSegmFile):
-            slicer.util.saveNode(self.segmentationNode, self.outputSegmFile)
-        else:
+        self.replace_segmentation_file = True
+        is_existing_file = os.path.isfile(self.outputSegmFile)
+        if is_existing_file:
             msg2 = qt.QMessageBox()
             msg2.setWindowTitle('Save As')
             msg2.setText(
@@ -2254,6 +2484,18 @@ class SlicerCARTWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
             msg2.setStandardButtons(qt.QMessageBox.Ok | qt.QMessageBox.Cancel)
             msg2.buttonClicked.connect(self.msg2_clicked)
             msg2.exec()
+            if not self.replace_segmentation_file:
+                return None
+
+        # Segments copied on the main thread (Slicer nodes cannot be used
+        # from the segmentation writer thread), written with pynrrd.
+        segmentation_arrays = VolumeIO.get_segmentation_arrays(
+            self, self.segmentationNode, self.VolumeNode)
+        return partial(self.segmentation_writer.write_atomically,
+                       self.outputSegmFile,
+                       partial(batch_workers.write_segmentation_nrrd,
+                               *segmentation_arrays),
+                       replace=is_existing_file)
 
     @enter_function
     def saveNiiSegmentation(self, currentSegmentationVersion):
@@ -2262,6 +2504,8 @@ class SlicerCARTWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
         .nii.gz format that saves by default in INT16. In that context,
         the flag SAVE_UINT8 (set to true by default in the config file),
         determines the type of the .nii.gz segmentation files.
+        :return: step of the segmentation writer job writing the .nii.gz
+        file (None if the file already exists).
         """
         # Export segmentation to labelmap (required step for .nii.gz files)
         self.labelmapVolumeNode = slicer.mrmlScene.AddNewNodeByClass(
@@ -2277,36 +2521,28 @@ class SlicerCARTWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
             self.currentOutputPath,
             f"{self.currentVolumeFilename}_{currentSegmentationVersion}.nii.gz"
         )
+        if os.path.isfile(self.outputSegmFileNifti):
+            Debug.print(self, f"Segmentation not saved (already exists):"
+                              f" {self.outputSegmFileNifti}")
+            slicer.mrmlScene.RemoveNode(self.labelmapVolumeNode)
+            return None
+
         if ConfigPath.SAVE_UINT8:
             Debug.print(self, "Save segmentation to UINT8.")
-            # Save to a temporary file (optimal for uint8 type)
-            temp_path = os.path.join(slicer.app.temporaryPath,
-                                     "temp_seg.nii.gz")
-            slicer.util.saveNode(self.labelmapVolumeNode, temp_path)
-
-            # Step 3: Load and cast to UINT8 with nibabel
-            nii = nib.load(temp_path)
-            data = nii.get_fdata().astype(np.uint8)
-            new_nii = nib.Nifti1Image(data, affine=nii.affine,
-                                      header=nii.header)
-            new_nii.set_data_dtype(np.uint8)
-
-            if not os.path.isfile(self.outputSegmFileNifti):
-                nib.save(new_nii, self.outputSegmFileNifti)
-                Debug.print(self, f"Saved UINT8 segmentation to:"
-                                  f" {self.outputSegmFileNifti}")
-
-            # Remove temp file
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
-
+            # Cast the labelmap voxels in memory (no temporary file).
+            data, affine = VolumeIO.get_labelmap_array(
+                self, self.labelmapVolumeNode)
         else:
-            Debug.print(self, "Save segmentation to UINT16.")
-            if not os.path.isfile(self.outputSegmFileNifti):
-                slicer.util.saveNode(self.labelmapVolumeNode,
-                                     self.outputSegmFileNifti)
-                Debug.print(self, f"Saved INT16 segmentation to:"
-                                  f" {self.outputSegmFileNifti}")
+            # Scalar type of the labelmap, as written by saveNode.
+            Debug.print(self, "Save segmentation to the labelmap type.")
+            data, affine = VolumeIO.get_labelmap_array(
+                self, self.labelmapVolumeNode, None)
+        slicer.mrmlScene.RemoveNode(self.labelmapVolumeNode)
+
+        return partial(self.segmentation_writer.write_atomically,
+                       self.outputSegmFileNifti,
+                       partial(batch_workers.write_labelmap_nifti, data,
+                               affine))
 
     @enter_function
     def saveSegmentationInformation(self, currentSegmentationVersion):
@@ -2315,81 +2551,65 @@ class SlicerCARTWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
         
         Args:
         currentSegmentationVersion: Description of currentSegmentationVersion.
+
+        :return: steps of the segmentation writer job appending the
+        information record to the segmentation information ledger (and to
+        the metadata store if enabled).
         """
-        # Header row
         self.previousAction = None
-        tag_str = ("Volume filename,Segmentation version,Annotator Name,"
-                   "Annotator degree,Revision step,Date and time,Duration")
-
-        for label in self.config_yaml["labels"]:
-            tag_str += "," + label["name"] + " duration"
-
-        # Add line detail headers
-        for line_key in self.lineDetails:
-            tag_str += (f",{line_key} ControlPoint1,{line_key} ControlPoint2,"
-                        f"{line_key} Length")
-
-        data_str = self.currentCase
-        data_str += "," + currentSegmentationVersion
-        data_str += "," + self.annotator_name
-        data_str += "," + self.annotator_degree
-        data_str += "," + self.revision_step[0]
-        data_str += "," + datetime.today().strftime('%Y-%m-%d %H:%M:%S')
-        data_str += "," + str(self.ui.lcdNumber.value)
-
-        for timer in self.timers:
-            data_str += "," + str(timer.total_time)
-
-        # Add line details, ensuring control points are kept in one cell
+        record = {
+            "Volume filename": self.currentCase,
+            "Segmentation version": currentSegmentationVersion,
+            "Annotator Name": self.annotator_name,
+            "Annotator degree": self.annotator_degree,
+            "Revision step": self.revision_step[0],
+            "Date and time": datetime.today().strftime('%Y-%m-%d %H:%M:%S'),
+            "Duration": float(self.ui.lcdNumber.value)}
+
+        for label, timer in zip(self.config_yaml["labels"], self.timers):
+            record[f'{label["name"]} duration'] = float(timer.total_time)
+
+        # Add line details (control points are saved as lists, joined with
+        # semicolons in the exported csv file).
         for line_key, line_data in self.lineDetails.items():
-            control_point1 = ';'.join(
-                map(str, line_data["ControlPoint1"]))  # Join with semicolon
-            control_point2 = ';'.join(
-                map(str, line_data["ControlPoint2"]))  # Join with semicolon
-            length = line_data[
-                "Length"]  # Length is a number, no need for conversion
-
-            # Add control points and length to the data string
-            data_str += f",{control_point1},{control_point2},{length}"
+            record[f'{line_key} ControlPoint1'] = [
+                float(value) for value in line_data["ControlPoint1"]]
+            record[f'{line_key} ControlPoint2'] = [
+                float(value) for value in line_data["ControlPoint2"]]
+            record[f'{line_key} Length'] = float(line_data["Length"])
 
         self.outputSegmentationInformationFile = os.path.join(
             self.currentOutputPath,
-            f'{self.currentVolumeFilename}_SegmentationInformation.csv')
-
-        if os.path.isfile(self.outputSegmentationInformationFile):
-            # Read existing contents
-            with open(self.outputSegmentationInformationFile, 'r') as f:
-                existing_content = f.readlines()
-                existing_content = existing_content[1:] if len(
-                    existing_content) > 1 else []
-
-            # Rewrite the file with the new header and existing data
-            with open(self.outputSegmentationInformationFile, 'w') as f:
-                f.write(tag_str + "\n")  # Write the new header
-                f.writelines(existing_content)  # Write the old content
-
-            # Append the new data
-            with open(self.outputSegmentationInformationFile, 'a') as f:
-                f.write(data_str + "\n")
-        else:
-            # If the file doesn't exist, create it and write the header and data
-            with open(self.outputSegmentationInformationFile, 'w') as f:
-                f.write(tag_str + "\n")
-                f.write(data_str + "\n")
+            f'{self.currentVolumeFilename}{SEGMENTATION_LEDGER_SUFFIX}')
+
+        steps = [partial(
+            SegmentationLedger(self.outputSegmentationInformationFile).append,
+            record)]
+        if self.metadata_store is not None:
+            # After the ledger append, which sets the record id.
+            steps.append(partial(self.metadata_store.add_segmentation_record,
+                                 record))
+        return steps
 
     @enter_function
-    def saveClassificationInformation(self, classification_df):
+    def saveClassificationInformation(self, classification_record):
         """
-        Save updated classification information to a csv file.
-        :param: dataframe containing all updated classification data.
+        Save a classification to the csv file of the current case (appended
+        as a new row).
+        :param: dictionary column name -> value of the classification.
         """
-        self.outputClassificationInformationFile = os.path.join(
-            self.currentOutputPath,
-            '{}_ClassificationInformation.csv'.format(
-                self.currentVolumeFilename))
+        store = self.get_classification_store()
+        self.outputClassificationInformationFile = store.information_path
 
-        classification_df.to_csv(self.outputClassificationInformationFile,
-                                 index=False)
+        row, row_index = store.append(classification_record,
+                                      self.combobox_version)
+
+        if self.metadata_store is not None:
+            # Same record id as import_output_folder (file and row index).
+            relative_path = os.path.relpath(
+                self.outputClassificationInformationFile, self.outputFolder)
+            self.metadata_store.add_classification_record(
+                row, f'{relative_path}:{row_index}')
 
     @enter_function
     def getClassificationInformationVersion(self):
@@ -2398,25 +2618,8 @@ class SlicerCARTWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
         
         Args:.
         """
-        version = "v"
-        classificationInformationPath = (f'{self.currentOutputPath}{os.sep}'
-                                         f'{self.currentVolumeFilename}'
-                                         f'_ClassificationInformation.csv')
-
-        if os.path.exists(classificationInformationPath) == False:
-            version = version + "01"
-
-        else:
-            csv_data = pd.read_csv(classificationInformationPath)
-            existing_version_strings = csv_data[
-                'Classification version'].to_list()
-            existing_version_numbers = [(int)(version_string.split("v")[1]) for
-                                        version_string in
-                                        existing_version_strings]
-            next_version_number = max(existing_version_numbers) + 1
-            version = f'{version}{next_version_number:02d}'
-
-        return version
+        # Latest version from the schema sidecar of the csv file.
+        return self.get_classification_store().get_next_version()
 
     @enter_function
     def getCurrentSegmentationVersion(self):
@@ -2425,23 +2628,18 @@ class SlicerCARTWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
         
         Args:.
         """
-        # Adjust the version according to each individual file.
-        list_of_segmentation_filenames = glob(
-            f'{self.currentOutputPath}{os.sep}'
-            f'{self.currentVolumeFilename}{ConfigPath.INPUT_FILE_EXTENSION}')
+        # Include the versions queued in the segmentation writer.
+        return self.get_segmentation_version_counter().get_next_version(
+            self.segmentation_writer.get_pending_paths())
 
-        version = 'v'
-        if list_of_segmentation_filenames == []:
-            version = version + "01"
-        else:
-            existing_versions = [(int)(filename.split('_v')[1].split(".")[0])
-                                 for
-                                 filename in list_of_segmentation_filenames]
-            next_version_number = max(existing_versions) + 1
-            next_version_number = min(next_version_number,
-                                      99)  # max 99 versions
-            version = f'{version}{next_version_number:02d}'
-        return version
+    @enter_function
+    def get_segmentation_version_counter(self):
+        """
+        Get the segmentation version counter of the current case.
+        """
+        return SegmentationVersionCounter(self.currentOutputPath,
+                                          self.currentVolumeFilename,
+                                          ConfigPath.INPUT_FILE_EXTENSION)
 
     @enter_function
     def msg2_clicked(self, msg2_button):
@@ -2451,10 +2649,7 @@ class SlicerCARTWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
         Args:
         msg2_button: Description of msg2_button.
         """
-        if msg2_button.text == 'OK':
-            slicer.util.saveNode(self.segmentationNode, self.outputSegmFile)
-        else:
-            return
+        self.replace_segmentation_file = msg2_button.text == 'OK'
 
     @enter_function
     def msg3_clicked(self, msg3_button):
@@ -2521,7 +2716,7 @@ class SlicerCARTWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
         #     self.verify_empty()
 
         ConfigPath.check_existing_configuration()
-        ConfigPath.delete_temp_file()
+        ConfigPath.set_output_folder_selected()
 
         # Robust. If the next output folder selected (from a change) is empty,
         # ensure it will select the correct output folder path
@@ -2537,6 +2732,209 @@ class SlicerCARTWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
 
         self.set_ui_enabled_options()
 
+    @enter_function
+    def onImportPredictionsButton(self):
+        """
+        Import a folder of prediction label maps as the v01 segmentations of
+        the cases of the working list (see SlicerCARTLogic.import_predictions)
+        in background; the result is reported by
+        on_import_predictions_done.
+        """
+        if self.outputFolder is None or self.CurrentFolder is None:
+            return
+        if self.import_predictions_runner.is_running():
+            return
+        predictions_folder = qt.QFileDialog.getExistingDirectory(
+            None, "Open the predictions folder", self.DefaultDir,
+            qt.QFileDialog.ShowDirsOnly)
+        if not predictions_folder:
+            return
+
+        self.ui.ImportPredictionsButton.setEnabled(False)
+        self.import_predictions_button_text = (
+            self.ui.ImportPredictionsButton.text)
+        self.import_predictions_runner.start(
+            self.logic.import_predictions_steps(
+                self.CurrentFolder, self.outputFolder, predictions_folder,
+                self.CasesPaths, metadata_store=self.metadata_store),
+            self.on_import_predictions_progress,
+            self.on_import_predictions_done)
+
+    def on_import_predictions_progress(self, done_count, count):
+        """
+        Show the progress of the predictions import on its button. Not
+        decorated with enter_function: called at each step of the import.
+        """
+        self.ui.ImportPredictionsButton.setText(
+            f'Importing predictions ({done_count}/{count})')
+
+    @enter_function
+    def on_import_predictions_done(self, report, error):
+        """
+        Called when the predictions import is finished: update the
+        segmentation statuses of the cases and report the result.
+        :param report: report of SlicerCARTLogic.import_predictions (None
+                       if the import failed).
+        :param error: exception that stopped the import.
+        """
+        self.ui.ImportPredictionsButton.setText(
+            self.import_predictions_button_text)
+        self.ui.ImportPredictionsButton.setEnabled(True)
+        # The predictions imported before an error are kept.
+        self.case_status_index.refresh(self.CasesPaths)
+        self.update_case_list_colors()
+        self.update_current_segmentation_status()
+        if error is not None:
+            Dev.show_message_box(self, str(error), box_title='ATTENTION!')
+            return
+
+        lines = [f'{status}: {count}'
+                 for status, count in report['counts'].items()]
+        lines.append(f"Duration: {report['duration']:.1f} s "
+                     f"({report['throughput']:.0f} cases/hour)")
+        lines += [f'{os.path.basename(path)}: {status} {message}'
+                  for path, status, message in report['issues'][:10]
+                  if status != 'exists']
+        Dev.show_message_box(self, '\n'.join(lines),
+                             box_title='Predictions import')
+
+    @enter_function
+    def onInterRaterAgreementButton(self):
+        """
+        Compare the segmentations of the annotators of all cases of the
+        working list (see SlicerCARTLogic.compute_inter_rater_agreement) in
+        background; the result is reported by on_inter_rater_agreement_done.
+        While it runs, the button stops it. An interrupted report is resumed.
+        """
+        if self.inter_rater_agreement_runner.is_running():
+            self.inter_rater_agreement_runner.cancel()
+            self.ui.InterRaterAgreementButton.setText(
+                self.inter_rater_agreement_button_text)
+            Dev.show_message_box(
+                self, 'Inter-rater agreement stopped. The cases compared '
+                      'so far are kept in the report; the next run resumes '
+                      'it.', box_title='Inter-rater agreement')
+            return
+        if self.outputFolder is None or self.CurrentFolder is None:
+            return
+        label_values = {label['name']: label['value']
+                        for label in self.config_yaml['labels']}
+
+        self.inter_rater_agreement_button_text = (
+            self.ui.InterRaterAgreementButton.text)
+        self.inter_rater_agreement_runner.start(
+            self.logic.compute_inter_rater_agreement_steps(
+                self.CurrentFolder, self.outputFolder, self.CasesPaths,
+                label_values),
+            self.on_inter_rater_agreement_progress,
+            self.on_inter_rater_agreement_done)
+
+    def on_inter_rater_agreement_progress(self, done_count, count):
+        """
+        Show the progress of the inter-rater agreement on its button. Not
+        decorated with enter_function: called at each step of the
+        comparison.
+        """
+        self.ui.InterRaterAgreementButton.setText(
+            f'Stop inter-rater agreement ({done_count}/{count})')
+
+    @enter_function
+    def on_inter_rater_agreement_done(self, report, error):
+        """
+        Called when the inter-rater agreement is finished: report the result.
+        :param report: report of
+                       SlicerCARTLogic.compute_inter_rater_agreement (None if
+                       the comparison failed).
+        :param error: exception that stopped the comparison.
+        """
+        self.ui.InterRaterAgreementButton.setText(
+            self.inter_rater_agreement_button_text)
+        if error is not None:
+            Dev.show_message_box(self, str(error), box_title='ATTENTION!')
+            return
+
+        lines = [f'{status}: {count}'
+                 for status, count in report['counts'].items()]
+        lines.append(f"Duration: {report['duration']:.1f} s")
+        lines.append(f"Report: {report['report_path']}")
+        Dev.show_message_box(self, '\n'.join(lines),
+                             box_title='Inter-rater agreement')
+
+    @enter_function
+    def validate_geometry(self):
+        """
+        Check the geometry of all cases of the working list from the file
+        headers (see GeometryValidator) in background; the cases with issues
+        are reported by on_geometry_validation_done.
+        """
+        self.geometry_validation_runner.cancel()
+        self.geometry_validator = None
+        self.geometry_warned_cases = set()
+        if not ConfigPath.IS_GEOMETRY_VALIDATION_REQUESTED:
+            return
+
+        # The current case is still checked before loading it (see
+        # warn_geometry_issues) while the working list is validated.
+        self.geometry_validator = GeometryValidator(self.outputFolder,
+                                                    self.CurrentFolder)
+        self.geometry_validation_runner.start(
+            self.geometry_validator.validate_steps(self.CasesPaths),
+            self.on_geometry_validation_progress,
+            self.on_geometry_validation_done)
+
+    def on_geometry_validation_progress(self, done_count, count):
+        """
+        Show the progress of the geometry validation in the status bar. Not
+        decorated with enter_function: called at each step of the
+        validation.
+        """
+        slicer.util.showStatusMessage(
+            f'Checking the geometry of the cases ({done_count}/{count})')
+
+    @enter_function
+    def on_geometry_validation_done(self, issues, error):
+        """
+        Report the cases with geometry issues once the working list is
+        validated.
+        :param issues: result of GeometryValidator.validate (None if the
+                       validation failed).
+        :param error: exception that stopped the validation.
+        """
+        slicer.util.showStatusMessage('')
+        if error is not None:
+            print(f'Geometry validation failed: {error}')
+            return
+        if not issues:
+            return
+
+        report_path = self.geometry_validator.write_report()
+        lines = [f'{case}: {"; ".join(case_issues)}'
+                 for case, case_issues in list(issues.items())[:10]]
+        if len(issues) > 10:
+            lines.append('...')
+        message = (f'Geometry issues found for {len(issues)} cases (see '
+                   f'{report_path}):\n\n' + '\n'.join(lines))
+        Dev.show_message_box(self, message, box_title='ATTENTION!')
+
+    @enter_function
+    def warn_geometry_issues(self):
+        """
+        Warn the user, once per case, about the geometry issues of the
+        current case before loading it.
+        """
+        if (self.geometry_validator is None
+                or self.currentCase in self.geometry_warned_cases):
+            return
+        issues = self.geometry_validator.validate_case(self.currentCasePath)
+        if not issues:
+            return
+        self.geometry_warned_cases.add(self.currentCase)
+        message = (f'Geometry issues of {self.currentCase}:\n\n'
+                   + '\n'.join(issues)
+                   + '\n\nSegmentations may not be aligned with the '
+                     'volume.')
+        Dev.show_message_box(self, message, box_title='ATTENTION!')
+
     @enter_function
     def manage_workflow_and_classification(self):
         """
@@ -2573,93 +2971,48 @@ class SlicerCARTWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
 
             self.ui.SaveSegmentationButton.setEnabled(True)
             self.ui.SaveClassificationButton.setEnabled(True)
+            self.ui.ImportPredictionsButton.setEnabled(
+                not self.import_predictions_runner.is_running())
+            self.ui.InterRaterAgreementButton.setEnabled(True)
 
             if self.CurrentFolder is not None:
                 self.updateCurrentOutputPathAndCurrentVolumeFilename()
 
-                # self.update_case_list_colors()
+                self.update_case_list_colors()
 
                 self.ui.SlicerDirectoryListView.setCurrentItem(
                     self.ui.SlicerDirectoryListView.item(
                         self.currentCase_index))
                 self.update_current_segmentation_status()
-
-                self.predictions_paths = sorted(glob(
-                    os.path.join(self.outputFolder,
-                                 f'{ConfigPath.INPUT_FILE_EXTENSION}')))
         else:
             Debug.print(self, 'No output folder selected.')
 
-    ### N.B. MB: All calling of the function belows have been disabled because
-    # if there is a large UI case list (ex 1000 cases), the module becomes very
-    # slow since it looks for the whole list each time. Function kept here to
-    # addrees in the future in a more effective way of update UI case list
-    # color.
     @enter_function
     def update_case_list_colors(self):
         """
-        Update_case_list_colors.
-        
-        Args:.
+        Update the colors of the UI case list from the case status index
+        (not done / done by another annotator / done by this annotator).
+        Only the items whose status changed are painted again.
         """
-        if self.outputFolder is None or self.CurrentFolder is None:
+        if (not ConfigPath.IS_CASE_LIST_COLORS_REQUESTED
+                or self.outputFolder is None or self.CurrentFolder is None
+                or self.case_status_index is None):
             return
 
-        self.ui.SlicerDirectoryListView.clear()
-        for case in self.Cases:
-            case_id = case.split('.')[0]
-            item = qt.QListWidgetItem(case_id)
-            segmentation_information_path = (f'{self.currentOutputPath}{os.sep}'
-                                             f'{case_id}'
-                                             f'_SegmentationInformation.csv')
-            segmentation_information_df = None
-            if os.path.exists(segmentation_information_path):
-                segmentation_information_df = pd.read_csv(
-                    segmentation_information_path)
-                currentCaseSegmentationStatus = self.get_segmentation_status(
-                    case, segmentation_information_df)
-                if currentCaseSegmentationStatus == 0:
-                    item.setForeground(qt.QColor(self.foreground))
-                elif currentCaseSegmentationStatus == 1:
-                    item.setForeground(qt.QColor('orange'))
-                elif currentCaseSegmentationStatus == 2:
-                    item.setForeground(qt.QColor('green'))
-
-            self.ui.SlicerDirectoryListView.addItem(item)
-        else:
-            return
-
-    @enter_function
-    def get_segmentation_status(self, case, segmentation_information_df):
-        """
-        Get_segmentation_status.
-        
-        Args:
-        case: Description of case.
-        segmentation_information_df: Description of segmentation_information_df.
-        """
-        self.annotator_name = self.ui.Annotator_name.text
-
-        found_case = 0
-        if self.annotator_name is None:
-            msg = qt.QMessageBox()
-            msg.setIcon(qt.QMessageBox.Warning)
-            msg.setText("No annotator name defined")
-            msg.setInformativeText(
-                'The annotator name is empty, therefore, the case list colors '
-                'are not updated. ')
-            msg.setWindowTitle("No annotator name defined")
-            msg.exec()
+        colors = {STATUS_NOT_DONE: qt.QColor(self.foreground),
+                  STATUS_DONE_BY_ANOTHER_ANNOTATOR: qt.QColor('orange'),
+                  STATUS_DONE_BY_THIS_ANNOTATOR: qt.QColor('green')}
 
-        else:
-            for _, row in segmentation_information_df.iterrows():
-                if row['Volume filename'] == case and row[
-                    'Annotator Name'] == self.annotator_name:
-                    return 2
-                elif row['Volume filename'] == case:
-                    found_case = 1
-
-        return found_case
+        annotator_name = self.ui.Annotator_name.text
+        for index, case in enumerate(self.Cases):
+            status = self.case_status_index.get_status(case, annotator_name)
+            if self.case_list_status.get(index) == status:
+                continue
+            item = self.ui.SlicerDirectoryListView.item(index)
+            if item is None:
+                continue
+            item.setForeground(colors[status])
+            self.case_list_status[index] = status
 
     @enter_function
     def msg_warnig_delete_segm_node_clicked(self,
@@ -2684,14 +3037,14 @@ class SlicerCARTWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
         
         Args:.
         """
-        classificationInformationPath = (f'{self.currentOutputPath}{os.sep}'
-                                         f'{self.currentVolumeFilename}'
-                                         f'_ClassificationInformation.csv')
+        store = self.get_classification_store()
 
         classificationInformation_df = None
-        if os.path.exists(classificationInformationPath):
+        if store.get_file_state() is not None:
+            # Default missing values handling (LoadClassificationWindow
+            # expects NaN for empty values).
             classificationInformation_df = (
-                pd.read_csv(classificationInformationPath))
+                pd.read_csv(store.information_path))
         else:
             msg = qt.QMessageBox()
             msg.setIcon(qt.QMessageBox.Information)
@@ -2719,13 +3072,13 @@ class SlicerCARTWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
         self.annotator_degree = self.ui.AnnotatorDegree.currentText
 
         self.combobox_version = ConfigPath.get_combobox_version()
-        classification_df = self.getClassificationInformation()
+        classification_record = self.getClassificationInformation()
 
         # Create folders if don't exist
         self.createFolders()
 
         if self.annotator_name is not None:
-            self.saveClassificationInformation(classification_df)
+            self.saveClassificationInformation(classification_record)
             # Those lines can be re-activated if wanted to display a success
             # message when saved.
             # msg_box = qt.QMessageBox()
@@ -2875,17 +3228,9 @@ class SlicerCARTWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
         """
         Get the latest path of most recent segmentation version if available.
         """
-        latest_version = self.get_latest_existing_version()
-
-        file_extension = ConfigPath.INPUT_FILE_EXTENSION[1:]
-
-        if file_extension == ".nrrd":
-            file_extension = ".seg.nrrd"
-
-        latest_path = os.path.join(
-            self.currentOutputPath,
-            "{}_{}"f"{file_extension}".format(
-                self.currentVolumeFilename, latest_version))
+        counter = self.get_segmentation_version_counter()
+        latest_path = counter.get_segmentation_path(
+            max(counter.get_latest_version_number(), 1))
 
         Debug.print(self, f'latest_path: {latest_path}')
 
@@ -2898,13 +3243,9 @@ class SlicerCARTWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
         """
         Get the latest version available as a string.
         """
-        version = self.getCurrentSegmentationVersion()
-        version_int = self.parse_version_to_int(version)
-        version_int -= 1
-        if version_int == 0:
-            version = version
-        else:
-            version = self.parse_version_int_to_str(version_int)
+        version_int = (
+            self.get_segmentation_version_counter().get_latest_version_number())
+        version = self.parse_version_int_to_str(max(version_int, 1))
         Debug.print(self, f'version: {version}')
         return version
 
@@ -2927,6 +3268,78 @@ class SlicerCARTWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
         return f"v{version_int:02d}"
 
 
+    @enter_function
+    def get_segmentation_information_df(self):
+        """
+        Get the segmentation information of the current case (layout of the
+        former SegmentationInformation.csv). Read from the ledger, which
+        also has the saves not recorded in the metadata store.
+        :return: dataframe or None if no segmentation was saved.
+        """
+        ledger = SegmentationLedger(os.path.join(
+            self.currentOutputPath,
+            f'{self.currentVolumeFilename}{SEGMENTATION_LEDGER_SUFFIX}'))
+        return ledger.read_dataframe()
+
+    @enter_function
+    def get_project_statistics_df(self):
+        """
+        Get the number of cases segmented and classified by each annotator
+        of the project and their average segmentation duration of each
+        label, from the metadata store.
+        :return: dataframe (one row per annotator) or None if the metadata
+        store is disabled.
+        """
+        if self.metadata_store is None:
+            return None
+
+        statistics_df = self.metadata_store.get_annotator_case_counts()
+        statistics_df.columns = ['Annotator', 'Segmented cases',
+                                 'Classified cases']
+        for index, annotator in statistics_df['Annotator'].items():
+            if annotator is None:
+                continue
+            durations_df = self.metadata_store.get_average_label_durations(
+                annotator)
+            for _, row in durations_df.iterrows():
+                statistics_df.loc[index, f'{row["label"]} mean (s)'] = (
+                    round(row['average_duration'], 1))
+        return statistics_df
+
+    @enter_function
+    def add_project_statistics_table(self, layout):
+        """
+        Add the project statistics (see get_project_statistics_df) to the
+        layout of the load or compare segmentation windows (nothing is added
+        if the metadata store is disabled or empty).
+        """
+        statistics_df = self.get_project_statistics_df()
+        if statistics_df is None or statistics_df.shape[0] == 0:
+            return
+
+        statisticsLabel = qt.QLabel()
+        statisticsLabel.setText('Project statistics (all cases)')
+        statisticsLabel.setStyleSheet("font-weight: bold")
+        layout.addWidget(statisticsLabel)
+
+        statisticsTableView = qt.QTableWidget()
+        statisticsTableView.setRowCount(statistics_df.shape[0])
+        statisticsTableView.setColumnCount(statistics_df.shape[1])
+        statisticsTableView.setHorizontalHeaderLabels(
+            list(statistics_df.columns))
+        statisticsTableView.horizontalHeader(
+
+        ).setSectionResizeMode(qt.QHeaderView.Stretch)
+        for row_index, row in enumerate(
+                statistics_df.itertuples(index=False)):
+            for column_index, value in enumerate(row):
+                cell = qt.QTableWidgetItem(
+                    '' if pd.isna(value) else str(value))
+                cell.setFlags(qt.Qt.NoItemFlags)
+                cell.setForeground(qt.QBrush(qt.QColor(self.foreground)))
+                statisticsTableView.setItem(row_index, column_index, cell)
+        layout.addWidget(statisticsTableView)
+
     @enter_function
     def openLoadSegmentationWindow(self):
         """
@@ -2934,21 +3347,15 @@ class SlicerCARTWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
         
         Args:.
         """
-        segmentationInformationPath = (f'{self.currentOutputPath}{os.sep}'
-                                       f'{self.currentVolumeFilename}'
-                                       f'_SegmentationInformation.csv')
-
-        segmentationInformation_df = None
-        if os.path.exists(segmentationInformationPath):
-            segmentationInformation_df = pd.read_csv(
-                segmentationInformationPath)
-        else:
+        segmentationInformation_df = (
+            self.get_segmentation_information_df())
+        if segmentationInformation_df is None:
             msg = qt.QMessageBox()
             msg.setIcon(qt.QMessageBox.Information)
             msg.setText("No saved segmentations")
             msg.setInformativeText(
                 'There are no segmentations saved in '
-                'the SegmentationInformation.csv.')
+                'the segmentation information of this case.')
             msg.setWindowTitle("No saved segmentations")
             msg.exec()
             return
@@ -2965,21 +3372,15 @@ class SlicerCARTWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
         
         Args:.
         """
-        segmentationInformationPath = (f'{self.currentOutputPath}{os.sep}'
-                                       f'{self.currentVolumeFilename}'
-                                       f'_SegmentationInformation.csv')
-
-        segmentationInformation_df = None
-        if os.path.exists(segmentationInformationPath):
-            segmentationInformation_df = pd.read_csv(
-                segmentationInformationPath)
-        else:
+        segmentationInformation_df = (
+            self.get_segmentation_information_df())
+        if segmentationInformation_df is None:
             msg = qt.QMessageBox()
             msg.setIcon(qt.QMessageBox.Information)
             msg.setText("No saved segmentations")
             msg.setInformativeText(
                 'There are no segmentations saved in '
-                'the SegmentationInformation.csv.')
+                'the segmentation information of this case.')
             msg.setWindowTitle("No saved segmentations")
             msg.exec()
             return
@@ -3008,10 +3409,18 @@ class SlicerCARTWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
             if selected_label == label['name']:
                 selected_label_value = label['value']
 
-        slicer.mrmlScene.Clear()
-        slicer.util.loadVolume(self.currentCasePath)
-        self.VolumeNode = \
-            slicer.util.getNodesByClass('vtkMRMLScalarVolumeNode')[0]
+        # Keep the volume of the case: only the segmentation, labelmap and
+        # markups nodes of the loaded case are removed.
+        if (getattr(self, 'VolumeNode', None) is None
+                or not slicer.mrmlScene.IsNodePresent(self.VolumeNode)):
+            slicer.mrmlScene.Clear()
+            self.VolumeNode = self.load_volume_node(self.currentCasePath)
+        else:
+            for class_name in ['vtkMRMLSegmentationNode',
+                               'vtkMRMLLabelMapVolumeNode',
+                               'vtkMRMLMarkupsNode']:
+                for node in slicer.util.getNodesByClass(class_name):
+                    slicer.mrmlScene.RemoveNode(node)
 
         Vol_displayNode = self.VolumeNode.GetDisplayNode()
         Vol_displayNode.AutoWindowLevelOff()
@@ -3027,14 +3436,44 @@ class SlicerCARTWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
 
         self.resetTimer()
 
-        for (
-                segment_name,
-                version_file_path) in selected_version_file_paths.items():
-            if 'nrrd' in ConfigPath.INPUT_FILE_EXTENSION:
-                slicer.util.loadSegmentation(version_file_path)
-                currentSegmentationNode = \
-                    slicer.util.getNodesByClass('vtkMRMLSegmentationNode')[0]
-            elif 'nii' in ConfigPath.INPUT_FILE_EXTENSION:
+        # Read the voxels of the selected label of all versions in parallel.
+        version_file_paths = list(selected_version_file_paths.values())
+        with ThreadPoolExecutor(
+                max_workers=min(8, max(1, len(version_file_paths)))
+        ) as executor:
+            masks = list(executor.map(
+                partial(self.read_compared_version, selected_label_value,
+                        selected_label),
+                version_file_paths))
+
+        ijk_to_ras = vtk.vtkMatrix4x4()
+        self.VolumeNode.GetIJKToRASMatrix(ijk_to_ras)
+        volume_geometry = (
+            slicer.util.arrayFromVolume(self.VolumeNode).shape[::-1],
+            slicer.util.arrayFromVTKMatrix(ijk_to_ras))
+
+        for (segment_name, version_file_path), mask in zip(
+                selected_version_file_paths.items(), masks):
+            if mask is not None and batch_workers.is_same_geometry(
+                    (mask[0].shape[::-1], mask[1]), volume_geometry):
+                # Segment built from the voxels read, in the volume geometry.
+                currentSegmentationNode = slicer.mrmlScene.AddNewNodeByClass(
+                    "vtkMRMLSegmentationNode")
+                segment_id = currentSegmentationNode.GetSegmentation(
+                ).AddEmptySegment(str(selected_label_value))
+                if mask[0].any():
+                    slicer.util.updateSegmentBinaryLabelmapFromArray(
+                        mask[0], currentSegmentationNode, segment_id,
+                        self.VolumeNode)
+                else:
+                    # The label is not segmented in this version.
+                    currentSegmentationNode.GetSegmentation().RemoveSegment(
+                        segment_id)
+            elif 'nrrd' in ConfigPath.INPUT_FILE_EXTENSION:
+                # Read by Slicer (e.g. geometry resampled to the volume).
+                currentSegmentationNode = slicer.util.loadSegmentation(
+                    version_file_path)
+            else:
                 labelmapVolumeNode = slicer.util.loadLabelVolume(
                     version_file_path)
                 currentSegmentationNode = slicer.mrmlScene.AddNewNodeByClass(
@@ -3093,6 +3532,20 @@ class SlicerCARTWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
 
         self.ui.ShowSegmentVersionLegendButton.setVisible(True)
 
+    def read_compared_version(self, label_value, label_name, path):
+        """
+        Read the voxels of the compared label of a segmentation version. Not
+        decorated with enter_function: called from the threads reading the
+        versions compared.
+        :return: see VolumeIO.read_label_mask (None if the file must be read
+        by Slicer).
+        """
+        try:
+            return VolumeIO.read_label_mask(self, path, label_value,
+                                            label_name)
+        except Exception as e:
+            print(f'Segmentation version read by Slicer ({path}): {e}')
+            return None
 
     @enter_function
     def onClearCompareSegmentVersions(self):
@@ -3356,21 +3809,15 @@ class SlicerCARTWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
         
         Args:.
         """
-        segmentationInformationPath = (f'{self.currentOutputPath}{os.sep}'
-                                       f'{self.currentVolumeFilename}'
-                                       f'_SegmentationInformation.csv')
-
-        segmentationInformation_df = None
-        if os.path.exists(segmentationInformationPath):
-            segmentationInformation_df = pd.read_csv(
-                segmentationInformationPath)
-        else:
+        segmentationInformation_df = (
+            self.get_segmentation_information_df())
+        if segmentationInformation_df is None:
             msg = qt.QMessageBox()
             msg.setIcon(qt.QMessageBox.Information)
             msg.setText("No saved segmentations")
             msg.setInformativeText(
-                'There are no segmentations saved in the '
-                'SegmentationInformation.csv.')
+                'There are no segmentations saved in '
+                'the segmentation information of this case.')
             msg.setWindowTitle("No saved segmentations")
             msg.exec()
             return
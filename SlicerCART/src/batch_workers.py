@@ -0,0 +1,529 @@
+"""
+This file contains the functions run in worker processes by the batch
+operations of SlicerCARTLogic (e.g. import_predictions). Worker processes
+run the python interpreter of Slicer without the application: this file
+must only import python packages (not slicer, qt nor the utils package of
+SlicerCART), and its functions must be defined at module level so that they
+can be sent to the processes.
+"""
+import os
+import shutil
+import uuid
+
+import numpy as np
+import nibabel as nib
+import nrrd
+
+# NRRD spaces that can be converted to Slicer RAS coordinates.
+NRRD_LPS_SPACES = ['left-posterior-superior', 'LPS']
+NRRD_RAS_SPACES = ['right-anterior-superior', 'RAS']
+
+# Tolerance of the comparison of the affines of a volume and of its
+# segmentations (in mm).
+GEOMETRY_TOLERANCE = 1e-3
+# Tolerance on the cosine of the angle between two voxel axes.
+ORTHOGONALITY_TOLERANCE = 1e-3
+# Range of plausible voxel spacings (in mm).
+MIN_SPACING = 0.01
+MAX_SPACING = 50.0
+
+# Columns of the inter-rater agreement report (see compare_case_annotators).
+AGREEMENT_REPORT_COLUMNS = ['Volume filename', 'Label', 'Annotator',
+                            'Version', 'Other annotator', 'Other version',
+                            'dice', 'jaccard', 'volume_ml',
+                            'other_volume_ml', 'volume_difference_ml',
+                            'hd95_mm', 'Error']
+
+
+def get_nrrd_affine(header):
+    """
+    Build the IJK to RAS affine from a NRRD header.
+    :param header: NRRD header as returned by pynrrd.
+    :return: 4x4 affine or None if the space is not supported.
+    """
+    space = header.get('space')
+    if space not in NRRD_LPS_SPACES + NRRD_RAS_SPACES:
+        return None
+
+    directions = np.asarray(header['space directions'], dtype=float)
+    origin = np.asarray(header.get('space origin', [0, 0, 0]),
+                        dtype=float)
+
+    affine = np.eye(4)
+    affine[:3, :3] = directions.T
+    affine[:3, 3] = origin
+
+    if space in NRRD_LPS_SPACES:
+        affine[:2, :] *= -1
+
+    return affine
+
+
+def read_header_geometry(path):
+    """
+    Read the geometry of a volume or segmentation file from its header only
+    (the voxels are not read).
+    :param path: path of a .nii, .nii.gz or .nrrd (including .seg.nrrd)
+                 file.
+    :return: tuple (shape, IJK to RAS affine) or None if the file is not
+    supported.
+    """
+    if path.endswith('.nii') or path.endswith('.nii.gz'):
+        image = nib.load(path)
+        return tuple(image.shape), np.array(image.affine, dtype=float)
+
+    if path.endswith('.nrrd'):
+        header = dict(nrrd.read_header(path))
+        # Segmentations with several layers have a first non-spatial axis
+        # (NaN row of the space directions).
+        header['space directions'] = header['space directions'][-3:]
+        affine = get_nrrd_affine(header)
+        if affine is None:
+            return None
+        shape = tuple(int(size) for size in header['sizes'])[-3:]
+        return shape, affine
+
+    return None
+
+
+def is_same_geometry(geometry, other_geometry):
+    """
+    Check that two geometries (see read_header_geometry) have the same
+    spatial shape and affine.
+    """
+    shape, affine = geometry
+    other_shape, other_affine = other_geometry
+    return (shape[:3] == other_shape[:3]
+            and np.allclose(affine, other_affine, atol=GEOMETRY_TOLERANCE))
+
+
+def get_geometry_issues(geometry):
+    """
+    Check that a geometry (see read_header_geometry) is usable: 3D, with
+    orthogonal voxel axes and plausible spacings.
+    :return: list of issue descriptions (empty if none).
+    """
+    shape, affine = geometry
+    issues = []
+    if len(shape) != 3:
+        issues.append(f'not a 3D volume (shape {shape})')
+
+    axes = affine[:3, :3]
+    spacings = np.linalg.norm(axes, axis=0)
+    if np.any(spacings < MIN_SPACING) or np.any(spacings > MAX_SPACING):
+        issues.append(
+            f'implausible spacing {np.round(spacings, 4).tolist()} mm')
+    elif np.any(np.abs(np.triu(
+            (axes / spacings).T @ (axes / spacings), 1))
+            > ORTHOGONALITY_TOLERANCE):
+        issues.append('non-orthogonal directions')
+    return issues
+
+
+def validate_case_geometry(volume_path, segmentation_paths):
+    """
+    Check the geometry of a volume and of its segmentations from their
+    headers only.
+    :param volume_path: path of the volume.
+    :param segmentation_paths: paths of the segmentation files of the case.
+    :return: list of issue descriptions (empty if none).
+    """
+    try:
+        volume_geometry = read_header_geometry(volume_path)
+    except Exception as e:
+        return [f'volume header unreadable: {e}']
+    if volume_geometry is None:
+        return ['volume geometry not supported']
+    issues = get_geometry_issues(volume_geometry)
+
+    for path in segmentation_paths:
+        filename = os.path.basename(path)
+        try:
+            geometry = read_header_geometry(path)
+        except Exception as e:
+            issues.append(f'{filename}: header unreadable: {e}')
+            continue
+        if geometry is None:
+            issues.append(f'{filename}: geometry not supported')
+        elif not is_same_geometry(geometry, volume_geometry):
+            issues.append(f'{filename}: geometry differs from the volume '
+                          f'(shape {geometry[0]} for {volume_geometry[0]})')
+    return issues
+
+
+def read_labelmap(path, label_values):
+    """
+    Read a segmentation file as a labelmap holding the label values of the
+    configuration.
+    :param path: path of a .nii.gz labelmap or of a .seg.nrrd file.
+    :param label_values: dictionary label name -> label value of the
+                         configuration (the segments of .seg.nrrd files are
+                         named after the labels).
+    :return: tuple (IJK indexed labelmap, 4x4 IJK to RAS affine).
+    """
+    if path.endswith('.nii') or path.endswith('.nii.gz'):
+        image = nib.load(path)
+        data = np.asanyarray(image.dataobj)
+        if not np.issubdtype(data.dtype, np.integer):
+            data = np.rint(data).astype(np.int32)
+        return data, np.array(image.affine, dtype=float)
+
+    if path.endswith('.seg.nrrd'):
+        data, header = nrrd.read(path)
+        header = dict(header)
+        if data.ndim == 3:
+            data = data[np.newaxis]
+        # First axis: layers of overlapping segments.
+        header['space directions'] = header['space directions'][-3:]
+        affine = get_nrrd_affine(header)
+        if affine is None:
+            raise ValueError('unsupported NRRD space')
+
+        labelmap = np.zeros(
+            data.shape[1:],
+            dtype=np.min_scalar_type(max(label_values.values(), default=0)))
+        index = 0
+        while f'Segment{index}_ID' in header:
+            segment_id = header[f'Segment{index}_ID']
+            value = label_values.get(header.get(f'Segment{index}_Name'))
+            if value is None and segment_id.isdigit():
+                value = int(segment_id)
+            if value is not None:
+                # Overlapping segments: the last one is kept.
+                layer = data[int(header.get(f'Segment{index}_Layer', 0))]
+                labelmap[layer == int(
+                    header.get(f'Segment{index}_LabelValue', 1))] = value
+            index += 1
+        return labelmap, affine
+
+    raise ValueError(f'unsupported segmentation file: {path}')
+
+
+def get_bounding_box(mask):
+    """
+    Get the smallest box containing the True voxels of a mask.
+    :return: tuple of slices or None if the mask is empty.
+    """
+    box = []
+    for axis in range(mask.ndim):
+        other_axes = tuple(index for index in range(mask.ndim)
+                           if index != axis)
+        indices = np.flatnonzero(np.any(mask, axis=other_axes))
+        if indices.size == 0:
+            return None
+        box.append(slice(indices[0], indices[-1] + 1))
+    return tuple(box)
+
+
+def get_surface(mask):
+    """
+    Get the voxels of a 3D mask having a 6-connected neighbor outside of the
+    mask.
+    """
+    padded = np.pad(mask, 1)
+    interior = mask.copy()
+    for axis in range(3):
+        for start in (0, 2):
+            index = [slice(1, -1)] * 3
+            index[axis] = slice(start, start + mask.shape[axis])
+            interior &= padded[tuple(index)]
+    return mask & ~interior
+
+
+def get_squared_distance_map(mask, spacing):
+    """
+    Get the exact squared distance (in mm²) of each voxel to the closest
+    True voxel of a mask, computed axis by axis.
+    :param mask: 3D mask.
+    :param spacing: voxel spacing along each axis (in mm).
+    """
+    distances = np.where(mask, 0.0, np.inf)
+    for axis in range(mask.ndim):
+        distances = np.moveaxis(distances, axis, 0)
+        # Lines without any finite distance are left infinite.
+        lines = np.isfinite(distances).any(axis=0)
+        line_distances = distances[:, lines]
+        result = line_distances.copy()
+        for offset in range(1, distances.shape[0]):
+            cost = (spacing[axis] * offset) ** 2
+            if cost >= result.max():
+                # No distance can decrease anymore.
+                break
+            np.minimum(result[offset:], line_distances[:-offset] + cost,
+                       out=result[offset:])
+            np.minimum(result[:-offset], line_distances[offset:] + cost,
+                       out=result[:-offset])
+        distances[:, lines] = result
+        distances = np.moveaxis(distances, 0, axis)
+    return distances
+
+
+def get_hausdorff_95(mask, other_mask, spacing):
+    """
+    Get the 95th percentile Hausdorff distance between two non-empty masks
+    (maximum of the 95th percentiles of the two directed surface distances).
+    :return: distance in mm.
+    """
+    surface = get_surface(mask)
+    other_surface = get_surface(other_mask)
+    distances = np.sqrt(
+        get_squared_distance_map(other_surface, spacing)[surface])
+    other_distances = np.sqrt(
+        get_squared_distance_map(surface, spacing)[other_surface])
+    return float(max(np.percentile(distances, 95),
+                     np.percentile(other_distances, 95)))
+
+
+def get_overlap_metrics(labelmap, other_labelmap, affine, label_values):
+    """
+    Compare the labels of two labelmaps of the same geometry. The labelmaps
+    are cropped to the bounding box of their labelled voxels first.
+    :param labelmap: IJK indexed labelmap.
+    :param other_labelmap: IJK indexed labelmap compared to labelmap.
+    :param affine: 4x4 IJK to RAS affine of the labelmaps.
+    :param label_values: label values to compare.
+    :return: dictionary label value -> dictionary with the dice, jaccard,
+    volume_ml, other_volume_ml, volume_difference_ml (other minus first)
+    and hd95_mm metrics (NaN when undefined, e.g. Dice of two empty
+    labels).
+    """
+    if labelmap.shape != other_labelmap.shape:
+        raise ValueError(f'labelmap shapes differ ({labelmap.shape} and '
+                         f'{other_labelmap.shape})')
+    spacing = np.linalg.norm(np.asarray(affine)[:3, :3], axis=0)
+    voxel_ml = float(np.prod(spacing)) / 1000
+
+    box = get_bounding_box((labelmap != 0) | (other_labelmap != 0))
+    if box is not None:
+        labelmap = labelmap[box]
+        other_labelmap = other_labelmap[box]
+
+    metrics = {}
+    for label_value in label_values:
+        mask = labelmap == label_value
+        other_mask = other_labelmap == label_value
+        count = int(np.count_nonzero(mask))
+        other_count = int(np.count_nonzero(other_mask))
+        intersection = int(np.count_nonzero(mask & other_mask))
+        union = count + other_count - intersection
+
+        hd95 = np.nan
+        if count > 0 and other_count > 0:
+            label_box = get_bounding_box(mask | other_mask)
+            hd95 = get_hausdorff_95(mask[label_box], other_mask[label_box],
+                                    spacing)
+
+        metrics[label_value] = {
+            'dice': 2 * intersection / (count + other_count) if union
+            else np.nan,
+            'jaccard': intersection / union if union else np.nan,
+            'volume_ml': count * voxel_ml,
+            'other_volume_ml': other_count * voxel_ml,
+            'volume_difference_ml': (other_count - count) * voxel_ml,
+            'hd95_mm': hd95}
+    return metrics
+
+
+def compare_case_annotators(case, segmentations, label_values):
+    """
+    Compare the segmentations of a case by different annotators: overlap
+    metrics of each pair of annotators for each label (see
+    get_overlap_metrics). Labelmaps are reduced to the smallest data type
+    holding the label values.
+    :param case: volume filename of the case.
+    :param segmentations: list of tuples (annotator, version, path of the
+                          segmentation file), one by annotator.
+    :param label_values: dictionary label name -> label value of the
+                         configuration.
+    :return: list of rows of the agreement report (a single row with the
+    error if the case cannot be compared).
+    """
+    try:
+        values = sorted(set(label_values.values()))
+        names = {value: name for name, value in label_values.items()}
+        dtype = np.min_scalar_type(max(values, default=0))
+        labelmaps = []
+        for _, _, path in segmentations:
+            labelmap, affine = read_labelmap(path, label_values)
+            # Values that are not labels of the configuration are ignored.
+            labelmap = np.where(np.isin(labelmap, values), labelmap,
+                                0).astype(dtype)
+            labelmaps.append((labelmap, affine))
+
+        rows = []
+        for index, (annotator, version, _) in enumerate(segmentations):
+            for other_index in range(index + 1, len(segmentations)):
+                other_annotator, other_version, _ = segmentations[other_index]
+                pair = {'Volume filename': case, 'Annotator': annotator,
+                        'Version': version,
+                        'Other annotator': other_annotator,
+                        'Other version': other_version, 'Error': ''}
+                labelmap, affine = labelmaps[index]
+                other_labelmap, other_affine = labelmaps[other_index]
+                if not is_same_geometry((labelmap.shape, affine),
+                                        (other_labelmap.shape, other_affine)):
+                    rows.append({**pair, 'Error': 'geometries differ'})
+                    continue
+                metrics = get_overlap_metrics(labelmap, other_labelmap,
+                                              affine, values)
+                for value, label_metrics in metrics.items():
+                    rows.append({**pair, 'Label': names[value],
+                                 **label_metrics})
+        return rows
+    except Exception as e:
+        return [{'Volume filename': case, 'Error': str(e) or repr(e)}]
+
+
+def write_labelmap_nifti(data, affine, path):
+    """
+    Write labelmap voxels to a NIfTI file. The header matches the one
+    written by Slicer: qform and sform codes set to scanner, spatial unit in
+    mm.
+    :param data: IJK indexed array of voxels.
+    :param affine: 4x4 IJK to RAS affine.
+    :param path: path of the .nii or .nii.gz file to write.
+    """
+    image = nib.Nifti1Image(data, affine)
+    image.set_qform(affine, code=1)
+    image.set_sform(affine, code=1)
+    image.header.set_xyzt_units('mm', 'sec')
+    image.set_data_dtype(data.dtype)
+    nib.save(image, path)
+
+
+def write_segmentation_nrrd(layers, affine, segments, fields, path):
+    """
+    Write segments to a .seg.nrrd file in the layout written by Slicer (and
+    read by read_labelmap): one layer per group of segments that do not
+    overlap, segment properties in Segment<index>_<property> fields. Does
+    not use the Slicer API (can be called from worker threads).
+    :param layers: array (layer, I, J, K) of the label values of the
+                   segments.
+    :param affine: 4x4 IJK to RAS affine.
+    :param segments: list of dictionaries of the properties of the segments
+                     (ID, Name, Color, Layer, LabelValue, ...), in order.
+    :param fields: other fields of the header (Segmentation_<property>).
+    :param path: path of the .seg.nrrd file to write.
+    """
+    lps_affine = np.array(affine, dtype=float)
+    lps_affine[:2, :] *= -1
+    directions = lps_affine[:3, :3].T
+
+    header = {'type': 'unsigned char',
+              'space': 'left-posterior-superior',
+              'space origin': lps_affine[:3, 3],
+              'encoding': 'gzip'}
+    if layers.shape[0] == 1:
+        data = layers[0]
+        header['kinds'] = ['domain'] * 3
+        header['space directions'] = directions
+    else:
+        # First axis: layers of overlapping segments.
+        data = layers
+        header['kinds'] = ['list'] + ['domain'] * 3
+        header['space directions'] = np.vstack([np.full(3, np.nan),
+                                                directions])
+
+    for index, segment in enumerate(segments):
+        # IJK bounding box of the segment ('0 -1 0 -1 0 -1' if empty).
+        mask = layers[segment['Layer']] == segment['LabelValue']
+        extent = []
+        for axis in range(3):
+            projection = np.nonzero(np.any(
+                mask, axis=tuple(other for other in range(3)
+                                 if other != axis)))[0]
+            extent += ([int(projection[0]), int(projection[-1])]
+                       if projection.size else [0, -1])
+        segment = dict(segment, Extent=' '.join(map(str, extent)))
+        for name, value in segment.items():
+            header[f'Segment{index}_{name}'] = str(value)
+    for name, value in fields.items():
+        header[f'Segmentation_{name}'] = str(value)
+
+    nrrd.write(path, data.astype(np.uint8, copy=False), header)
+
+
+def move_file_exclusively(temp_path, path):
+    """
+    Move a fully written file to its final path without replacing an
+    existing file. A hard link is created when the file system supports
+    it; otherwise the final path is reserved with an exclusive creation
+    before the file is moved over it (the reserved path is empty for a
+    short time).
+    :param temp_path: path of the written file (removed by the caller if
+                      the move fails).
+    :param path: final path of the file.
+    :raise FileExistsError: if a file already exists at path.
+    """
+    try:
+        os.link(temp_path, path)
+        return
+    except FileExistsError:
+        raise
+    except OSError:
+        # Hard links are not supported (e.g. FAT or some network drives).
+        pass
+    os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+    try:
+        os.replace(temp_path, path)
+    except OSError:
+        # Release the reserved path, so that the move can be retried.
+        os.remove(path)
+        raise
+
+
+def import_prediction(prediction_path, volume_path, segmentation_path,
+                      dtype_name):
+    """
+    Write a prediction label map as a segmentation file of a case, after
+    checking its geometry against the header of the volume. The prediction
+    file is copied as is when it already has the extension and data type of
+    the segmentation files; otherwise its voxels are rounded and converted.
+    The segmentation file is never overwritten.
+    :param prediction_path: path of the prediction (.nii or .nii.gz).
+    :param volume_path: path of the volume of the case.
+    :param segmentation_path: path of the segmentation file to write.
+    :param dtype_name: data type of the segmentation files (e.g. 'uint8').
+    :return: tuple (status, message) where status is 'imported', 'exists',
+    'geometry mismatch' or 'error'.
+    """
+    try:
+        prediction_geometry = read_header_geometry(prediction_path)
+        volume_geometry = read_header_geometry(volume_path)
+        if prediction_geometry is None or volume_geometry is None:
+            return 'error', 'unsupported file format'
+        if not is_same_geometry(prediction_geometry, volume_geometry):
+            return ('geometry mismatch',
+                    f'prediction {prediction_geometry[0]} does not match '
+                    f'volume {volume_geometry[0]}')
+
+        folder, filename = os.path.split(segmentation_path)
+        os.makedirs(folder, exist_ok=True)
+        temp_path = os.path.join(folder,
+                                 f'.partial_{uuid.uuid4().hex}_{filename}')
+        try:
+            image = nib.load(prediction_path)
+            is_same_extension = (
+                prediction_path.endswith('.nii.gz')
+                == segmentation_path.endswith('.nii.gz'))
+            if (is_same_extension
+                    and image.get_data_dtype() == np.dtype(dtype_name)
+                    and image.header.get_slope_inter() in ((None, None),
+                                                          (1.0, 0.0))):
+                shutil.copyfile(prediction_path, temp_path)
+            else:
+                data = np.asanyarray(image.dataobj)
+                if not np.issubdtype(data.dtype, np.integer):
+                    data = np.rint(data)
+                write_labelmap_nifti(data.astype(dtype_name),
+                                     volume_geometry[1], temp_path)
+            # Fails if the segmentation file already exists.
+            move_file_exclusively(temp_path, segmentation_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+    except FileExistsError:
+        return 'exists', 'a segmentation already exists'
+    except Exception as e:
+        return 'error', str(e)
+    return 'imported', ''
@@ -0,0 +1,82 @@
+from utils import *
+
+class BatchRunner():
+    """
+    This class runs a batch operation of SlicerCARTLogic (e.g.
+    import_predictions_steps) from the Qt event loop, so that the UI stays
+    responsive. The operation is a generator yielding its progress while
+    its work is done in worker processes or threads; a timer advances it
+    and the report it returns is given to a callback once it is finished.
+    Everything else runs on the main thread, so the operation can use the
+    Slicer API and decorated functions.
+    """
+
+    @enter_function
+    def __init__(self, interval=50):
+        """
+        __init__
+
+        Args:
+            interval: delay between two steps of the operation (in ms).
+        """
+        self.steps = None
+        self.on_progress = None
+        self.on_done = None
+        self.timer = qt.QTimer()
+        self.timer.setInterval(interval)
+        self.timer.timeout.connect(self.on_timeout)
+
+    @enter_function
+    def start(self, steps, on_progress, on_done):
+        """
+        Start an operation.
+        :param steps: generator of the operation, yielding tuples (number
+                      of items done, number of items).
+        :param on_progress: function called with the number of items done
+                            and the number of items at each step.
+        :param on_done: function called with the report of the operation
+                        and None, or with None and the exception that
+                        stopped it.
+        """
+        self.cancel()
+        self.steps = steps
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.timer.start()
+
+    def is_running(self):
+        """
+        Check if an operation is in progress.
+        """
+        return self.steps is not None
+
+    @enter_function
+    def cancel(self):
+        """
+        Stop the operation in progress (its work not started yet is
+        dropped). on_done is not called.
+        """
+        if self.steps is None:
+            return
+        self.timer.stop()
+        steps, self.steps = self.steps, None
+        steps.close()
+
+    def on_timeout(self):
+        """
+        Run a step of the operation. Not decorated with enter_function:
+        called by the timer at each step.
+        """
+        try:
+            done_count, count = next(self.steps)
+        except StopIteration as stop:
+            self.timer.stop()
+            self.steps = None
+            self.on_done(stop.value, None)
+            return
+        except Exception as e:
+            self.timer.stop()
+            self.steps = None
+            self.on_done(None, e)
+            return
+        self.on_progress(done_count, count)
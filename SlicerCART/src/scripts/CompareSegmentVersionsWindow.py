@@ -1,5 +1,14 @@
 from utils import *
 
+# Columns of the metrics table: header -> key of the metrics (see
+# batch_workers.get_overlap_metrics).
+METRICS_COLUMNS = {'Dice': 'dice',
+                   'Jaccard': 'jaccard',
+                   'Volume (mL)': 'volume_ml',
+                   'Other volume (mL)': 'other_volume_ml',
+                   'Volume difference (mL)': 'volume_difference_ml',
+                   'HD95 (mm)': 'hd95_mm'}
+
 class CompareSegmentVersionsWindow(qt.QWidget):
     def __init__(self, segmenter, segmentationInformation_df, parent=None):
         """
@@ -37,10 +46,35 @@ class CompareSegmentVersionsWindow(qt.QWidget):
         self.labelDropdown = qt.QComboBox()
         for label in self.segmenter.config_yaml['labels']:
             self.labelDropdown.addItem(label['name'])
+        self.labelDropdown.currentIndexChanged.connect(
+            self.update_metrics_table)
         buttonLayout.addWidget(self.labelDropdown)
 
         layout.addLayout(buttonLayout)
 
+        # Overlap metrics of each pair of selected versions, for the label
+        # of interest. Rows are filled as soon as their pair is computed.
+        self.metricsButton = qt.QPushButton('Compute metrics')
+        self.metricsButton.clicked.connect(self.pushMetricsButton)
+        layout.addWidget(self.metricsButton)
+
+        self.metricsTableView = qt.QTableWidget()
+        self.metricsTableView.setColumnCount(2 + len(METRICS_COLUMNS))
+        self.metricsTableView.setHorizontalHeaderLabels(
+            ['Version', 'Other version'] + list(METRICS_COLUMNS))
+        self.metricsTableView.horizontalHeader(
+
+        ).setSectionResizeMode(qt.QHeaderView.Stretch)
+        layout.addWidget(self.metricsTableView)
+
+        # (version, other version, future) of each row, and results of the
+        # rows already filled (metrics or exception).
+        self.metrics_jobs = []
+        self.metrics_results = {}
+        self.metrics_timer = qt.QTimer()
+        self.metrics_timer.setInterval(100)
+        self.metrics_timer.timeout.connect(self.on_metrics_poll)
+
         self.versionCheckboxWidgets = {}
 
         if segmentationInformation_df.shape[0] > 0:
@@ -98,6 +132,8 @@ class CompareSegmentVersionsWindow(qt.QWidget):
                 self.versionTableView.setHorizontalHeaderItem(
                     4, qt.QTableWidgetItem('Date and Time'))
 
+        self.segmenter.add_project_statistics_table(layout)
+
         self.viewSegmentsButton = qt.QPushButton('Compare')
         self.viewSegmentsButton.clicked.connect(self.pushViewSegmentsButton)
         layout.addWidget(self.viewSegmentsButton)
@@ -108,7 +144,7 @@ class CompareSegmentVersionsWindow(qt.QWidget):
 
         self.setLayout(layout)
         self.setWindowTitle("[READ ONLY] Compare Segment Versions")
-        self.resize(800, 400)
+        self.resize(800, 600)
 
     def pushViewSegmentsButton(self):
         """
@@ -119,33 +155,124 @@ class CompareSegmentVersionsWindow(qt.QWidget):
         selected_label = self.labelDropdown.currentText
         selected_version_file_paths = {}
 
-        segmentation_file_extension = ""
-        if "nii" in ConfigPath.INPUT_FILE_EXTENSION:
-            segmentation_file_extension = ".nii.gz"
-        elif "nrrd" in ConfigPath.INPUT_FILE_EXTENSION:
-            segmentation_file_extension = ".seg.nrrd"
-
         for index, row in self.segmentationInformation_df.iterrows():
             if self.versionCheckboxWidgets[index].checkState() > 0:
                 selected_version = row['Segmentation version']
-                absolute_path_to_segmentation = \
-                    (f'{self.segmenter.currentOutputPath}{os.sep}'
-                     f'{self.segmenter.currentVolumeFilename}'
-                     f'_{selected_version}{segmentation_file_extension}')
                 selected_version_file_paths[(f"{selected_label}"
                                              f"_{selected_version}"
                                              f"_{row['Annotator Name']}")] = \
-                    absolute_path_to_segmentation
+                    self.get_version_file_path(selected_version)
 
+        self.metrics_timer.stop()
         self.segmenter.compareSegmentVersions(selected_label,
                                               selected_version_file_paths)
 
         self.close()
 
+    def get_version_file_path(self, version):
+        """
+        Get the path of the segmentation file of a version of the current
+        case.
+        """
+        segmentation_file_extension = ""
+        if "nii" in ConfigPath.INPUT_FILE_EXTENSION:
+            segmentation_file_extension = ".nii.gz"
+        elif "nrrd" in ConfigPath.INPUT_FILE_EXTENSION:
+            segmentation_file_extension = ".seg.nrrd"
+        return (f'{self.segmenter.currentOutputPath}{os.sep}'
+                f'{self.segmenter.currentVolumeFilename}'
+                f'_{version}{segmentation_file_extension}')
+
+    def pushMetricsButton(self):
+        """
+        Compute the metrics of each pair of selected versions (all versions
+        if none is selected) in background.
+        """
+        versions = [row['Segmentation version'] for index, row
+                    in self.segmentationInformation_df.iterrows()
+                    if self.versionCheckboxWidgets[index].checkState() > 0]
+        if not versions:
+            versions = self.segmentationInformation_df[
+                'Segmentation version'].to_list()
+        # A version saved several times (e.g. replaced) is compared once.
+        versions = list(dict.fromkeys(versions))
+
+        paths = [self.get_version_file_path(version) for version in versions]
+        label_values = {label['name']: label['value']
+                        for label in self.segmenter.config_yaml['labels']}
+        jobs = self.segmenter.segmentation_metrics.submit(paths, label_values)
+
+        version_of_path = dict(zip(paths, versions))
+        self.metrics_jobs = [(version_of_path[path],
+                              version_of_path[other_path], future)
+                             for path, other_path, future in jobs]
+        self.metrics_results = {}
+        self.metricsTableView.clearContents()
+        self.metricsTableView.setRowCount(len(self.metrics_jobs))
+        for row, (version, other_version, _) in enumerate(self.metrics_jobs):
+            self.set_metrics_cell(row, 0, version)
+            self.set_metrics_cell(row, 1, other_version)
+            for column in range(2, 2 + len(METRICS_COLUMNS)):
+                self.set_metrics_cell(row, column, '...')
+        self.on_metrics_poll()
+        self.metrics_timer.start()
+
+    def on_metrics_poll(self):
+        """
+        Fill the rows of the metrics table whose pair is computed.
+        """
+        for row, (_, _, future) in enumerate(self.metrics_jobs):
+            if row in self.metrics_results or not future.done():
+                continue
+            try:
+                self.metrics_results[row] = future.result()
+            except Exception as e:
+                self.metrics_results[row] = e
+            self.fill_metrics_row(row)
+
+        if len(self.metrics_results) == len(self.metrics_jobs):
+            self.metrics_timer.stop()
+
+    def update_metrics_table(self):
+        """
+        Fill the metrics table with the results of the label of interest.
+        """
+        for row in self.metrics_results:
+            self.fill_metrics_row(row)
+
+    def fill_metrics_row(self, row):
+        """
+        Fill a row of the metrics table for the label of interest.
+        """
+        result = self.metrics_results[row]
+        if isinstance(result, Exception):
+            self.set_metrics_cell(row, 2, f'Error: {result}')
+            for column in range(3, 2 + len(METRICS_COLUMNS)):
+                self.set_metrics_cell(row, column, '')
+            return
+
+        label_value = self.segmenter.config_yaml['labels'][
+            self.labelDropdown.currentIndex]['value']
+        metrics = result[label_value]
+        for column, key in enumerate(METRICS_COLUMNS.values(), 2):
+            value = metrics[key]
+            self.set_metrics_cell(
+                row, column, '-' if np.isnan(value) else f'{value:.3f}')
+
+    def set_metrics_cell(self, row, column, text):
+        """
+        Set the text of a read only cell of the metrics table.
+        """
+        cell = qt.QTableWidgetItem(text)
+        cell.setFlags(qt.Qt.NoItemFlags)
+        cell.setForeground(qt.QBrush(qt.QColor(self.segmenter.foreground)))
+        self.metricsTableView.setItem(row, column, cell)
+
     def pushCancel(self):
         """
         pushCancel
 
         Args:
         """
+        self.metrics_timer.stop()
         self.close()
@@ -105,6 +105,7 @@ class SlicerCARTConfigurationSetupWindow(qt.QWidget):
         self.file_extension_combobox = qt.QComboBox()
         self.file_extension_combobox.addItem('*.nii.gz')
         self.file_extension_combobox.addItem('*.nrrd')
+        self.file_extension_combobox.addItem('*.nii')
 
         file_extension_hbox.addWidget(self.file_extension_combobox)
 
@@ -428,6 +429,8 @@ class SlicerCARTConfigurationSetupWindow(qt.QWidget):
             self.file_extension_combobox.setCurrentIndex(0)
         elif self.file_extension_selected == '*.nrrd':
             self.file_extension_combobox.setCurrentIndex(1)
+        elif self.file_extension_selected == '*.nii':
+            self.file_extension_combobox.setCurrentIndex(2)
 
         self.interpolate_combobox.setCurrentIndex(self.interpolate_selected)
         self.keep_working_list_combobox.setCurrentIndex(
@@ -990,7 +993,7 @@ class SlicerCARTConfigurationInitialWindow(qt.QWidget):
             # Ensure there is a config file in the output folder
             ConfigPath.set_output_folder(self.outputFolder)
             ConfigPath.check_existing_configuration()
-            ConfigPath.delete_temp_file()
+            ConfigPath.set_output_folder_selected()
 
             # self.segmenter corresponds to SlicerCART UI in Slicer.
             self.segmenter.onSelectVolumesFolderButton()
@@ -151,6 +151,15 @@ class LoadClassificationWindow(qt.QWidget):
         # Ensure code iterates through the appropriate label configuration
         iteration_dict = self.segmenter.get_label_iteration_dict()
 
+        # Values of the widgets, set at once at the end (see
+        # apply_classification_state). Widgets are reused from previous
+        # grids: the labels without saved value are reset.
+        checkboxes_state = {name: False
+                            for name in self.segmenter.checkboxWidgets}
+        comboboxes_state = {}
+        freetextboxes_state = {name: ""
+                               for name in self.segmenter.freeTextBoxes}
+
         for i, (objectName, label) in enumerate(
                 classif_label["checkboxes"].items()):
 
@@ -161,11 +170,11 @@ class LoadClassificationWindow(qt.QWidget):
             try:
 
                 if selected_version_df.at[0, column_name] == 'Yes':
-                    self.segmenter.checkboxWidgets[objectName].setChecked(True)
+                    checkboxes_state[objectName] = True
                 elif (selected_version_df.at[0,
                 column_name] == 'No' or
                       str(selected_version_df.at[0, column_name]) == 'nan'):
-                    self.segmenter.checkboxWidgets[objectName].setChecked(False)
+                    checkboxes_state[objectName] = False
 
             except:
                 print('Means that the column name does not exist in the '
@@ -182,8 +191,8 @@ class LoadClassificationWindow(qt.QWidget):
 
             column_name = self.recreate_column_name(comboBoxName, 'comboboxes')
 
-            self.segmenter.comboboxWidgets[comboBoxName].setCurrentText(
-                selected_version_df.at[0, column_name])
+            comboboxes_state[comboBoxName] = selected_version_df.at[
+                0, column_name]
 
         # Ensure to save using the correct combobox version if later
         # classificaitno
@@ -199,17 +208,18 @@ class LoadClassificationWindow(qt.QWidget):
                 saved_text = selected_version_df.at[0, column_name]
 
                 if str(saved_text) != 'nan':
-                    self.segmenter.freeTextBoxes[
-                        freeTextBoxObjectName].setText(saved_text)
+                    freetextboxes_state[freeTextBoxObjectName] = saved_text
                 else:
-                    self.segmenter.freeTextBoxes[
-                        freeTextBoxObjectName].setText("")
+                    freetextboxes_state[freeTextBoxObjectName] = ""
 
             except:
                 print('Means that the column name does not exist in the '
                       'current version.')
                 pass
 
+        self.segmenter.apply_classification_state(
+            checkboxes_state, comboboxes_state, freetextboxes_state)
+
         self.close()
 
     @enter_function
@@ -228,33 +238,14 @@ class LoadClassificationWindow(qt.QWidget):
         :param: csv_df: dataframe of the csv classification file
         :return: result_dict: a dictionary with the appropriate label names.
         """
-        # Extract column names as a list
-        column_names = csv_df.columns.tolist()
-        classification_labels = []
-        for element in column_names:
-            try:
-                # Convert string to dictionary
-                result_dict = eval(element)
-                if isinstance(result_dict,
-                              dict):  # Ensure the result is a dictionary
-                    classification_labels.append(element)
-                else:
-                    print("The string did not evaluate to a dictionary.")
-            except (SyntaxError, NameError) as e:
-                print("Failed to convert string to dictionary:", e)
-        Debug.print('list up to date:', classification_labels)
-
-        # Convert strings to dictionaries and combine them
+        # Classification label columns are formatted as
+        # "{'<label name>': '<type of label>'}".
         result_dict = {}
-        for d in classification_labels:
-            try:
-                # Safely evaluate the string to a dictionary
-                parsed_dict = eval(d)  # Use with caution if input is untrusted
-                if isinstance(parsed_dict, dict):
-                    for key, value in parsed_dict.items():
-                        result_dict[d] = value
-            except Exception as e:
-                print(f"Failed to parse '{d}': {e}")
+        for element in csv_df.columns.tolist():
+            kind = ClassificationStore.parse_column(self, element)[1]
+            if kind is not None:
+                result_dict[element] = kind
+        Debug.print(self, f'list up to date: {list(result_dict)}')
 
         return result_dict
 
@@ -308,11 +299,9 @@ class LoadClassificationWindow(qt.QWidget):
         Args:
             segmenter: Description of segmenter.
         """
-        # Loop through all items in the layout and remove them
-        for i in reversed(range(segmenter.ui.ClassificationGridLayout.count())):
-            widget = segmenter.ui.ClassificationGridLayout.itemAt(i).widget()
-            if widget is not None:
-                widget.deleteLater()
+        # Widgets are kept to be reused when the grid is built again (e.g.
+        # with the labels of the current configuration on the next case).
+        segmenter.clear_classification_grid()
 
     @enter_function
     def recreate_column_name(self, name, type):
@@ -79,6 +79,8 @@ class LoadSegmentationsWindow(qt.QWidget):
                 self.versionTableView.setHorizontalHeaderItem(
                     3, qt.QTableWidgetItem('Date and Time'))
 
+        self.segmenter.add_project_statistics_table(layout)
+
         self.loadButton = qt.QPushButton('Load')
         self.loadButton.clicked.connect(self.pushLoad)
         layout.addWidget(self.loadButton)
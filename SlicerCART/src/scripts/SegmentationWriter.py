@@ -0,0 +1,166 @@
+from utils import *
+
+class SegmentationWriter():
+    """
+    This class writes the saved segmentations and their information (see
+    SegmentationLedger) in a background thread, so that the next case can be
+    loaded while the previous one is compressed and written. The data to
+    write is copied on the main thread before being queued. Segmentation
+    files are written to a hidden temporary file in the destination folder
+    and then renamed, so that a file is either complete or absent. Failed
+    steps are retried.
+    """
+
+    @enter_function
+    def __init__(self, max_attempts=3, retry_delay=1.0):
+        """
+        __init__
+
+        Args:
+            max_attempts: number of attempts of each step before failure.
+            retry_delay: delay before the first retry (in seconds); doubled
+                         at each retry.
+        """
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.mutex = RLock()
+        self.jobs = queue.Queue()
+        self.results = queue.Queue()
+        self.pending_count = 0
+        # Final paths of the files of the queued jobs.
+        self.pending_paths = set()
+        self.thread = Thread(target=self.run, name='SlicerCARTWriter',
+                             daemon=True)
+        self.thread.start()
+
+    @enter_function
+    def submit(self, description, paths, steps, result=None):
+        """
+        Queue a write job.
+        :param description: description of the job (for failure reports).
+        :param paths: final paths of the files written by the job.
+        :param steps: functions without argument, run in order in the
+                      writer thread. Each step must be safe to run again if
+                      it failed (e.g. write_atomically).
+        :param result: object returned by poll once the job is done.
+        """
+        with self.mutex:
+            self.pending_count += 1
+            self.pending_paths.update(paths)
+        self.jobs.put((description, paths, steps, result))
+
+    def run(self):
+        """
+        Writer thread loop. Not decorated with enter_function: runs until
+        shutdown.
+        """
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            description, paths, steps, result = job
+
+            start = time.time()
+            start_counter = time.perf_counter()
+            error = None
+            for step in steps:
+                error = self.run_step(description, step)
+                if error is not None:
+                    break
+            SpanProfiler.record('SegmentationWriter.job', start,
+                                time.perf_counter() - start_counter)
+
+            with self.mutex:
+                self.pending_count -= 1
+                self.pending_paths.difference_update(paths)
+            self.results.put((description, result, error))
+
+    def run_step(self, description, step):
+        """
+        Run a step, retrying it if it fails. Not decorated with
+        enter_function: called from the writer thread.
+        :return: the last exception if all attempts failed, otherwise None.
+        """
+        delay = self.retry_delay
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                step()
+                return None
+            except FileExistsError as e:
+                # Another writer took the path: retrying cannot succeed.
+                print(f'{description}: write failed: {e}')
+                return e
+            except Exception as e:
+                print(f'{description}: write failed (attempt {attempt}/'
+                      f'{self.max_attempts}): {e}')
+                if attempt == self.max_attempts:
+                    return e
+                time.sleep(delay)
+                delay *= 2
+
+    @enter_function
+    def poll(self):
+        """
+        Get the jobs done since the last call (to be called from the main
+        thread).
+        :return: list of tuples (description, result, error) where error is
+        None if the job succeeded.
+        """
+        done = []
+        while True:
+            try:
+                done.append(self.results.get_nowait())
+            except queue.Empty:
+                return done
+
+    def get_pending_count(self):
+        """
+        Get the number of queued or running jobs.
+        """
+        with self.mutex:
+            return self.pending_count
+
+    def get_pending_paths(self):
+        """
+        Get the final paths of the files not written yet.
+        """
+        with self.mutex:
+            return set(self.pending_paths)
+
+    @enter_function
+    def shutdown(self, wait=True):
+        """
+        Stop the writer thread once the queued jobs are done.
+        :param wait: wait for the queued jobs to be written.
+        """
+        self.jobs.put(None)
+        if wait:
+            self.thread.join()
+
+    def write_atomically(self, path, write_function, replace=False):
+        """
+        Write a file through a hidden temporary file of the same folder,
+        moved to its final path once complete. Not decorated with
+        enter_function: called from the writer thread.
+        :param path: final path of the file.
+        :param write_function: function writing the file at the path given
+                               as argument.
+        :param replace: replace an existing file (replacement confirmed by
+                        the user). Otherwise, the step fails with
+                        FileExistsError if the path was taken since the job
+                        was queued (e.g. by a prediction import or a
+                        headless save), and the next steps of the job (e.g.
+                        the ledger record) are not run.
+        """
+        folder, filename = os.path.split(path)
+        temp_path = os.path.join(folder,
+                                 f'.partial_{uuid.uuid4().hex}_{filename}')
+        try:
+            write_function(temp_path)
+            if replace:
+                os.replace(temp_path, path)
+            else:
+                batch_workers.move_file_exclusively(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
@@ -41,11 +41,18 @@ class ShowSegmentVersionLegendWindow(qt.QWidget):
 
             for index, row in segmentationInformation_df.iterrows():
                 currentColor = None
+                # Exact name of the segment of the version (see
+                # CompareSegmentVersionsWindow): 'v10' must not match the
+                # segment of 'v100'.
+                version_segment_name = (
+                    f"{self.segmenter.labelOfCompareSegmentVersions}"
+                    f"_{row['Segmentation version']}"
+                    f"_{row['Annotator Name']}")
                 for (segment_name, color) \
                         in (self.segmenter.
                         colorsSelectedVersionFilePathsForCompareSegmentVersions.
                         items()):
-                    if row['Segmentation version'] in segment_name:
+                    if segment_name == version_segment_name:
                         currentColor = color
 
                         colorItem = qt.QTableWidgetItem()
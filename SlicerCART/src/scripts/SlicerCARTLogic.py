@@ -1,4 +1,5 @@
 from utils import *
+from scripts.WorkFiles import WorkFiles
 
 class SlicerCARTLogic(ScriptedLoadableModuleLogic):
     """This class should implement all the actual
@@ -72,3 +73,774 @@ class SlicerCARTLogic(ScriptedLoadableModuleLogic):
         stopTime = time.time()
         logging.info(
             f'Processing completed in {stopTime - startTime:.2f} seconds')
+
+    def export_segmentation_information(self, output_folder):
+        """
+        Export the segmentation information ledger of each case of an
+        output folder to a SegmentationInformation.csv file next to it
+        (layout of the csv files written by previous versions, for
+        downstream scripts). Can be used without GUI widget.
+        :param output_folder: output folder of a SlicerCART project.
+        :return: list of the written csv files.
+        """
+        csv_paths = []
+        for folder, dirs, files in os.walk(output_folder):
+            dirs[:] = [name for name in dirs if name != CONF_FOLDER_NAME]
+            for filename in files:
+                if filename.endswith(SEGMENTATION_LEDGER_SUFFIX):
+                    ledger = SegmentationLedger(os.path.join(folder,
+                                                             filename))
+                    ledger.export_csv()
+                    csv_paths.append(ledger.csv_path)
+        return csv_paths
+
+    def find_output_files(self, output_folder, suffix, max_workers=8):
+        """
+        Find the files of an output folder (except the _conf folder) whose
+        name ends with suffix. Folders are listed by several threads, since
+        listing the folders of thousands of cases (e.g. on a network share)
+        is bound by the file system latency. Can be used without GUI widget.
+        :return: sorted list of paths.
+        """
+        paths = []
+        with ThreadPoolExecutor(
+                max_workers=max_workers,
+                thread_name_prefix='SlicerCARTScan') as executor:
+            pending = {executor.submit(self.scan_folder, output_folder,
+                                       suffix)}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    folder_paths, subfolders = future.result()
+                    paths.extend(folder_paths)
+                    pending.update(executor.submit(self.scan_folder, folder,
+                                                   suffix)
+                                   for folder in subfolders)
+        return sorted(paths)
+
+    def scan_folder(self, folder, suffix):
+        """
+        List one folder for find_output_files. Not decorated with
+        enter_function: called from the scanning threads.
+        :return: tuple (paths of the files ending with suffix, subfolders).
+        """
+        paths = []
+        subfolders = []
+        try:
+            with os.scandir(folder) as elements:
+                for element in elements:
+                    if element.is_dir():
+                        if element.name != CONF_FOLDER_NAME:
+                            subfolders.append(element.path)
+                    elif element.name.endswith(suffix):
+                        paths.append(element.path)
+        except OSError as e:
+            print(f'Folder not scanned ({folder}): {e}')
+        return paths, subfolders
+
+    def load_classifications(self, output_folder):
+        """
+        Read the classification information csv files of all cases of an
+        output folder into a single dataframe (one row per saved
+        classification version). Can be used without GUI widget.
+        :param output_folder: output folder of a SlicerCART project.
+        :return: dataframe of the classifications, values read as strings;
+        columns a case never had are empty (NaN). None if no classification
+        was saved.
+        """
+        frames = []
+        for path in self.find_output_files(output_folder,
+                                           CLASSIFICATION_INFORMATION_SUFFIX):
+            df = ClassificationStore(path).read_dataframe()
+            if df is not None:
+                frames.append(df)
+        if not frames:
+            return None
+        # Single concatenation (columns aligned once for all cases).
+        return pd.concat(frames, ignore_index=True, sort=False)
+
+    @enter_function
+    def get_classification_export_columns(self, schemas):
+        """
+        Get the columns of a cohort classification export: the annotation
+        information columns, then one column per classification label
+        named after the label, by type of label (checkboxes, comboboxes,
+        freetextboxes). The comboboxes of all combobox versions with the
+        same name share a column. A name used by several types of labels is
+        suffixed with the type (e.g. 'Location (comboboxes)').
+        :param schemas: schemas of the classification files (see
+                        ClassificationStore.read_schema).
+        :return: dictionary csv column header -> export column name, by
+        export column order.
+        """
+        information_columns = {}
+        label_columns = {kind: {} for kind in CLASSIFICATION_BOXES_LIST}
+        for schema in schemas:
+            for column in schema['columns']:
+                if column['kind'] is None:
+                    information_columns[column['column']] = column['name']
+                else:
+                    label_columns[column['kind']][column['column']] = (
+                        column['name'])
+
+        kinds_by_name = {}
+        for kind, columns in label_columns.items():
+            for name in columns.values():
+                kinds_by_name.setdefault(name, set()).add(kind)
+
+        export_columns = dict(information_columns)
+        for kind, columns in label_columns.items():
+            for column, name in columns.items():
+                if len(kinds_by_name[name]) > 1 or name in information_columns:
+                    name = f'{name} ({kind})'
+                export_columns[column] = name
+        return export_columns
+
+    @enter_function
+    def export_classifications(self, output_folder, export_path,
+                               all_versions=False, chunk_size=500,
+                               max_workers=8):
+        """
+        Export the classifications of all cases of an output folder to a
+        single csv or Parquet file (one row per case, or per classification
+        version), with the columns normalized across cases and combobox
+        versions (see get_classification_export_columns). Labels missing
+        from a classification ('--' in the csv files, label added or
+        removed from the configuration) are empty. Can be used without GUI
+        widget.
+        The classification files are read by chunks of chunk_size cases
+        written before reading the next ones, so the memory used does not
+        depend on the number of cases; the columns are collected first from
+        the schemas of the files (see ClassificationStore).
+        :param output_folder: output folder of a SlicerCART project.
+        :param export_path: path of the .csv or .parquet file to write
+                            (Parquet requires the pyarrow package).
+        :param all_versions: True to export all classification versions,
+                             False to export the latest version of each
+                             case.
+        :param chunk_size: number of cases read at once.
+        :param max_workers: number of threads scanning and reading files.
+        :return: dictionary with the number of 'cases' and 'rows' exported,
+        the export path and the duration in seconds.
+        """
+        start = time.perf_counter()
+        is_parquet = export_path.endswith('.parquet')
+        if is_parquet:
+            try:
+                import pyarrow
+                import pyarrow.parquet
+            except ImportError:
+                raise ImportError('Exporting to Parquet requires the pyarrow '
+                                  'package (e.g. '
+                                  'slicer.util.pip_install("pyarrow")); '
+                                  'export to a .csv file otherwise.')
+
+        stores = [ClassificationStore(path) for path in self.find_output_files(
+            output_folder, CLASSIFICATION_INFORMATION_SUFFIX, max_workers)]
+
+        with ThreadPoolExecutor(
+                max_workers=max_workers,
+                thread_name_prefix='SlicerCARTExport') as executor:
+            export_columns = self.get_classification_export_columns(
+                executor.map(ClassificationStore.read_schema, stores))
+            names = list(export_columns.values())
+
+            counts = {'cases': 0, 'rows': 0}
+            temp_path = f'{export_path}.tmp'
+            writer = None
+            try:
+                if is_parquet:
+                    arrow_schema = pyarrow.schema(
+                        [(name, pyarrow.string()) for name in names])
+                    writer = pyarrow.parquet.ParquetWriter(temp_path,
+                                                           arrow_schema)
+                else:
+                    pd.DataFrame(columns=names).to_csv(temp_path,
+                                                       index=False)
+
+                for index in range(0, len(stores), chunk_size):
+                    frames = [
+                        df for df in executor.map(
+                            ClassificationStore.read_dataframe,
+                            stores[index:index + chunk_size])
+                        if df is not None and df.shape[0] > 0]
+                    if not frames:
+                        continue
+                    # Single concatenation per chunk; the first index level
+                    # is the case of the rows.
+                    chunk = pd.concat(frames, keys=range(len(frames)),
+                                      sort=False)
+                    if not all_versions:
+                        chunk = self.get_latest_classifications(chunk)
+                    chunk = chunk.reindex(columns=list(export_columns))
+                    chunk.columns = names
+                    chunk = chunk.replace(CLASSIFICATION_REMOVED_MARK,
+                                          np.nan)
+                    if is_parquet:
+                        chunk = chunk.astype(object).where(chunk.notna(),
+                                                           None)
+                        writer.write_table(pyarrow.Table.from_pandas(
+                            chunk, schema=arrow_schema,
+                            preserve_index=False))
+                    else:
+                        chunk.to_csv(temp_path, mode='a', header=False,
+                                     index=False)
+                    counts['cases'] += len(frames)
+                    counts['rows'] += chunk.shape[0]
+            except BaseException:
+                if writer is not None:
+                    writer.close()
+                    writer = None
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+            if writer is not None:
+                writer.close()
+            os.replace(temp_path, export_path)
+
+        duration = time.perf_counter() - start
+        print(f'Classification export: {counts} in {duration:.1f} s '
+              f'({export_path})')
+        return {'cases': counts['cases'], 'rows': counts['rows'],
+                'export_path': export_path, 'duration': duration}
+
+    def get_latest_classifications(self, chunk):
+        """
+        Keep the latest classification version of each case of a chunk of
+        export_classifications (the last row of a case if its versions are
+        not numbered). Not decorated with enter_function: called for each
+        chunk.
+        :param chunk: classifications of the cases of the chunk, with the
+                      case as first index level.
+        :return: dataframe with one row per case, by case order.
+        """
+        cases = chunk.index.get_level_values(0).to_numpy()
+        versions = pd.Series(-1, index=chunk.index)
+        if 'Classification version' in chunk.columns:
+            versions = pd.to_numeric(
+                chunk['Classification version'].str[1:],
+                errors='coerce').fillna(-1)
+        # Stable sort by case then version: the last row of each case is
+        # its latest version.
+        order = np.lexsort((versions.to_numpy(), cases))
+        sorted_cases = cases[order]
+        is_last = np.append(sorted_cases[1:] != sorted_cases[:-1], True)
+        return chunk.iloc[order[is_last]]
+
+    # Headless API: the functions below do not use the widget nor the Slicer
+    # scene, so they can be called from a script run with
+    # Slicer --no-main-window --python-script, and from several threads or
+    # processes working on different cases (or on the same case: versions
+    # are never overwritten). Example:
+    #     logic = SlicerCARTLogic()
+    #     for case_path in logic.discover_cases(volumes_folder):
+    #         data, affine = load_prediction(case_path)
+    #         logic.save_segmentation_array(volumes_folder, output_folder,
+    #                                       case_path, data, affine,
+    #                                       'model', 'AI')
+
+    @enter_function
+    def discover_cases(self, volumes_folder, output_folder=None,
+                       pattern=None):
+        """
+        Find the volumes of a volumes folder (see CaseDiscovery). Can be used
+        without GUI widget.
+        :param volumes_folder: volumes folder of the project.
+        :param output_folder: output folder where the case manifest is kept
+                              (None to keep it in memory only).
+        :param pattern: filename pattern of the volumes (by default, the
+                        input file extension of the configuration).
+        :return: sorted list of volume paths.
+        """
+        if pattern is None:
+            pattern = ConfigPath.INPUT_FILE_EXTENSION
+        return CaseDiscovery(volumes_folder, pattern, output_folder).discover()
+
+    @enter_function
+    def get_case_output_path(self, volumes_folder, output_folder, case_path):
+        """
+        Get the output folder and volume filename (without extension) of a
+        case (same paths as the widget, see
+        updateCurrentOutputPathAndCurrentVolumeFilename).
+        :return: tuple (case output folder, volume filename).
+        """
+        output_path, filename = os.path.split(
+            output_folder + case_path[len(volumes_folder):])
+        return output_path, filename.split('.')[0]
+
+    @enter_function
+    def get_segmentation_version_counter(self, volumes_folder, output_folder,
+                                         case_path):
+        """
+        Get the segmentation version counter of a case.
+        """
+        output_path, volume_filename = self.get_case_output_path(
+            volumes_folder, output_folder, case_path)
+        return SegmentationVersionCounter(output_path, volume_filename,
+                                          ConfigPath.INPUT_FILE_EXTENSION)
+
+    @enter_function
+    def get_next_segmentation_version(self, volumes_folder, output_folder,
+                                      case_path):
+        """
+        Get the version of the next segmentation of a case (e.g. 'v03').
+        Can be used without GUI widget.
+        """
+        return self.get_segmentation_version_counter(
+            volumes_folder, output_folder, case_path).get_next_version()
+
+    @enter_function
+    def save_segmentation_array(self, volumes_folder, output_folder,
+                                case_path, data, affine, annotator_name,
+                                annotator_degree='', revision_step='',
+                                information=None, metadata_store=None):
+        """
+        Save a labelmap array as the next segmentation version of a case and
+        record its segmentation information. Can be used without GUI widget,
+        from any thread. The file is written to a temporary file and then
+        linked to its final name, which fails if the version already exists
+        (saved concurrently): the next version is then used.
+        :param volumes_folder: volumes folder of the project.
+        :param output_folder: output folder of the project.
+        :param case_path: path of the volume of the case.
+        :param data: IJK indexed labelmap array (same geometry as the
+                     volume).
+        :param affine: 4x4 IJK to RAS affine of the labelmap.
+        :param annotator_name: annotator name recorded for the version.
+        :param annotator_degree: annotator degree recorded for the version.
+        :param revision_step: revision step recorded for the version.
+        :param information: additional columns of the segmentation
+                            information record (e.g. the source of a
+                            prediction).
+        :param metadata_store: MetadataStore also updated (None if not
+                               used).
+        :return: tuple (saved version, path of the segmentation file).
+        """
+        counter = self.get_segmentation_version_counter(
+            volumes_folder, output_folder, case_path)
+        if counter.segmentation_extension != '.nii.gz':
+            raise ValueError('Segmentation arrays can only be saved for '
+                             'NIfTI volumes (input file extension '
+                             f'{ConfigPath.INPUT_FILE_EXTENSION}).')
+        os.makedirs(counter.output_path, exist_ok=True)
+
+        if ConfigPath.SAVE_UINT8:
+            data = data.astype(np.uint8, copy=False)
+        else:
+            data = data.astype(np.int16, copy=False)
+
+        filename = f'{counter.volume_filename}{counter.segmentation_extension}'
+        temp_path = os.path.join(counter.output_path,
+                                 f'.partial_{uuid.uuid4().hex}_{filename}')
+        try:
+            batch_workers.write_labelmap_nifti(data, affine, temp_path)
+            version_number = counter.get_latest_version_number() + 1
+            while True:
+                path = counter.get_segmentation_path(version_number)
+                try:
+                    batch_workers.move_file_exclusively(temp_path, path)
+                    break
+                except FileExistsError:
+                    version_number += 1
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        version = counter.format_version(version_number)
+        counter.record_save(version)
+        self.record_segmentation_information(
+            counter.output_path, os.path.basename(case_path),
+            counter.volume_filename, version, annotator_name,
+            annotator_degree, revision_step, information, metadata_store)
+        return version, path
+
+    @enter_function
+    def record_segmentation_information(self, output_path, case,
+                                        volume_filename, version,
+                                        annotator_name, annotator_degree='',
+                                        revision_step='', information=None,
+                                        metadata_store=None):
+        """
+        Append a record to the segmentation information ledger of a case
+        (same columns as SlicerCARTWidget.saveSegmentationInformation,
+        without timers). Can be used without GUI widget.
+        :param output_path: output folder of the case.
+        :param case: volume filename of the case (with extension).
+        :param volume_filename: volume filename without extension.
+        :param version: saved segmentation version.
+        :param information: additional columns of the record.
+        :param metadata_store: MetadataStore also updated (None if not
+                               used).
+        :return: the record.
+        """
+        record = {
+            "Volume filename": case,
+            "Segmentation version": version,
+            "Annotator Name": annotator_name,
+            "Annotator degree": annotator_degree,
+            "Revision step": revision_step,
+            "Date and time": datetime.today().strftime('%Y-%m-%d %H:%M:%S'),
+            "Duration": 0.0}
+        if information is not None:
+            record.update(information)
+
+        SegmentationLedger(os.path.join(
+            output_path,
+            f'{volume_filename}{SEGMENTATION_LEDGER_SUFFIX}')).append(record)
+        if metadata_store is not None:
+            metadata_store.add_segmentation_record(record)
+        return record
+
+    @enter_function
+    def get_cases_status(self, volumes_folder, output_folder, cases_paths,
+                         annotator_name):
+        """
+        Get the segmentation status of cases (see CaseStatusIndex). Can be
+        used without GUI widget.
+        :return: dictionary volume filename -> tuple (status, latest
+        segmentation version or None), where status is STATUS_NOT_DONE,
+        STATUS_DONE_BY_ANOTHER_ANNOTATOR or STATUS_DONE_BY_THIS_ANNOTATOR.
+        """
+        case_status_index = CaseStatusIndex(output_folder, volumes_folder)
+        case_status_index.refresh(cases_paths)
+        statuses = {}
+        for case_path in cases_paths:
+            case = os.path.basename(case_path)
+            statuses[case] = (
+                case_status_index.get_status(case, annotator_name),
+                case_status_index.get_latest_segmentation_version(case))
+        return statuses
+
+    @enter_function
+    def get_process_pool(self, max_workers=None):
+        """
+        Get a pool of worker processes running the functions of
+        batch_workers. Inside Slicer, the processes run PythonSlicer (the
+        python interpreter of Slicer without the application). A script run
+        with --python-script must guard its code with
+        if __name__ == '__main__' since processes import the main module.
+        :param max_workers: number of processes (by default, the number of
+                            CPUs).
+        """
+        context = multiprocessing.get_context('spawn')
+        executable_name = 'PythonSlicer'
+        if os.name == 'nt':
+            executable_name += '.exe'
+        executable = os.path.join(os.path.dirname(sys.executable),
+                                  executable_name)
+        if os.path.exists(executable):
+            context.set_executable(executable)
+        return ProcessPoolExecutor(max_workers=max_workers,
+                                   mp_context=context)
+
+    @enter_function
+    def run_steps(self, steps):
+        """
+        Run the steps of a batch operation (e.g. import_predictions_steps)
+        until it is finished.
+        :return: the report of the operation.
+        """
+        while True:
+            try:
+                next(steps)
+            except StopIteration as stop:
+                return stop.value
+
+    @enter_function
+    def import_predictions(self, volumes_folder, output_folder,
+                           predictions_folder, cases_paths,
+                           annotator_name='Prediction', max_workers=None,
+                           metadata_store=None):
+        """
+        Import prediction label maps (e.g. nnU-Net predictions) as the v01
+        segmentations of the cases, to be corrected by the annotators. Can
+        be used without GUI widget. Predictions are matched to the cases by
+        filename (without extension, see WorkFiles.build_filename_index);
+        predictions of a filename shared by several cases are not imported.
+        Cases that already have a segmentation are skipped. The geometry of each prediction is checked
+        against the header of the volume, and files are written in worker
+        processes; the segmentation information records are then appended
+        to the ledgers.
+        :param volumes_folder: volumes folder of the project.
+        :param output_folder: output folder of the project.
+        :param predictions_folder: folder of the prediction files (.nii or
+                                   .nii.gz, searched recursively).
+        :param cases_paths: paths of the volumes of the working list.
+        :param annotator_name: annotator name recorded for the predictions.
+        :param max_workers: number of worker processes.
+        :param metadata_store: MetadataStore also updated (None if not
+                               used).
+        :return: dictionary with the number of cases by status ('imported',
+        'exists', 'geometry mismatch', 'error', 'no case', 'ambiguous
+        case'), the list of
+        (prediction path, status, message) of the predictions not imported,
+        the duration in seconds and the throughput in cases per hour.
+        """
+        return self.run_steps(self.import_predictions_steps(
+            volumes_folder, output_folder, predictions_folder, cases_paths,
+            annotator_name, max_workers, metadata_store))
+
+    @enter_function
+    def import_predictions_steps(self, volumes_folder, output_folder,
+                                 predictions_folder, cases_paths,
+                                 annotator_name='Prediction',
+                                 max_workers=None, metadata_store=None):
+        """
+        Steps of import_predictions (same parameters), to be run from an
+        event loop (see BatchRunner): generator yielding the number of
+        predictions handled and the number of predictions while the files
+        are written by the worker processes. Its return value is the report
+        of import_predictions.
+        """
+        start = time.perf_counter()
+        # Keyed by filename without extension (the extensions of the
+        # volumes and of the predictions may differ).
+        path_by_name, duplicated_names = WorkFiles.build_filename_index(
+            self, cases_paths,
+            get_key=lambda path: os.path.basename(path).split('.')[0])
+        predictions_paths = CaseDiscovery(predictions_folder,
+                                          '*.nii*').discover()
+
+        counts = {'imported': 0, 'exists': 0, 'geometry mismatch': 0,
+                  'error': 0, 'no case': 0, 'ambiguous case': 0}
+        issues = []
+        jobs = []
+        for prediction_path in predictions_paths:
+            name = os.path.basename(prediction_path).split('.')[0]
+            if name in duplicated_names:
+                counts['ambiguous case'] += 1
+                issues.append((prediction_path, 'ambiguous case',
+                               'several cases have this filename: '
+                               + ', '.join(duplicated_names[name])))
+                continue
+            case_path = path_by_name.get(name)
+            if case_path is None:
+                counts['no case'] += 1
+                issues.append((prediction_path, 'no case', ''))
+                continue
+            counter = self.get_segmentation_version_counter(
+                volumes_folder, output_folder, case_path)
+            if counter.segmentation_extension != '.nii.gz':
+                raise ValueError('Predictions can only be imported for NIfTI '
+                                 'volumes (input file extension '
+                                 f'{ConfigPath.INPUT_FILE_EXTENSION}).')
+            if counter.get_latest_version_number() > 0:
+                counts['exists'] += 1
+                issues.append((prediction_path, 'exists',
+                               'a segmentation already exists'))
+                continue
+            jobs.append((prediction_path, case_path, counter))
+
+        dtype_name = 'uint8' if ConfigPath.SAVE_UINT8 else 'int16'
+        done_count = len(predictions_paths) - len(jobs)
+        yield done_count, len(predictions_paths)
+        executor = self.get_process_pool(max_workers)
+        try:
+            jobs_by_future = {
+                executor.submit(batch_workers.import_prediction,
+                                prediction_path, case_path,
+                                counter.get_segmentation_path(1),
+                                dtype_name): (prediction_path, case_path,
+                                              counter)
+                for prediction_path, case_path, counter in jobs}
+            pending = set(jobs_by_future)
+            while pending:
+                done, pending = wait(pending, timeout=BATCH_STEP_TIMEOUT,
+                                     return_when=FIRST_COMPLETED)
+                for future in done:
+                    prediction_path, case_path, counter = (
+                        jobs_by_future.pop(future))
+                    status, message = future.result()
+                    counts[status] += 1
+                    done_count += 1
+                    if status != 'imported':
+                        issues.append((prediction_path, status, message))
+                        continue
+                    version = counter.format_version(1)
+                    counter.record_save(version)
+                    self.record_segmentation_information(
+                        counter.output_path, os.path.basename(case_path),
+                        counter.volume_filename, version, annotator_name,
+                        information={'Prediction file': prediction_path},
+                        metadata_store=metadata_store)
+                yield done_count, len(predictions_paths)
+        finally:
+            # Predictions not started yet are dropped if the import is
+            # stopped.
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        duration = time.perf_counter() - start
+        throughput = counts['imported'] * 3600 / duration if duration else 0
+        print(f'Predictions import: {counts} in {duration:.1f} s '
+              f'({throughput:.0f} cases/hour)')
+        return {'counts': counts, 'issues': issues, 'duration': duration,
+                'throughput': throughput}
+
+    @enter_function
+    def get_annotators_segmentations(self, volumes_folder, output_folder,
+                                     case_path):
+        """
+        Get the latest segmentation of each annotator of a case, from the
+        segmentation information ledger. Can be used without GUI widget.
+        :return: list of tuples (annotator, version, path of the
+        segmentation file), sorted by annotator, for the files that exist.
+        """
+        counter = self.get_segmentation_version_counter(
+            volumes_folder, output_folder, case_path)
+        ledger = SegmentationLedger(os.path.join(
+            counter.output_path,
+            f'{counter.volume_filename}{SEGMENTATION_LEDGER_SUFFIX}'))
+
+        latest_numbers = {}
+        for record in ledger.read_records():
+            annotator = record.get('Annotator Name')
+            version = str(record.get('Segmentation version', ''))
+            if not annotator or not version[1:].isdigit():
+                continue
+            latest_numbers[annotator] = max(
+                latest_numbers.get(annotator, 0), int(version[1:]))
+
+        segmentations = []
+        for annotator, number in sorted(latest_numbers.items()):
+            path = counter.get_segmentation_path(number)
+            if os.path.exists(path):
+                segmentations.append(
+                    (annotator, counter.format_version(number), path))
+        return segmentations
+
+    @enter_function
+    def read_agreement_report_cases(self, report_path):
+        """
+        Get the cases already compared in an inter-rater agreement report,
+        after removing the incomplete last line left by an interruption.
+        :return: set of volume filenames (cases with an error excluded).
+        """
+        if not os.path.exists(report_path):
+            return set()
+        with open(report_path, 'rb+') as file:
+            content = file.read()
+            end = content.rfind(b'\n') + 1
+            if end < len(content):
+                file.truncate(end)
+        if end == 0:
+            return set()
+
+        report = pd.read_csv(report_path, usecols=['Volume filename',
+                                                   'Error'],
+                             dtype=str, keep_default_na=False)
+        return set(report.loc[report['Error'] == '', 'Volume filename'])
+
+    @enter_function
+    def compute_inter_rater_agreement(self, volumes_folder, output_folder,
+                                      cases_paths, label_values,
+                                      report_path=None, max_workers=None):
+        """
+        Compare the segmentations of the annotators of each case segmented
+        by at least two annotators (latest version of each annotator): Dice,
+        Jaccard, volumes and 95% Hausdorff distance of each pair of
+        annotators and each label, computed in worker processes (see
+        batch_workers.compare_case_annotators). Can be used without GUI
+        widget. Rows are appended to a csv report as soon as a case is
+        compared, so an interrupted run resumes where it stopped: the cases
+        already in the report are skipped (cases with an error are compared
+        again).
+        :param volumes_folder: volumes folder of the project.
+        :param output_folder: output folder of the project.
+        :param cases_paths: paths of the volumes of the working list.
+        :param label_values: dictionary label name -> label value of the
+                             configuration.
+        :param report_path: path of the csv report (by default, in the _conf
+                            folder of the output folder).
+        :param max_workers: number of worker processes (by default, the
+                            number of CPUs).
+        :return: dictionary with the number of cases by status ('compared',
+        'error', 'already reported', 'single annotator'), the report path
+        and the duration in seconds.
+        """
+        return self.run_steps(self.compute_inter_rater_agreement_steps(
+            volumes_folder, output_folder, cases_paths, label_values,
+            report_path, max_workers))
+
+    @enter_function
+    def compute_inter_rater_agreement_steps(self, volumes_folder,
+                                            output_folder, cases_paths,
+                                            label_values, report_path=None,
+                                            max_workers=None):
+        """
+        Steps of compute_inter_rater_agreement (same parameters), to be run
+        from an event loop (see BatchRunner): generator yielding the number
+        of cases handled and the number of cases while the cases are
+        compared by the worker processes. If it is stopped, the cases
+        compared so far stay in the report. Its return value is the report
+        of compute_inter_rater_agreement.
+        """
+        start = time.perf_counter()
+        if report_path is None:
+            report_path = os.path.join(output_folder, CONF_FOLDER_NAME,
+                                       INTER_RATER_AGREEMENT_FILENAME)
+        reported_cases = self.read_agreement_report_cases(report_path)
+
+        counts = {'compared': 0, 'error': 0, 'already reported': 0,
+                  'single annotator': 0}
+        jobs = []
+        for case_path in cases_paths:
+            case = os.path.basename(case_path)
+            if case in reported_cases:
+                counts['already reported'] += 1
+                continue
+            segmentations = self.get_annotators_segmentations(
+                volumes_folder, output_folder, case_path)
+            if len(segmentations) < 2:
+                counts['single annotator'] += 1
+                continue
+            jobs.append((case, segmentations))
+
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        os.makedirs(os.path.dirname(report_path), exist_ok=True)
+        is_new_report = (not os.path.exists(report_path)
+                         or os.path.getsize(report_path) == 0)
+        done_count = len(cases_paths) - len(jobs)
+        yield done_count, len(cases_paths)
+        with open(report_path, 'a', newline='') as file:
+            writer = csv.DictWriter(
+                file, fieldnames=batch_workers.AGREEMENT_REPORT_COLUMNS)
+            if is_new_report:
+                writer.writeheader()
+
+            executor = self.get_process_pool(max_workers)
+            try:
+                # A bounded number of cases in progress keeps the memory
+                # used by the results flat.
+                remaining_jobs = iter(jobs)
+                pending = set()
+                while True:
+                    for case, segmentations in remaining_jobs:
+                        pending.add(executor.submit(
+                            batch_workers.compare_case_annotators, case,
+                            segmentations, label_values))
+                        if len(pending) >= 2 * max_workers:
+                            break
+                    if not pending:
+                        break
+                    done, pending = wait(pending, timeout=BATCH_STEP_TIMEOUT,
+                                         return_when=FIRST_COMPLETED)
+                    for future in done:
+                        rows = future.result()
+                        writer.writerows(rows)
+                        file.flush()
+                        done_count += 1
+                        if all(row['Error'] for row in rows):
+                            counts['error'] += 1
+                        else:
+                            counts['compared'] += 1
+                    yield done_count, len(cases_paths)
+            finally:
+                # The cases in progress are compared again by the next run.
+                executor.shutdown(wait=False, cancel_futures=True)
+
+        duration = time.perf_counter() - start
+        print(f'Inter-rater agreement: {counts} in {duration:.1f} s '
+              f'({report_path})')
+        return {'counts': counts, 'report_path': report_path,
+                'duration': duration}
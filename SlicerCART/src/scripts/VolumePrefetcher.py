@@ -0,0 +1,134 @@
+from utils import *
+
+class VolumePrefetcher():
+    """
+    This class decodes the next cases of the remaining list in background
+    threads, so that loadPatient can build the volume node from memory
+    instead of waiting for the decompression of the volume file.
+    """
+
+    @enter_function
+    def __init__(self, depth=2, memory_cap_mb=2048, max_workers=2,
+                 volume_cache=None):
+        """
+        __init__
+
+        Args:
+            depth: number of cases to decode in advance.
+            memory_cap_mb: maximum memory used by decoded volumes (in MB).
+            max_workers: number of decoding threads.
+            volume_cache: VolumeCache read before decoding and filled with
+                          the decoded volumes (None if disabled).
+        """
+        self.depth = depth
+        self.volume_cache = volume_cache
+        self.memory_cap = memory_cap_mb * 1024 * 1024
+        self.mutex = RLock()
+        # Ordered by priority: path -> Future of (array, affine) or None
+        self.futures = OrderedDict()
+        # Memory reserved by each path being decoded or decoded (bytes)
+        self.reserved_bytes = {}
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix='SlicerCARTPrefetch')
+
+    @enter_function
+    def prefetch(self, paths):
+        """
+        Schedule the decoding of the next cases. Any previously scheduled
+        case that is not in paths anymore is dropped.
+        :param paths: list of volume paths, by order of priority.
+        """
+        paths = paths[:self.depth]
+
+        with self.mutex:
+            for path in list(self.futures):
+                if path not in paths:
+                    self.drop(path)
+
+            for path in paths:
+                if path not in self.futures:
+                    self.futures[path] = self.executor.submit(self.decode,
+                                                              path)
+
+    def decode(self, path):
+        """
+        Decode a volume in a worker thread if the memory cap allows it. Not
+        decorated with enter_function: called from the prefetch threads.
+        :return: tuple (array, affine) or None.
+        """
+        estimated_bytes = VolumeIO.estimate_volume_nbytes(self, path)
+
+        with self.mutex:
+            if (sum(self.reserved_bytes.values()) + estimated_bytes
+                    > self.memory_cap):
+                # Skipped: loadPatient reads the file itself.
+                return None
+            self.reserved_bytes[path] = estimated_bytes
+
+        try:
+            volume = None
+            if self.volume_cache is not None:
+                volume = self.volume_cache.get(path)
+            if volume is None:
+                volume = VolumeIO.read_volume_array(self, path)
+                if volume is not None and self.volume_cache is not None:
+                    self.volume_cache.put(path, *volume)
+        except Exception as e:
+            print(f'Prefetch failed for {path}: {e}')
+            volume = None
+
+        with self.mutex:
+            if volume is None or path not in self.futures:
+                # Failed or dropped while decoding.
+                self.reserved_bytes.pop(path, None)
+                return None
+            self.reserved_bytes[path] = volume[0].nbytes
+
+        return volume
+
+    @enter_function
+    def pop(self, path):
+        """
+        Get a decoded volume and release it from the prefetcher. If the
+        volume is currently being decoded, wait for it (it is faster than
+        restarting the decoding from scratch).
+        :return: tuple (array, affine) or None if not prefetched.
+        """
+        with self.mutex:
+            future = self.futures.get(path)
+            if future is None:
+                return None
+            if future.cancel():
+                # Not started yet: the caller loads the file itself.
+                self.futures.pop(path)
+                return None
+
+        volume = future.result()
+
+        with self.mutex:
+            self.futures.pop(path, None)
+            self.reserved_bytes.pop(path, None)
+
+        return volume
+
+    @enter_function
+    def drop(self, path):
+        """
+        Forget a scheduled or decoded case.
+        """
+        with self.mutex:
+            future = self.futures.pop(path, None)
+            if future is not None:
+                future.cancel()
+            self.reserved_bytes.pop(path, None)
+
+    @enter_function
+    def shutdown(self):
+        """
+        Stop the decoding threads and release all decoded volumes.
+        """
+        with self.mutex:
+            for path in list(self.futures):
+                self.drop(path)
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -26,12 +26,22 @@ class WorkFiles():
         self.output_folder_files = os.listdir(self.outputFolder)
 
         self.all_cases_path = WorkFiles.get_working_list(self)
-        self.all_cases_path = WorkFiles.filter_working_list(self,
-                                                            self.all_cases_path)
 
         self.all_cases_filenames = (
             self.get_filenames_in_working_list(self.all_cases_path))
 
+        # Index of the volume paths by filename: O(1) path resolution.
+        self.path_by_filename, self.duplicated_filenames = (
+            self.build_filename_index(self.all_cases_path))
+        if self.duplicated_filenames:
+            self.report_duplicated_filenames()
+
+        # In-memory working list and remaining list (avoids re-reading the
+        # yaml files at each navigation step).
+        self.registry = CaseRegistry(self.working_list_filepath,
+                                     self.remaining_list_filepath,
+                                     self.path_by_filename)
+
     @enter_function
     def check_working_list(self):
         """
@@ -130,29 +140,57 @@ class WorkFiles():
     @enter_function
     def get_working_list(self):
         """
-        Get all files that have the correct file extension from volumes folder.
+        Get all files that have the correct file extension from volumes folder
+        (the derivatives folders are excluded during the discovery).
         """
-        self.CasesPaths = sorted(glob(f'{self.CurrentFolder}'
-                                      f'{os.sep}*'
-                                      f'*{os.sep}'
-                                      f'{ConfigPath.INPUT_FILE_EXTENSION}',
-                                           recursive=True))
+        self.CasesPaths = CaseDiscovery(self.CurrentFolder,
+                                        ConfigPath.INPUT_FILE_EXTENSION,
+                                        self.outputFolder).discover()
         return self.CasesPaths
 
     @enter_function
-    def filter_working_list(self, working_list):
+    def build_filename_index(self, all_cases_path, get_key=os.path.basename):
+        """
+        Build the index of the volume paths by filename. A filename found in
+        several folders cannot be resolved unambiguously: the first path
+        (sorted order) is kept and the others are reported as duplicates.
+        :param all_cases_path: list of volume paths.
+        :param get_key: function giving the key of a path in the index (by
+                        default, the filename; e.g. the filename without
+                        extension to match files of other types).
+        :return: tuple (dictionary filename -> path, dictionary filename ->
+        list of all paths of duplicated filenames).
+        """
+        path_by_filename = {}
+        duplicated_filenames = {}
+        for path in sorted(all_cases_path):
+            filename = get_key(path)
+            if filename in path_by_filename:
+                duplicated_filenames.setdefault(
+                    filename, [path_by_filename[filename]]).append(path)
+            else:
+                path_by_filename[filename] = path
+        return path_by_filename, duplicated_filenames
+
+    @enter_function
+    def report_duplicated_filenames(self):
         """
-        Filter all files that have the correct working list configuration.
-        Can use elif to build up and handle different inclusion criteria.
+        Warn the user that some filenames are found in several folders of
+        the volumes folder.
         """
-        # ToDo: see issue 118
-        filtered_list = []
-        for element in working_list:
-            if 'derivatives' in element:
-                continue
-            else:
-                filtered_list.append(element)
-        return filtered_list
+        lines = []
+        for filename, paths in list(self.duplicated_filenames.items())[:10]:
+            lines.append(f'{filename}:\n' + '\n'.join(paths))
+        if len(self.duplicated_filenames) > 10:
+            lines.append('...')
+
+        print('Duplicated filenames in volumes folder:',
+              self.duplicated_filenames)
+        message = ('SOME FILENAMES ARE FOUND IN SEVERAL FOLDERS OF THE VOLUMES '
+                   'FOLDER.\n'
+                   'Only the first path of each filename is used:\n\n'
+                   + '\n\n'.join(lines))
+        Dev.show_message_box(self, message, box_title='ATTENTION!')
 
     @enter_function
     def get_filenames_in_working_list(self, all_cases_path):
@@ -250,26 +288,25 @@ class WorkFiles():
         """
 
         if ConfigPath.REMAINING_LIST_FILENAME in self.output_folder_files:
-            with open(self.remaining_list_filepath, 'r') as file:
-                elements = yaml.safe_load(file)['CASES']
-                if WorkFiles.check_remaining_first_element(self, elements):
-                    first_element = elements[0]
+            elements = WorkFiles.get_remaining_list_filenames(self)
+            if WorkFiles.check_remaining_first_element(self, elements):
+                first_element = elements[0]
+            else:
+                Debug.print(self, 'First element in remaining list is '
+                                  'none.')
+                if len(elements) > 1:
+                    message = (' !!! PROBLEM !!! Remaining list might be '
+                               'corrupted. Please double check.')
+                    Debug.print(self, message)
+                    # Dev.show_message_box(self, message,
+                    #                      box_title='ATTENTION!')
+                    pass
+                    return False
                 else:
-                    Debug.print(self, 'First element in remaining list is '
-                                      'none.')
-                    if len(elements) > 1:
-                        message = (' !!! PROBLEM !!! Remaining list might be '
-                                   'corrupted. Please double check.')
-                        Debug.print(self, message)
-                        # Dev.show_message_box(self, message,
-                        #                      box_title='ATTENTION!')
-                        pass
-                        return False
-                    else:
-                        Debug.print(self, 'Remaining list is empty, but this '
-                                          'is ok for now.')
-                        pass
-                        return True
+                    Debug.print(self, 'Remaining list is empty, but this '
+                                      'is ok for now.')
+                    pass
+                    return True
 
             # Check if first element of remaining list is in working list
             # before looping (optimize performance).
@@ -334,6 +371,12 @@ class WorkFiles():
         with open(filepath, 'w') as file:
             yaml.dump(all_cases_data, file)
 
+        # Keep the in-memory lists consistent with the files. A journal of
+        # the remaining list refers to the previous content of the file.
+        if filepath == self.remaining_list_filepath:
+            self.registry.discard_journal()
+        self.registry.reload()
+
     @enter_function
     def check_working_list_in_volumes(self, all_cases_filenames):
         """
@@ -367,42 +410,32 @@ class WorkFiles():
         """
         Get all filenames from the working list.
         """
-        with open(self.working_list_filepath, 'r') as file:
-            working_list_filenames = yaml.safe_load(file)['CASES']
-            return working_list_filenames
+        return list(self.registry.working_list)
 
     @enter_function
     def get_remaining_list_filenames(self):
         """
         Get all filenames from the remaining list.
         """
-        with open(self.remaining_list_filepath, 'r') as file:
-            remaining_list_filenames = yaml.safe_load(file)['CASES']
-            return remaining_list_filenames
+        return self.registry.get_remaining_list()
 
     @enter_function
     def get_working_list_filepaths(self, working_list_filenames):
         """
         Get all working list filepaths.
         """
-        filenames_path = []
-        for element in working_list_filenames:
-            for path in self.all_cases_path:
-                if element in path:
-                    filenames_path.append(path)
-        return filenames_path
+        return [self.path_by_filename[element]
+                for element in working_list_filenames
+                if element in self.path_by_filename]
 
     @enter_function
     def get_remaining_list_filepaths(self, remaining_list_filenames):
         """
         Get all remaining list filepaths.
         """
-        filenames_path = []
-        for element in remaining_list_filenames:
-            for path in self.all_cases_path:
-                if element in path:
-                    filenames_path.append(path)
-        return filenames_path
+        return [self.path_by_filename[element]
+                for element in remaining_list_filenames
+                if element in self.path_by_filename]
 
     @enter_function
     def check_remaining_first_element(self, remaining_list):
@@ -435,19 +468,64 @@ class WorkFiles():
     @enter_function
     def find_path_from_filename(self, filename):
         """
-        Find path from a filename.
+        Find path from a filename (None if not in the volumes folder).
         """
-        for filepath in self.all_cases_path:
-            if filename in filepath:
-                return filepath
+        return self.path_by_filename.get(filename)
 
     @enter_function
     def adjust_remaining_list(self, filename):
         """
         Adjust the remaining list by removing a specific filename.
         """
-        remaining_list_filenames = WorkFiles.get_remaining_list_filenames(self)
-        remaining_list_filenames.remove(filename)
+        self.registry.remove_remaining(filename)
+
+    @enter_function
+    def restore_remaining_list(self, filename):
+        """
+        Put a filename back into the remaining list (e.g. after a failed
+        save).
+        """
+        self.registry.restore_remaining(filename)
+
+    @enter_function
+    def find_working_list_index(self, filename):
+        """
+        Find the index of a filename in the working list (None if absent).
+        """
+        return self.registry.get_working_index(filename)
+
+    @enter_function
+    def is_in_remaining_list(self, filename):
+        """
+        Check if a filename is in the remaining list.
+        """
+        return self.registry.is_remaining(filename)
 
-        WorkFiles.write_file_list(self, self.remaining_list_filepath,
-                                  remaining_list_filenames)
+    @enter_function
+    def get_remaining_list_count(self):
+        """
+        Get the number of cases in the remaining list.
+        """
+        return self.registry.get_remaining_count()
+
+    @enter_function
+    def get_first_remaining_filename(self):
+        """
+        Get the first filename of the remaining list (None if empty).
+        """
+        return self.registry.get_first_remaining()
+
+    @enter_function
+    def get_next_remaining_filenames(self, filename, number=1):
+        """
+        Get the filenames following a filename in the remaining list (the
+        first filenames of the remaining list if filename is not in it).
+        """
+        return self.registry.get_next_remaining(filename, number)
+
+    @enter_function
+    def save_remaining_list(self):
+        """
+        Write the remaining list file from memory (compacts the journal).
+        """
+        self.registry.compact()
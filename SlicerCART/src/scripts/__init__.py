@@ -8,4 +8,7 @@ from .ShowSegmentVersionLegendWindow import *
 from .SlicerCARTLogic import *
 from .SlicerCARTTest import *
 from .Timer import *
-from .WorkFiles import *
\ No newline at end of file
+from .WorkFiles import *
+from .VolumePrefetcher import *
+from .SegmentationWriter import *
+from .BatchRunner import *
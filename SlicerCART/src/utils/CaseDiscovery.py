@@ -0,0 +1,172 @@
+from utils.requirements import *
+from utils.constants import *
+from utils.debugging_helpers import *
+
+# Manifests of the volumes folders already discovered in this session, by
+# (volumes folder, file pattern). Allows incremental discovery even when no
+# output folder (hence no manifest file) is selected yet.
+SESSION_MANIFESTS = {}
+
+
+class CaseDiscovery():
+    """
+    This class finds the volumes of the volumes folder. Directories are
+    listed with os.scandir across a thread pool, and the folders named
+    'derivatives' are skipped during the walk. The result is saved as a
+    manifest (path, size and modification time of each volume, by
+    directory) in the _conf folder of the output folder; later discoveries
+    only list again the directories whose modification time changed.
+    """
+
+    @enter_function
+    def __init__(self, volumes_folder, pattern, output_folder=None,
+                 max_workers=8):
+        """
+        __init__
+
+        Args:
+            volumes_folder: folder to search.
+            pattern: filename pattern of the volumes (e.g. '*.nii.gz').
+            output_folder: output folder where the manifest is saved (None
+                           keeps the manifest in memory only).
+            max_workers: number of threads listing directories.
+        """
+        self.volumes_folder = volumes_folder
+        self.pattern = pattern
+        self.max_workers = max_workers
+        self.manifest_path = None
+        if output_folder is not None:
+            self.manifest_path = os.path.join(output_folder, CONF_FOLDER_NAME,
+                                              CASE_MANIFEST_FILENAME)
+        self.previous = self.load_manifest()
+
+    @enter_function
+    def load_manifest(self):
+        """
+        Get the directories entries of the last discovery of the same
+        folder with the same pattern (empty if none).
+        :return: dictionary with keys 'scanned_at' and 'directories'.
+        """
+        key = (self.volumes_folder, self.pattern)
+        manifest = SESSION_MANIFESTS.get(key)
+
+        if (manifest is None and self.manifest_path is not None
+                and os.path.exists(self.manifest_path)):
+            try:
+                with open(self.manifest_path, 'r') as file:
+                    content = json.load(file)
+                if (content.get('volumes_folder') == self.volumes_folder
+                        and content.get('pattern') == self.pattern):
+                    manifest = content
+            except (OSError, ValueError) as e:
+                print(f'Case manifest ignored ({self.manifest_path}): {e}')
+
+        if manifest is None:
+            return {'scanned_at': 0, 'directories': {}}
+        return manifest
+
+    @enter_function
+    def save_manifest(self, manifest):
+        """
+        Keep the manifest for the session and write it in the _conf folder
+        of the output folder (if any).
+        """
+        SESSION_MANIFESTS[(self.volumes_folder, self.pattern)] = manifest
+
+        if self.manifest_path is None:
+            return
+
+        manifest_to_save = dict(manifest, volumes_folder=self.volumes_folder,
+                                pattern=self.pattern)
+        temp_path = f'{self.manifest_path}.tmp'
+        try:
+            os.makedirs(os.path.dirname(self.manifest_path), exist_ok=True)
+            with open(temp_path, 'w') as file:
+                json.dump(manifest_to_save, file)
+            os.replace(temp_path, self.manifest_path)
+        except OSError as e:
+            print(f'Case manifest not saved ({self.manifest_path}): {e}')
+
+    @enter_function
+    def discover(self):
+        """
+        Find all volumes of the volumes folder matching the pattern (same
+        result as a recursive glob without the derivatives folders).
+        :return: sorted list of volume paths.
+        """
+        scanned_at = time.time_ns()
+        directories = {}
+
+        with ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix='SlicerCARTDiscovery') as executor:
+            pending = {executor.submit(self.scan_directory, '')}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    relative_path, entry = future.result()
+                    if entry is None:
+                        continue
+                    directories[relative_path] = entry
+                    for name in entry['dirs']:
+                        pending.add(executor.submit(
+                            self.scan_directory,
+                            os.path.join(relative_path, name)))
+
+        self.save_manifest({'scanned_at': scanned_at,
+                            'directories': directories})
+
+        paths = []
+        for relative_path, entry in directories.items():
+            for name, size, mtime in entry['files']:
+                paths.append(os.path.join(self.volumes_folder, relative_path,
+                                          name))
+        return sorted(paths)
+
+    def scan_directory(self, relative_path):
+        """
+        List one directory, unless it did not change since the last
+        discovery. Not decorated with enter_function: called from the
+        discovery threads for each directory.
+        :param relative_path: path relative to the volumes folder ('' for
+                              the volumes folder itself).
+        :return: tuple (relative_path, entry) where entry is a dictionary
+        with the modification time of the directory, its subdirectories
+        names and its volumes as [name, size, mtime] (None if the directory
+        cannot be read).
+        """
+        path = os.path.join(self.volumes_folder, relative_path)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return relative_path, None
+
+        previous_entry = self.previous['directories'].get(relative_path)
+        if (previous_entry is not None
+                and previous_entry['mtime'] == mtime
+                and mtime < (self.previous['scanned_at']
+                             - CASE_MANIFEST_SAFETY_DELAY_NS)):
+            return relative_path, previous_entry
+
+        dirs = []
+        files = []
+        try:
+            with os.scandir(path) as entries:
+                for element in entries:
+                    # Hidden files are skipped, as glob does.
+                    # ToDo: see issue 118 for other inclusion criteria.
+                    if (element.name.startswith('.')
+                            or 'derivatives' in element.name):
+                        continue
+                    if element.is_dir():
+                        dirs.append(element.name)
+                    elif element.is_file() and fnmatch(element.name,
+                                                       self.pattern):
+                        stat = element.stat()
+                        files.append([element.name, stat.st_size,
+                                      stat.st_mtime_ns])
+        except OSError as e:
+            print(f'Cannot list {path}: {e}')
+            return relative_path, None
+
+        return relative_path, {'mtime': mtime, 'dirs': dirs, 'files': files}
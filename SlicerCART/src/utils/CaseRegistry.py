@@ -0,0 +1,271 @@
+from utils.requirements import *
+from utils.constants import *
+from utils.debugging_helpers import *
+
+class CaseRegistry():
+    """
+    This class keeps the working list and the remaining list in memory so
+    that navigating between cases does not re-read the yaml files. The
+    files are read once; removals from the remaining list are persisted in
+    an append-only journal next to the remaining list file, which is
+    periodically compacted into the remaining list file.
+    """
+
+    @enter_function
+    def __init__(self, working_list_filepath, remaining_list_filepath,
+                 path_by_filename):
+        """
+        __init__
+
+        Args:
+            working_list_filepath: path of the working list yaml file.
+            remaining_list_filepath: path of the remaining list yaml file.
+            path_by_filename: dictionary of volume paths by filename.
+        """
+        self.working_list_filepath = working_list_filepath
+        self.remaining_list_filepath = remaining_list_filepath
+        self.journal_filepath = (f'{remaining_list_filepath}'
+                                 f'{CASE_REGISTRY_JOURNAL_EXTENSION}')
+
+        self.path_by_filename = path_by_filename
+
+        self.reload()
+
+        # Any journal left by a previous session is merged right away so
+        # that the remaining list file is up to date.
+        if self.journal_count > 0:
+            self.compact()
+
+    @enter_function
+    def reload(self):
+        """
+        Read the working list and remaining list files and replay the
+        journal of the remaining list.
+        """
+        self.working_list = self.read_file_list(self.working_list_filepath)
+        self.index_by_filename = {
+            filename: index for index, filename in enumerate(
+                self.working_list)}
+
+        # The remaining list is an ordered set implemented as a doubly
+        # linked list, so that removing a case and getting the next case
+        # are O(1).
+        self.next_remaining = {}
+        self.previous_remaining = {}
+        self.first_remaining = None
+        self.last_remaining = None
+        for filename in self.read_file_list(self.remaining_list_filepath):
+            self.append_remaining(filename)
+
+        self.journal_count = 0
+        if os.path.exists(self.journal_filepath):
+            with open(self.journal_filepath, 'r') as file:
+                for line in file:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Partially written last line (e.g. crash).
+                        continue
+                    self.unlink_remaining(entry['remove'])
+                    self.journal_count += 1
+
+    @enter_function
+    def read_file_list(self, filepath):
+        """
+        Read the filenames of a working/remaining list yaml file.
+        """
+        if not os.path.exists(filepath):
+            return []
+        with open(filepath, 'r') as file:
+            content = yaml.safe_load(file)
+        if not content or not content.get('CASES'):
+            return []
+        return content['CASES']
+
+    @enter_function
+    def append_remaining(self, filename):
+        """
+        Add a filename at the end of the remaining list (in memory only).
+        """
+        if filename in self.next_remaining:
+            return
+        self.next_remaining[filename] = None
+        self.previous_remaining[filename] = self.last_remaining
+        if self.last_remaining is None:
+            self.first_remaining = filename
+        else:
+            self.next_remaining[self.last_remaining] = filename
+        self.last_remaining = filename
+
+    @enter_function
+    def unlink_remaining(self, filename):
+        """
+        Remove a filename from the remaining list (in memory only).
+        """
+        if filename not in self.next_remaining:
+            return False
+
+        next_filename = self.next_remaining.pop(filename)
+        previous_filename = self.previous_remaining.pop(filename)
+
+        if previous_filename is None:
+            self.first_remaining = next_filename
+        else:
+            self.next_remaining[previous_filename] = next_filename
+
+        if next_filename is None:
+            self.last_remaining = previous_filename
+        else:
+            self.previous_remaining[next_filename] = previous_filename
+
+        return True
+
+    @enter_function
+    def remove_remaining(self, filename):
+        """
+        Remove a filename from the remaining list and persist the removal
+        in the journal.
+        """
+        if not self.unlink_remaining(filename):
+            return
+
+        with open(self.journal_filepath, 'a') as file:
+            file.write(json.dumps({'remove': filename}) + '\n')
+            file.flush()
+            os.fsync(file.fileno())
+        self.journal_count += 1
+
+        if self.journal_count >= CASE_REGISTRY_COMPACT_INTERVAL:
+            self.compact()
+
+    @enter_function
+    def restore_remaining(self, filename):
+        """
+        Put a filename back into the remaining list, at its working list
+        position (e.g. when the save of the case failed), and persist the
+        remaining list.
+        """
+        index = self.index_by_filename.get(filename)
+        if index is None or filename in self.next_remaining:
+            return
+
+        # First remaining filename after it in the working list.
+        next_filename = None
+        for other_filename in self.working_list[index + 1:]:
+            if other_filename in self.next_remaining:
+                next_filename = other_filename
+                break
+
+        if next_filename is None:
+            self.append_remaining(filename)
+        else:
+            previous_filename = self.previous_remaining[next_filename]
+            self.next_remaining[filename] = next_filename
+            self.previous_remaining[filename] = previous_filename
+            self.previous_remaining[next_filename] = filename
+            if previous_filename is None:
+                self.first_remaining = filename
+            else:
+                self.next_remaining[previous_filename] = filename
+
+        # The journal only records removals.
+        self.compact()
+
+    @enter_function
+    def compact(self):
+        """
+        Write the remaining list file from memory and clear the journal.
+        """
+        if not os.path.exists(os.path.dirname(self.remaining_list_filepath)):
+            return
+
+        # Write to a temporary file first so that a crash never leaves a
+        # truncated remaining list behind.
+        temp_filepath = f'{self.remaining_list_filepath}.tmp'
+        with open(temp_filepath, 'w') as file:
+            yaml.dump({'CASES': self.get_remaining_list()}, file)
+        os.replace(temp_filepath, self.remaining_list_filepath)
+
+        if os.path.exists(self.journal_filepath):
+            os.remove(self.journal_filepath)
+        self.journal_count = 0
+
+    @enter_function
+    def discard_journal(self):
+        """
+        Delete the journal, e.g. when the remaining list file is overwritten.
+        """
+        if os.path.exists(self.journal_filepath):
+            os.remove(self.journal_filepath)
+        self.journal_count = 0
+
+    @enter_function
+    def get_remaining_list(self):
+        """
+        Get the remaining list filenames, in order.
+        """
+        remaining_list = []
+        filename = self.first_remaining
+        while filename is not None:
+            remaining_list.append(filename)
+            filename = self.next_remaining[filename]
+        return remaining_list
+
+    @enter_function
+    def get_remaining_count(self):
+        """
+        Get the number of cases in the remaining list.
+        """
+        return len(self.next_remaining)
+
+    @enter_function
+    def is_remaining(self, filename):
+        """
+        Check if a filename is in the remaining list.
+        """
+        return filename in self.next_remaining
+
+    @enter_function
+    def get_first_remaining(self):
+        """
+        Get the first filename of the remaining list (None if empty).
+        """
+        return self.first_remaining
+
+    @enter_function
+    def get_next_remaining(self, filename, number=1):
+        """
+        Get the filenames following a filename in the remaining list. If
+        the filename is not in the remaining list, the first filenames of
+        the remaining list are returned.
+        :param filename: filename of reference.
+        :param number: maximum number of filenames to return.
+        :return: list of filenames.
+        """
+        if filename in self.next_remaining:
+            next_filename = self.next_remaining[filename]
+        else:
+            next_filename = self.first_remaining
+
+        next_filenames = []
+        while next_filename is not None and len(next_filenames) < number:
+            next_filenames.append(next_filename)
+            next_filename = self.next_remaining[next_filename]
+        return next_filenames
+
+    @enter_function
+    def get_working_index(self, filename):
+        """
+        Get the index of a filename in the working list (None if absent).
+        """
+        return self.index_by_filename.get(filename)
+
+    @enter_function
+    def get_path(self, filename):
+        """
+        Get the volume path of a filename (None if absent).
+        """
+        return self.path_by_filename.get(filename)
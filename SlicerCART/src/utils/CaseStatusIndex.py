@@ -0,0 +1,195 @@
+from utils.requirements import *
+from utils.constants import *
+from utils.debugging_helpers import *
+from utils.SegmentationLedger import *
+
+# Segmentation status of a case for the current annotator (same values as
+# the colors of the UI case list).
+STATUS_NOT_DONE = 0
+STATUS_DONE_BY_ANOTHER_ANNOTATOR = 1
+STATUS_DONE_BY_THIS_ANNOTATOR = 2
+
+
+class CaseStatusIndex():
+    """
+    This class keeps, for each case, the annotators who saved a
+    segmentation and the latest segmentation version, so that the UI case
+    list colors do not require to read all the segmentation information
+    ledgers. The index is saved in the _conf folder of the output folder
+    with the modification time and size of each segmentation information
+    file: refresh only parses the files that changed since the last
+    refresh.
+    """
+
+    @enter_function
+    def __init__(self, output_folder, volumes_folder):
+        """
+        __init__
+
+        Args:
+            output_folder: selected output folder.
+            volumes_folder: selected volumes folder.
+        """
+        self.output_folder = output_folder
+        self.volumes_folder = volumes_folder
+        self.index_path = os.path.join(output_folder, CONF_FOLDER_NAME,
+                                       CASE_STATUS_INDEX_FILENAME)
+        self.mutex = RLock()
+        # Case filename -> {'annotators': [...], 'latest_version': 'vXX' or
+        # None, 'mtime': ..., 'size': ...} (mtime and size of the
+        # segmentation information file).
+        self.cases = self.load()
+
+    @enter_function
+    def load(self):
+        """
+        Read the saved index (empty if none or unreadable).
+        """
+        if not os.path.exists(self.index_path):
+            return {}
+        try:
+            with open(self.index_path, 'r') as file:
+                return json.load(file)
+        except (OSError, ValueError) as e:
+            print(f'Case status index ignored ({self.index_path}): {e}')
+            return {}
+
+    @enter_function
+    def save(self):
+        """
+        Write the index in the _conf folder of the output folder.
+        """
+        temp_path = f'{self.index_path}.tmp'
+        with self.mutex:
+            try:
+                os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+                with open(temp_path, 'w') as file:
+                    json.dump(self.cases, file)
+                os.replace(temp_path, self.index_path)
+            except OSError as e:
+                print(f'Case status index not saved ({self.index_path}): {e}')
+
+    def get_information_path(self, case_path):
+        """
+        Get the path of the segmentation information ledger of a case (same
+        output path as updateCurrentOutputPathAndCurrentVolumeFilename). Not
+        decorated with enter_function: called for each case.
+        :param case_path: path of the volume of the case.
+        """
+        relative_path = case_path[len(self.volumes_folder):]
+        output_path, filename = os.path.split(self.output_folder
+                                              + relative_path)
+        return os.path.join(
+            output_path,
+            f'{filename.split(".")[0]}{SEGMENTATION_LEDGER_SUFFIX}')
+
+    @enter_function
+    def refresh(self, cases_paths, max_workers=8):
+        """
+        Update the index from the segmentation information files. Only the
+        files whose modification time or size changed are parsed.
+        :param cases_paths: paths of the volumes of the working list.
+        :param max_workers: number of threads checking the files.
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            entries = list(executor.map(self.refresh_case, cases_paths))
+
+        with self.mutex:
+            self.cases = {os.path.basename(case_path): entry
+                          for case_path, entry in zip(cases_paths, entries)
+                          if entry is not None}
+        self.save()
+
+    def refresh_case(self, case_path):
+        """
+        Get the up-to-date index entry of one case. Not decorated with
+        enter_function: called from the refresh threads for each case.
+        :return: index entry or None if nothing was saved for the case.
+        """
+        case = os.path.basename(case_path)
+        ledger = SegmentationLedger(self.get_information_path(case_path))
+        # Legacy csv file if the ledger does not exist yet.
+        try:
+            stat = os.stat(ledger.ledger_path)
+        except OSError:
+            try:
+                stat = os.stat(ledger.csv_path)
+            except OSError:
+                return None
+
+        entry = self.cases.get(case)
+        if (entry is not None and entry['mtime'] == stat.st_mtime_ns
+                and entry['size'] == stat.st_size):
+            return entry
+
+        annotators = []
+        latest_version = None
+        try:
+            for record in ledger.read_records():
+                if record.get('Volume filename') != case:
+                    continue
+                annotator = record.get('Annotator Name')
+                if annotator and annotator not in annotators:
+                    annotators.append(annotator)
+                latest_version = self.get_latest_version(
+                    latest_version, record.get('Segmentation version'))
+        except (OSError, csv.Error) as e:
+            print(f'Cannot read {ledger.ledger_path}: {e}')
+            return None
+
+        return {'annotators': annotators, 'latest_version': latest_version,
+                'mtime': stat.st_mtime_ns, 'size': stat.st_size}
+
+    @enter_function
+    def record_save(self, case, annotator, version, information_path):
+        """
+        Update the index after a segmentation has been saved.
+        :param case: volume filename of the case.
+        :param annotator: name of the annotator who saved.
+        :param version: saved segmentation version (e.g. 'v02').
+        :param information_path: segmentation information ledger of the
+                                 case.
+        """
+        stat = os.stat(information_path)
+        with self.mutex:
+            entry = self.cases.setdefault(
+                case, {'annotators': [], 'latest_version': None})
+            if annotator not in entry['annotators']:
+                entry['annotators'].append(annotator)
+            entry['latest_version'] = self.get_latest_version(
+                entry['latest_version'], version)
+            entry['mtime'] = stat.st_mtime_ns
+            entry['size'] = stat.st_size
+        self.save()
+
+    def get_latest_version(self, version, other_version):
+        """
+        Get the most recent of two versions ('vXX' strings or None).
+        """
+        if not other_version or not other_version[1:].isdigit():
+            return version
+        if not version or int(other_version[1:]) > int(version[1:]):
+            return other_version
+        return version
+
+    def get_status(self, case, annotator):
+        """
+        Get the segmentation status of a case for an annotator.
+        :return: STATUS_NOT_DONE, STATUS_DONE_BY_ANOTHER_ANNOTATOR or
+        STATUS_DONE_BY_THIS_ANNOTATOR.
+        """
+        entry = self.cases.get(case)
+        if entry is None or not entry['annotators']:
+            return STATUS_NOT_DONE
+        if annotator in entry['annotators']:
+            return STATUS_DONE_BY_THIS_ANNOTATOR
+        return STATUS_DONE_BY_ANOTHER_ANNOTATOR
+
+    def get_latest_segmentation_version(self, case):
+        """
+        Get the latest saved segmentation version of a case (None if none).
+        """
+        entry = self.cases.get(case)
+        if entry is None:
+            return None
+        return entry['latest_version']
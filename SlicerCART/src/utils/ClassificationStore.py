@@ -0,0 +1,214 @@
+from utils.requirements import *
+from utils.constants import *
+from utils.debugging_helpers import *
+
+# Header of the classification label columns of the classification
+# information files (e.g. "{'ICH_checkbox': 'checkboxes'}").
+CLASSIFICATION_COLUMN_PATTERN = re.compile(
+    r"^\{'(?P<name>.+)': '(?P<kind>checkboxes|comboboxes|freetextboxes)'\}$")
+
+
+class ClassificationStore():
+    """
+    This class manages the classification information file of a case
+    (<volume filename>_ClassificationInformation.csv, one row per saved
+    classification version). The column schema of the file (label name,
+    kind and combobox versions of each column) and the latest version are
+    kept in a sidecar file checked against the modification time and size
+    of the csv file, so that saving a classification does not parse the
+    file. A classification with the columns of the file is appended as a
+    single csv line; the file is rewritten only when columns are added.
+    Columns missing from a row are marked with CLASSIFICATION_REMOVED_MARK
+    (label added or removed from the configuration).
+    """
+
+    @enter_function
+    def __init__(self, information_path):
+        """
+        __init__
+
+        Args:
+            information_path: path of the classification information file.
+        """
+        self.information_path = information_path
+        self.schema_path = (
+            information_path[:-len(CLASSIFICATION_INFORMATION_SUFFIX)]
+            + CLASSIFICATION_SCHEMA_SUFFIX)
+
+    def parse_column(self, column):
+        """
+        Get the label name and kind of a column header.
+        :return: tuple (name, kind) where kind is None for the columns that
+        are not classification labels (e.g. 'Annotator Name').
+        """
+        match = CLASSIFICATION_COLUMN_PATTERN.match(column)
+        if match is None:
+            return column, None
+        return match.group('name'), match.group('kind')
+
+    def format_column(self, name, kind):
+        """
+        Get the column header of a classification label.
+        """
+        return f"{{'{name}': '{kind}'}}"
+
+    def get_file_state(self):
+        """
+        Get the modification time and size of the csv file (None if it does
+        not exist).
+        """
+        try:
+            stat = os.stat(self.information_path)
+        except OSError:
+            return None
+        return [stat.st_mtime_ns, stat.st_size]
+
+    def read_schema(self):
+        """
+        Get the schema of the csv file: from the sidecar if it is up to date,
+        otherwise from the csv file (the sidecar is then rewritten). Not
+        decorated with enter_function: also called from the threads of
+        SlicerCARTLogic.export_classifications.
+        :return: dictionary with the 'columns' (list of dictionaries with the
+        column header, name, kind and combobox versions), the
+        'file_columns' (headers of the csv file), the number of 'rows' and
+        the 'latest_version' number (0 if no classification was saved).
+        """
+        file_state = self.get_file_state()
+        if file_state is None:
+            return {'columns': [], 'file_columns': [], 'rows': 0,
+                    'latest_version': 0}
+
+        try:
+            with open(self.schema_path, 'r') as file:
+                schema = json.load(file)
+            if schema.get('file_state') == file_state:
+                return schema
+        except (OSError, ValueError):
+            pass
+
+        df = pd.read_csv(self.information_path, dtype=str,
+                         keep_default_na=False)
+        schema = {'columns': [], 'file_columns': list(df.columns),
+                  'rows': df.shape[0], 'latest_version': 0}
+        for column in df.columns:
+            name, kind = self.parse_column(column)
+            combobox_versions = []
+            if kind == 'comboboxes' and 'Combobox version' in df.columns:
+                combobox_versions = sorted(set(
+                    df.loc[df[column] != CLASSIFICATION_REMOVED_MARK,
+                           'Combobox version']) - {''})
+            schema['columns'].append(
+                {'column': column, 'name': name, 'kind': kind,
+                 'combobox_versions': combobox_versions})
+        if 'Classification version' in df.columns:
+            numbers = [int(version[1:])
+                       for version in df['Classification version']
+                       if version[1:].isdigit()]
+            schema['latest_version'] = max(numbers, default=0)
+        self.write_schema(schema)
+        return schema
+
+    def write_schema(self, schema):
+        """
+        Replace the sidecar atomically, stamped with the state of the csv
+        file.
+        """
+        schema['file_state'] = self.get_file_state()
+        temp_path = f'{self.schema_path}.tmp'
+        try:
+            with open(temp_path, 'w') as file:
+                json.dump(schema, file)
+            os.replace(temp_path, self.schema_path)
+        except OSError as e:
+            print(f'Classification schema not saved ({self.schema_path}): '
+                  f'{e}')
+
+    @enter_function
+    def get_label_columns(self):
+        """
+        Get the classification label columns of the csv file.
+        :return: dictionary column header -> kind (e.g. 'checkboxes').
+        """
+        return {column['column']: column['kind']
+                for column in self.read_schema()['columns']
+                if column['kind'] is not None}
+
+    @enter_function
+    def get_next_version(self):
+        """
+        Get the version string of the next classification of the case.
+        """
+        return f"v{self.read_schema()['latest_version'] + 1:02d}"
+
+    @enter_function
+    def append(self, record, combobox_version):
+        """
+        Save a classification.
+        :param record: dictionary column header -> value, with the
+                       'Classification version' column.
+        :param combobox_version: combobox version of the comboboxes of the
+                                 record.
+        :return: tuple (saved row as a dictionary column header -> value,
+        index of the row in the csv file).
+        """
+        schema = self.read_schema()
+        known_columns = {column['column']: column
+                         for column in schema['columns']}
+        for column, value in record.items():
+            if column not in known_columns:
+                name, kind = self.parse_column(column)
+                known_columns[column] = {'column': column, 'name': name,
+                                         'kind': kind,
+                                         'combobox_versions': []}
+                schema['columns'].append(known_columns[column])
+            entry = known_columns[column]
+            if (entry['kind'] == 'comboboxes'
+                    and combobox_version not in entry['combobox_versions']):
+                entry['combobox_versions'].append(combobox_version)
+
+        columns = [column['column'] for column in schema['columns']]
+        row = {column: record.get(column, CLASSIFICATION_REMOVED_MARK)
+               for column in columns}
+
+        if (self.get_file_state() is not None
+                and columns == schema['file_columns']):
+            # Same columns as the file: append a line.
+            with open(self.information_path, 'a', newline='') as file:
+                csv.writer(file, lineterminator=os.linesep).writerow(
+                    row.values())
+        else:
+            df = pd.DataFrame(columns=columns)
+            if self.get_file_state() is not None:
+                df = pd.read_csv(self.information_path, dtype=str,
+                                 keep_default_na=False)
+                for column in columns:
+                    if column not in df.columns:
+                        df[column] = CLASSIFICATION_REMOVED_MARK
+            df = pd.concat([df[columns], pd.DataFrame([row])],
+                           ignore_index=True)
+            temp_path = f'{self.information_path}.tmp'
+            df.to_csv(temp_path, index=False)
+            os.replace(temp_path, self.information_path)
+
+        version = str(record.get('Classification version', ''))
+        if version[1:].isdigit():
+            schema['latest_version'] = max(schema['latest_version'],
+                                           int(version[1:]))
+        index = schema['rows']
+        schema['rows'] += 1
+        schema['file_columns'] = columns
+        self.write_schema(schema)
+        return row, index
+
+    def read_dataframe(self):
+        """
+        Read the classifications of the case. Values are read as strings
+        (empty values stay empty). Not decorated with enter_function: also
+        called from the threads of SlicerCARTLogic.export_classifications.
+        :return: dataframe (None if no classification was saved).
+        """
+        if self.get_file_state() is None:
+            return None
+        return pd.read_csv(self.information_path, dtype=str,
+                           keep_default_na=False)
@@ -1,13 +1,137 @@
 from utils.requirements import *
 from utils.constants import *
 from utils.debugging_helpers import *
+from utils.SessionState import *
+
+# Typed configuration values: attribute name -> (configuration key, type,
+# default value). Values without default are required. Defaults are used
+# since configuration files saved in output folders by previous versions do
+# not define the values added since.
+REQUIRED = object()
+CONFIG_VALUES = {
+    'IS_DISPLAY_TIMER_REQUESTED': ('is_display_timer_requested', bool,
+                                   REQUIRED),
+    'INPUT_FILE_EXTENSION': ('input_filetype', str, REQUIRED),
+    'DEFAULT_VOLUMES_DIRECTORY': ('default_volume_directory', str, REQUIRED),
+    'DEFAULT_SEGMENTATION_DIRECTORY': ('default_segmentation_directory', str,
+                                       REQUIRED),
+    'MODALITY': ('modality', str, REQUIRED),
+    'IS_CLASSIFICATION_REQUESTED': ('is_classification_requested', bool,
+                                    REQUIRED),
+    'IS_SEGMENTATION_REQUESTED': ('is_segmentation_requested', bool,
+                                  REQUIRED),
+    'IS_MOUSE_SHORTCUTS_REQUESTED': ('is_mouse_shortcuts_requested', bool,
+                                     REQUIRED),
+    'IS_KEYBOARD_SHORTCUTS_REQUESTED': ('is_keyboard_shortcuts_requested',
+                                        bool, REQUIRED),
+    'INTERPOLATE_VALUE': ('interpolate_value', bool, REQUIRED),
+    'REQUIRE_EMPTY': ('require_empty', bool, REQUIRED),
+    'ENABLE_DEBUG': ('enable_debug', bool, REQUIRED),
+    'WORKING_LIST_FILENAME': ('working_list_filename', str, REQUIRED),
+    'REMAINING_LIST_FILENAME': ('remaining_list_filename', str, REQUIRED),
+    'CT_WINDOW_WIDTH': ('ct_window_width', float, REQUIRED),
+    'CT_WINDOW_LEVEL': ('ct_window_level', float, REQUIRED),
+    'REQUIRE_VOLUME_DATA_HIERARCHY_BIDS_FORMAT': ('impose_bids_format', bool,
+                                                  REQUIRED),
+    'KEEP_WORKING_LIST': ('keep_working_list', bool, REQUIRED),
+    'SAVE_UINT8': ('save_uint8', bool, REQUIRED),
+    'PREFETCH_DEPTH': ('prefetch_depth', int, 2),
+    'PREFETCH_MEMORY_CAP_MB': ('prefetch_memory_cap_mb', int, 2048),
+    'IS_CASE_LIST_COLORS_REQUESTED': ('is_case_list_colors_requested', bool,
+                                      True),
+    'IS_GEOMETRY_VALIDATION_REQUESTED': ('is_geometry_validation_requested',
+                                         bool, True),
+    'METADATA_STORE': ('metadata_store', bool, False),
+    'PERSIST_SESSION_STATE': ('persist_session_state', bool, False),
+    'ENABLE_SPAN_PROFILER': ('enable_span_profiler', bool, False),
+    'VOLUME_CACHE_MB': ('volume_cache_mb', int, 0),
+    'VOLUME_CACHE_DIRECTORY': ('volume_cache_directory', str, ''),
+}
+
+
+class ConfigSnapshot():
+    """
+    Immutable content of a configuration file, read once: the typed values
+    of CONFIG_VALUES are attributes (e.g. snapshot.MODALITY), and the hash
+    of the content identifies the configuration (e.g. to detect that a
+    configuration changed). The snapshot of a file is valid as long as the
+    modification time and size of the file are unchanged (see is_current).
+    """
+
+    def __init__(self, content, path=None, file_state=None):
+        """
+        __init__
+
+        Args:
+            content: content of the configuration file (dictionary, copied).
+            path: path of the configuration file (None if the content does
+                  not come from a file).
+            file_state: modification time and size of the file when read.
+        """
+        values = {}
+        for name, (key, value_type, default) in CONFIG_VALUES.items():
+            if default is REQUIRED:
+                value = content[key]
+            else:
+                value = content.get(key, default)
+            values[name] = value if value is None else value_type(value)
+
+        object.__setattr__(self, 'path', path)
+        object.__setattr__(self, 'file_state', file_state)
+        object.__setattr__(self, 'content', copy.deepcopy(content))
+        object.__setattr__(self, 'hash', hashlib.sha1(json.dumps(
+            content, sort_keys=True, default=str).encode('utf-8')).hexdigest())
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('ConfigSnapshot is immutable.')
+
+    @staticmethod
+    def get_file_state(path):
+        """
+        Get the modification time and size of a file (None if it does not
+        exist).
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    @classmethod
+    def read(cls, path):
+        """
+        Read a configuration file.
+        :return: ConfigSnapshot of the file.
+        """
+        file_state = cls.get_file_state(path)
+        with open(path, 'r') as file:
+            content = yaml.safe_load(file)
+        return cls(content, path, file_state)
+
+    def is_current(self):
+        """
+        Check that the file of the snapshot was not modified since read.
+        """
+        return (self.path is not None
+                and self.get_file_state(self.path) == self.file_state)
+
+    def get_content(self):
+        """
+        Get a copy of the content of the configuration file (can be
+        modified, e.g. before write_config_file).
+        """
+        return copy.deepcopy(self.content)
 
-OUTPUT_CONFIG_PATH = 'output_path.txt' # Name of the temp file where the path
-# of the config file to use (from selected output folder). To use here only.
 
 class ConfigPath():
     @enter_function
     def __init__(self):
+        # Snapshots of the configuration files read, by path.
+        self.snapshots = {}
+        # Output folder selection and configuration file of the session.
+        self.session = SessionState()
         self.set_config_values(INITIAL_CONFIG_FILE)
 
         # Essential for classification comboboxes versioning
@@ -33,8 +157,10 @@ class ConfigPath():
             self.path_to_config_copy = path_to_config_copy
             self.config_yaml.clear()
             self.config_yaml = ConfigPath.open_project_config_file()
-            ConfigPath.create_temp_file(name=OUTPUT_CONFIG_PATH,
-                                        text=self.path_to_config_copy)
+        # Set in both cases (a path from a previous output folder must not be
+        # used).
+        self.session.set_output_folder(self.outputFolder)
+        self.session.set_config_file_path(path_to_config_copy)
 
     @enter_function
     def open_project_config_file(self):
@@ -43,21 +169,49 @@ class ConfigPath():
         exists.
         """
 
-        temp_file_exist = ConfigPath.get_temp_file()
+        # The file is parsed only if it was modified since last read; the
+        # content returned is a copy, as callers modify it.
+        self.config_yaml = self.get_config_snapshot().get_content()
+        return self.config_yaml
 
-        if temp_file_exist:
-            with open(CONFIG_FILE_PATH, 'r') as file:
-                self.config_yaml = yaml.safe_load(file)
-        else:
-            temp_dir = tempfile.gettempdir()
-            temp_file_path = os.path.join(temp_dir, OUTPUT_CONFIG_PATH)
-            # Read data of the temp file
-            with open(temp_file_path, "r") as temp_file:
-                output_path = temp_file.read()
-            with open(output_path, 'r') as file:
-                self.config_yaml = {}
-                self.config_yaml = yaml.safe_load(file)
+    @enter_function
+    def get_config_file_path(self):
+        """
+        Get the path of the configuration file to use: the copy in the
+        output folder if selected, otherwise the initial configuration file.
+        """
+        if not self.session.is_output_folder_selected:
+            return CONFIG_FILE_PATH
+        return self.session.config_file_path
+
+    @enter_function
+    def get_config_snapshot(self, path=None, reload=False):
+        """
+        Get the snapshot of a configuration file, read again only if the
+        file was modified (modification time or size) since last read.
+        :param path: path of the configuration file (by default, the
+                     configuration file to use, see get_config_file_path).
+        :param reload: True to read the file again in any case.
+        :return: ConfigSnapshot.
+        """
+        if path is None:
+            path = self.get_config_file_path()
+        snapshot = self.snapshots.get(path)
+        if reload or snapshot is None or not snapshot.is_current():
+            snapshot = ConfigSnapshot.read(path)
+            self.snapshots[path] = snapshot
+        return snapshot
 
+    @enter_function
+    def reload_config(self):
+        """
+        Read the configuration file to use again (e.g. modified with the
+        same size within the resolution of the file system clock) and
+        update the configuration values.
+        :return: content of the configuration file (dictionary).
+        """
+        self.set_config_values(self.get_config_snapshot(reload=True))
+        self.config_yaml = self.config.get_content()
         return self.config_yaml
 
     @enter_function
@@ -89,69 +243,23 @@ class ConfigPath():
                 self.check_existing_configuration()
 
     @enter_function
-    def create_temp_file(self, name='output_folder_not_selected.txt',
-                         text="Output folder not yet selected.\n"):
-        """
-        Create a temporary file for 1) using as a flag to check if output
-        folder has een selected or not 2) saving the path of the config file
-        in the selected output folder if selected (so it can be used).
-        """
-
-        # Create a temporary file
-        temp_dir = tempfile.gettempdir()
-        temp_file_path = os.path.join(temp_dir, name)
-        # Write some initial data to the file
-        with open(temp_file_path, "w") as temp_file:
-            temp_file.write(text)
-
-    @enter_function
-    def get_temp_file(self, name='output_folder_not_selected.txt'):
-        """
-        Verify if a specific temp file exists or not. By default, allows to
-        detect if output folder has een selected or not.
-        """
-
-        temp_dir = tempfile.gettempdir()
-        temp_file_path = os.path.join(temp_dir, name)
-
-        try:
-            # Write some initial data to the file
-            with open(temp_file_path, "r") as temp_file:
-                content = temp_file.read()
-        except FileNotFoundError:
-            return False
-
-        return True
-
-    @enter_function
-    def delete_temp_file(self, name='output_folder_not_selected.txt'):
+    def reset_session(self):
         """
-        Delete a specific temp file if it exists.
+        Start a session without output folder selected (the initial
+        configuration file is used until an output folder is selected).
         """
-
-        # Get the path to the temporary file
-        temp_dir = tempfile.gettempdir()
-        temp_file_path = os.path.join(temp_dir, name)
-
-        # Check if the file exists
-        if os.path.exists(temp_file_path):
-            # Delete the file
-            os.remove(temp_file_path)
+        self.session.reset()
 
     @enter_function
-    def read_temp_file(self, name='output_folder_not_selected.txt'):
+    def set_output_folder_selected(self):
         """
-        Read a specific temp file and return the contents.
+        Use the configuration file of the selected output folder (see
+        check_existing_configuration), and save the session state in the
+        output folder if requested in the configuration.
         """
-
-        # Get the path to the temporary file
-        temp_dir = tempfile.gettempdir()
-        temp_file_path = os.path.join(temp_dir, name)
-
-        # Open the file and read its contents
-        with open(temp_file_path, "r") as file:
-            content = file.read()
-            return content
+        self.session.set_output_folder_selected()
+        if self.PERSIST_SESSION_STATE:
+            self.session.save()
 
     @enter_function
     def write_config_file(self):
@@ -160,23 +268,21 @@ class ConfigPath():
         in the output folder configuration file).
         """
 
-        temp_file_exist = ConfigPath.get_temp_file()
+        path = self.get_config_file_path()
+        with open(path, 'w') as file:
+            yaml.safe_dump(self.config_yaml, file)
 
-        if temp_file_exist:
-            with open(CONFIG_FILE_PATH, 'w') as file:
-                yaml.safe_dump(self.config_yaml, file)
-        else:
-            output_path = ConfigPath.read_temp_file(name=OUTPUT_CONFIG_PATH)
-            with open(output_path, 'w') as file:
-                yaml.safe_dump(self.config_yaml, file)
-
-        # Ensure to get the latest config values
-        ConfigPath.set_config_values(self.config_yaml)
+        # Ensure to get the latest config values (the written content is
+        # the snapshot of the file: it is not read again).
+        snapshot = ConfigSnapshot(self.config_yaml, path,
+                                  ConfigSnapshot.get_file_state(path))
+        self.snapshots[path] = snapshot
+        ConfigPath.set_config_values(snapshot)
 
     @enter_function
     def write_correct_path(self):
         """
-        Ensure the temp file has the appropriate config file path,
+        Ensure the session has the appropriate config file path,
         """
 
         path_to_saved_config_files = \
@@ -184,8 +290,8 @@ class ConfigPath():
         path_to_config_copy = \
             f'{path_to_saved_config_files}{os.sep}{CONFIG_COPY_FILENAME}'
 
-        ConfigPath.create_temp_file(name=OUTPUT_CONFIG_PATH,
-                                    text=path_to_config_copy)
+        self.session.set_output_folder(self.outputFolder)
+        self.session.set_config_file_path(path_to_config_copy)
 
     @enter_function
     def set_config_values(self, config):
@@ -194,58 +300,22 @@ class ConfigPath():
         values from a specified config file (for example, the latest). In
         fact, THIS IS A SETTER FUNCTION: it updates the config values from
         the config file passed in parameter.
-        :param config: config yaml file content
-        :return: config yaml file content
+        :param config: config yaml file content, or ConfigSnapshot
+        :return: config yaml file content (or the ConfigSnapshot given)
         """
-
-        self.IS_DISPLAY_TIMER_REQUESTED = config[
-            "is_display_timer_requested"]
-
-        self.INPUT_FILE_EXTENSION = config["input_filetype"]
-        self.DEFAULT_VOLUMES_DIRECTORY = config["default_volume_directory"]
+        if isinstance(config, ConfigSnapshot):
+            snapshot = config
+        else:
+            snapshot = ConfigSnapshot(config)
+        self.config = snapshot
+
+        # Typed values of the snapshot (see CONFIG_VALUES), copied as
+        # attributes since they are read on the hot path (e.g.
+        # ConfigPath.INPUT_FILE_EXTENSION). INTERPOLATE_VALUE can then be
+        # changed from the UI (see set_interpolate_value).
+        for name in CONFIG_VALUES:
+            setattr(self, name, getattr(snapshot, name))
         self.DefaultDir = self.DEFAULT_VOLUMES_DIRECTORY
-        self.DEFAULT_SEGMENTATION_DIRECTORY = config[
-            "default_segmentation_directory"]
-
-        self.MODALITY = config["modality"]
-        self.IS_CLASSIFICATION_REQUESTED = config[
-            "is_classification_requested"]
-        self.IS_SEGMENTATION_REQUESTED = config[
-            "is_segmentation_requested"]
-        self.IS_MOUSE_SHORTCUTS_REQUESTED = config[
-            "is_mouse_shortcuts_requested"]
-        self.IS_KEYBOARD_SHORTCUTS_REQUESTED = config[
-            "is_keyboard_shortcuts_requested"]
-
-        self.INTERPOLATE_VALUE = config["interpolate_value"]
-        self.REQUIRE_EMPTY = config["require_empty"]
-        self.ENABLE_DEBUG = config["enable_debug"]
-
-        self.WORKING_LIST_FILENAME = config["working_list_filename"]
-        self.REMAINING_LIST_FILENAME = config["remaining_list_filename"]
-
-        self.CT_WINDOW_WIDTH = config["ct_window_width"]
-        self.CT_WINDOW_LEVEL = config["ct_window_level"]
-
-        self.REQUIRE_VOLUME_DATA_HIERARCHY_BIDS_FORMAT = config[
-            "impose_bids_format"]
-
-        self.KEEP_WORKING_LIST = config["keep_working_list"]
-        self.SAVE_UINT8 = config["save_uint8"]
-
-        if self.MODALITY == 'CT':
-            # then BIDS not mandatory because it is not yet supported
-            # therefore, either .nrrd or .nii.gz accepted
-            REQUIRE_VOLUME_DATA_HIERARCHY_BIDS_FORMAT = False
-            # CT_WINDOW_WIDTH = config["ct_window_width"]
-            # CT_WINDOW_LEVEL = config["ct_window_level"]
-
-        elif self.MODALITY == 'MRI':
-            # therefore, .nii.gz required
-            # INPUT_FILE_EXTENSION = '*.nii.gz'
-            # user can decide whether to impose bids or not
-            REQUIRE_VOLUME_DATA_HIERARCHY_BIDS_FORMAT = config[
-                "impose_bids_format"]
 
         return config
 
@@ -262,10 +332,7 @@ class ConfigPath():
         Configuration Set Up Window has been modified.
         :return: content of the initial configuration file (dictionary)
         """
-        # Read at startup the initial config file
-        with open(CONFIG_FILE_PATH, 'r') as file:
-            content = yaml.safe_load(file)
-        return content
+        return self.get_config_snapshot(CONFIG_FILE_PATH).get_content()
 
     @enter_function
     def extract_config_classification(self, content):
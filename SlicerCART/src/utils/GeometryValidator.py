@@ -0,0 +1,183 @@
+from utils.requirements import *
+from utils.constants import *
+from utils.debugging_helpers import *
+from utils.ConfigPath import *
+from utils.SegmentationVersionCounter import *
+
+
+class GeometryValidator():
+    """
+    This class checks the geometry of the volumes and of their saved
+    segmentations from the file headers only (see
+    batch_workers.validate_case_geometry): segmentations whose dimensions or
+    affine differ from the volume, non-orthogonal directions and implausible
+    spacings. The results are saved in the _conf folder of the output folder
+    with the modification time and size of the checked files, so that only
+    the cases whose files changed are checked again.
+    """
+
+    @enter_function
+    def __init__(self, output_folder, volumes_folder):
+        """
+        __init__
+
+        Args:
+            output_folder: selected output folder.
+            volumes_folder: selected volumes folder.
+        """
+        self.output_folder = output_folder
+        self.volumes_folder = volumes_folder
+        self.cache_path = os.path.join(output_folder, CONF_FOLDER_NAME,
+                                       GEOMETRY_CACHE_FILENAME)
+        self.mutex = RLock()
+        # Case filename -> {'files': {path: [mtime, size]}, 'issues': [...]}
+        self.cases = self.load()
+
+    @enter_function
+    def load(self):
+        """
+        Read the saved results (empty if none or unreadable).
+        """
+        if not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path, 'r') as file:
+                return json.load(file)
+        except (OSError, ValueError) as e:
+            print(f'Geometry cache ignored ({self.cache_path}): {e}')
+            return {}
+
+    @enter_function
+    def save(self):
+        """
+        Write the results in the _conf folder of the output folder.
+        """
+        temp_path = f'{self.cache_path}.tmp'
+        with self.mutex:
+            try:
+                os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+                with open(temp_path, 'w') as file:
+                    json.dump(self.cases, file)
+                os.replace(temp_path, self.cache_path)
+            except OSError as e:
+                print(f'Geometry cache not saved ({self.cache_path}): {e}')
+
+    @enter_function
+    def validate(self, cases_paths, max_workers=8):
+        """
+        Check the geometry of cases (cached results are used for the cases
+        whose files did not change).
+        :param cases_paths: paths of the volumes of the working list.
+        :param max_workers: number of threads reading the headers.
+        :return: dictionary volume filename -> list of issues, for the cases
+        with issues.
+        """
+        steps = self.validate_steps(cases_paths, max_workers)
+        while True:
+            try:
+                next(steps)
+            except StopIteration as stop:
+                return stop.value
+
+    @enter_function
+    def validate_steps(self, cases_paths, max_workers=8):
+        """
+        Steps of validate (same parameters), to be run from an event loop
+        (see BatchRunner): generator yielding the number of checked cases and
+        the number of cases while the headers are read by the validation
+        threads. Its return value is the result of validate.
+        """
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            futures = {executor.submit(self.validate_case_entry, case_path):
+                       case_path for case_path in cases_paths}
+            entries = {}
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, timeout=BATCH_STEP_TIMEOUT,
+                                     return_when=FIRST_COMPLETED)
+                for future in done:
+                    entries[futures[future]] = future.result()
+                yield len(entries), len(cases_paths)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        with self.mutex:
+            self.cases = {os.path.basename(case_path): entries[case_path]
+                          for case_path in cases_paths}
+        self.save()
+        return {case: entry['issues'] for case, entry in self.cases.items()
+                if entry['issues']}
+
+    @enter_function
+    def validate_case(self, case_path):
+        """
+        Check the geometry of one case (e.g. before loading it).
+        :return: list of issues (empty if none).
+        """
+        entry = self.validate_case_entry(case_path)
+        with self.mutex:
+            previous_entry = self.cases.get(os.path.basename(case_path))
+            self.cases[os.path.basename(case_path)] = entry
+        if entry is not previous_entry:
+            self.save()
+        return entry['issues']
+
+    def validate_case_entry(self, case_path):
+        """
+        Get the up-to-date results of one case. Not decorated with
+        enter_function: called from the validation threads for each case.
+        :return: dictionary with the checked files and the issues.
+        """
+        relative_path = case_path[len(self.volumes_folder):]
+        output_path, filename = os.path.split(self.output_folder
+                                              + relative_path)
+        counter = SegmentationVersionCounter(output_path,
+                                             filename.split('.')[0],
+                                             ConfigPath.INPUT_FILE_EXTENSION)
+        paths = [case_path]
+        try:
+            with os.scandir(output_path) as elements:
+                paths += sorted(element.path for element in elements
+                                if counter.parse_version_number(
+                                    element.name) is not None)
+        except OSError:
+            pass
+
+        files = {}
+        for path in paths:
+            try:
+                stat = os.stat(path)
+                files[path] = [stat.st_mtime_ns, stat.st_size]
+            except OSError:
+                continue
+
+        entry = self.cases.get(os.path.basename(case_path))
+        if entry is not None and entry['files'] == files:
+            return entry
+
+        issues = batch_workers.validate_case_geometry(case_path, paths[1:])
+        return {'files': files, 'issues': issues}
+
+    @enter_function
+    def write_report(self, report_path=None):
+        """
+        Write the issues of all checked cases to a csv file (one row by
+        issue).
+        :param report_path: path of the report (by default, in the _conf
+                            folder of the output folder).
+        :return: path of the report.
+        """
+        if report_path is None:
+            report_path = os.path.join(self.output_folder, CONF_FOLDER_NAME,
+                                       GEOMETRY_REPORT_FILENAME)
+        temp_path = f'{report_path}.tmp'
+        with open(temp_path, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(['Volume filename', 'Issue'])
+            with self.mutex:
+                for case, entry in sorted(self.cases.items()):
+                    for issue in entry['issues']:
+                        writer.writerow([case, issue])
+        os.replace(temp_path, report_path)
+        return report_path
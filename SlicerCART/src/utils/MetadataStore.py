@@ -0,0 +1,381 @@
+from utils.requirements import *
+from utils.constants import *
+from utils.debugging_helpers import *
+from utils.SegmentationLedger import *
+
+# Columns of the segmentation and classification information stored in
+# dedicated database columns (the other ones are timers, measurement lines
+# or classification labels).
+SEGMENTATION_COLUMNS = {'Volume filename': 'case_filename',
+                        'Segmentation version': 'version',
+                        'Annotator Name': 'annotator',
+                        'Annotator degree': 'annotator_degree',
+                        'Revision step': 'revision_step',
+                        'Date and time': 'date_and_time',
+                        'Duration': 'duration'}
+CLASSIFICATION_COLUMNS = {'Volume filename': 'case_filename',
+                          'Classification version': 'version',
+                          'Combobox version': 'combobox_version',
+                          'Annotator Name': 'annotator',
+                          'Annotator degree': 'annotator_degree',
+                          'Revision step': 'revision_step',
+                          'Date and time': 'date_and_time'}
+LINE_COLUMN_SUFFIXES = {' ControlPoint1': 'control_point_1',
+                        ' ControlPoint2': 'control_point_2',
+                        ' Length': 'length'}
+
+METADATA_STORE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS segmentation_versions (
+    id INTEGER PRIMARY KEY,
+    record_id TEXT UNIQUE NOT NULL,
+    case_filename TEXT NOT NULL,
+    version TEXT,
+    version_number INTEGER,
+    annotator TEXT,
+    annotator_degree TEXT,
+    revision_step TEXT,
+    date_and_time TEXT,
+    duration REAL
+);
+CREATE INDEX IF NOT EXISTS segmentation_versions_case
+    ON segmentation_versions (case_filename, version_number);
+CREATE INDEX IF NOT EXISTS segmentation_versions_annotator
+    ON segmentation_versions (annotator);
+
+CREATE TABLE IF NOT EXISTS timers (
+    segmentation_id INTEGER NOT NULL REFERENCES segmentation_versions (id),
+    label TEXT NOT NULL,
+    duration REAL
+);
+CREATE INDEX IF NOT EXISTS timers_segmentation ON timers (segmentation_id);
+CREATE INDEX IF NOT EXISTS timers_label ON timers (label);
+
+CREATE TABLE IF NOT EXISTS measurement_lines (
+    segmentation_id INTEGER NOT NULL REFERENCES segmentation_versions (id),
+    line_name TEXT NOT NULL,
+    control_point_1 TEXT,
+    control_point_2 TEXT,
+    length REAL
+);
+CREATE INDEX IF NOT EXISTS measurement_lines_segmentation
+    ON measurement_lines (segmentation_id);
+
+CREATE TABLE IF NOT EXISTS classification_versions (
+    id INTEGER PRIMARY KEY,
+    record_id TEXT UNIQUE NOT NULL,
+    case_filename TEXT NOT NULL,
+    version TEXT,
+    version_number INTEGER,
+    combobox_version TEXT,
+    annotator TEXT,
+    annotator_degree TEXT,
+    revision_step TEXT,
+    date_and_time TEXT,
+    labels TEXT
+);
+CREATE INDEX IF NOT EXISTS classification_versions_case
+    ON classification_versions (case_filename, version_number);
+CREATE INDEX IF NOT EXISTS classification_versions_annotator
+    ON classification_versions (annotator);
+
+CREATE TABLE IF NOT EXISTS import_state (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    last_import_time REAL
+);
+"""
+
+
+class MetadataStore():
+    """
+    This class manages the optional SQLite database of a project (in the
+    _conf folder of the output folder), which gathers the segmentation and
+    classification information of all cases in indexed tables, for the
+    queries over the whole project. Each record is written in a single
+    transaction. The per-case information files stay the reference (e.g.
+    for the versions of a case): saves made without the store (headless
+    logic, another instance, store disabled) are imported with
+    import_output_folder when the store is opened.
+    """
+
+    @enter_function
+    def __init__(self, output_folder):
+        """
+        __init__
+
+        Args:
+            output_folder: output folder of the project.
+        """
+        self.output_folder = output_folder
+        self.database_path = os.path.join(output_folder, CONF_FOLDER_NAME,
+                                          METADATA_STORE_FILENAME)
+        os.makedirs(os.path.dirname(self.database_path), exist_ok=True)
+        with self.connect() as connection:
+            connection.executescript(METADATA_STORE_SCHEMA)
+
+    def connect(self):
+        """
+        Open a connection to the database. A connection is opened for each
+        operation, so that the store can be used from any thread. Used as
+        a context manager, the connection commits or rolls back the
+        transaction (it must still be closed).
+        """
+        connection = sqlite3.connect(self.database_path, timeout=30)
+        connection.execute('PRAGMA foreign_keys = ON')
+        return connection
+
+    def get_version_number(self, version):
+        """
+        Get the number of a 'vXX' version string (None if not a version).
+        """
+        if isinstance(version, str) and version[1:].isdigit():
+            return int(version[1:])
+        return None
+
+    def get_value(self, value):
+        """
+        Convert a record value to a database value (missing values of
+        dataframes become NULL).
+        """
+        if value is None or (isinstance(value, float) and np.isnan(value)):
+            return None
+        if isinstance(value, (list, tuple)):
+            return ';'.join(map(str, value))
+        if isinstance(value, np.generic):
+            return value.item()
+        return value
+
+    def add_segmentation_record(self, record, connection=None):
+        """
+        Add a segmentation information record (see SegmentationLedger) with
+        its timers and measurement lines. A record already in the database
+        (same record id) is ignored, so that retried writes are safe. Not
+        decorated with enter_function: called from the segmentation writer
+        thread.
+        :param record: dictionary column name -> value.
+        :param connection: connection of a transaction in progress (a new
+                           transaction is used if None).
+        """
+        if connection is None:
+            connection = self.connect()
+            try:
+                with connection:
+                    self.add_segmentation_record(record, connection)
+            finally:
+                connection.close()
+            return
+
+        values = {name: self.get_value(record.get(column))
+                  for column, name in SEGMENTATION_COLUMNS.items()}
+        values['record_id'] = record[SEGMENTATION_LEDGER_ID_KEY]
+        values['version_number'] = self.get_version_number(values['version'])
+
+        cursor = connection.execute(
+            f'INSERT OR IGNORE INTO segmentation_versions '
+            f'({", ".join(values)}) '
+            f'VALUES ({", ".join("?" * len(values))})',
+            list(values.values()))
+        if cursor.rowcount == 0:
+            return
+        segmentation_id = cursor.lastrowid
+
+        lines = {}
+        for column, value in record.items():
+            if column.endswith(' duration'):
+                connection.execute(
+                    'INSERT INTO timers (segmentation_id, label, duration) '
+                    'VALUES (?, ?, ?)',
+                    (segmentation_id, column[:-len(' duration')],
+                     self.get_value(value)))
+                continue
+            for suffix, name in LINE_COLUMN_SUFFIXES.items():
+                if column.endswith(suffix):
+                    lines.setdefault(column[:-len(suffix)], {})[name] = (
+                        self.get_value(value))
+
+        for line_name, line in lines.items():
+            connection.execute(
+                'INSERT INTO measurement_lines (segmentation_id, line_name, '
+                'control_point_1, control_point_2, length) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (segmentation_id, line_name, line.get('control_point_1'),
+                 line.get('control_point_2'), line.get('length')))
+
+    def add_classification_record(self, record, record_id=None,
+                                  connection=None):
+        """
+        Add a classification information record (a row of a
+        ClassificationInformation.csv file).
+        :param record: dictionary column name -> value.
+        :param record_id: unique id of the record (a new one if None). A
+                          record already in the database is ignored.
+        :param connection: connection of a transaction in progress (a new
+                           transaction is used if None).
+        """
+        if connection is None:
+            connection = self.connect()
+            try:
+                with connection:
+                    self.add_classification_record(record, record_id,
+                                                   connection)
+            finally:
+                connection.close()
+            return
+
+        values = {name: self.get_value(record.get(column))
+                  for column, name in CLASSIFICATION_COLUMNS.items()}
+        values['record_id'] = record_id or uuid.uuid4().hex
+        values['version_number'] = self.get_version_number(values['version'])
+        values['labels'] = json.dumps(
+            {column: self.get_value(value) for column, value in record.items()
+             if column not in CLASSIFICATION_COLUMNS})
+
+        connection.execute(
+            f'INSERT OR IGNORE INTO classification_versions '
+            f'({", ".join(values)}) '
+            f'VALUES ({", ".join("?" * len(values))})',
+            list(values.values()))
+
+    @enter_function
+    def get_last_import_time(self):
+        """
+        Get the start time of the last import_output_folder (None if the
+        output folder was never imported).
+        """
+        connection = self.connect()
+        try:
+            row = connection.execute(
+                'SELECT last_import_time FROM import_state').fetchone()
+        finally:
+            connection.close()
+        return None if row is None else row[0]
+
+    @enter_function
+    def import_output_folder(self, modified_after=None):
+        """
+        Import the segmentation information (ledgers or csv files of
+        previous versions) and classification information csv files of the
+        output folder, in a single transaction. Records already imported
+        are ignored, so the import can be run again.
+        :param modified_after: only read the files modified since this time
+                               (e.g. get_last_import_time), all files if
+                               None.
+        :return: tuple (number of segmentation files, number of
+        classification files) read.
+        """
+        legacy_segmentation_suffix = '_SegmentationInformation.csv'
+        classification_suffix = CLASSIFICATION_INFORMATION_SUFFIX
+        ledger_paths = set()
+        number_of_segmentation_files = 0
+        number_of_classification_files = 0
+        # Files modified during the import are read again by the next one.
+        import_time = time.time()
+
+        connection = self.connect()
+        try:
+            with connection:
+                for folder, dirs, files in os.walk(self.output_folder):
+                    # Sorted so that the files are read in the same order
+                    # by each import.
+                    dirs[:] = sorted(name for name in dirs
+                                     if name != CONF_FOLDER_NAME)
+                    for filename in sorted(files):
+                        path = os.path.join(folder, filename)
+
+                        if filename.endswith(legacy_segmentation_suffix):
+                            # Read through the ledger (csv file used only if
+                            # there is no ledger yet).
+                            path = (path[:-len('.csv')]
+                                    + SEGMENTATION_LEDGER_EXTENSION)
+                        if (path.endswith(SEGMENTATION_LEDGER_SUFFIX)
+                                and path not in ledger_paths):
+                            ledger_paths.add(path)
+                            if not os.path.isfile(path):
+                                modified_path = os.path.join(folder,
+                                                             filename)
+                            else:
+                                modified_path = path
+                            if (modified_after is not None
+                                    and os.path.getmtime(modified_path)
+                                    < modified_after):
+                                continue
+                            # Rows of csv files have no record id: they are
+                            # identified by the ledger path (also used once
+                            # the csv file is imported in the ledger) and
+                            # their index.
+                            relative_path = os.path.relpath(
+                                path, self.output_folder)
+                            records = SegmentationLedger(path).read_records()
+                            for index, record in enumerate(records):
+                                record.setdefault(SEGMENTATION_LEDGER_ID_KEY,
+                                                  f'{relative_path}:{index}')
+                                self.add_segmentation_record(record,
+                                                             connection)
+                            number_of_segmentation_files += 1
+
+                        elif filename.endswith(classification_suffix):
+                            if (modified_after is not None
+                                    and os.path.getmtime(path)
+                                    < modified_after):
+                                continue
+                            relative_path = os.path.relpath(
+                                path, self.output_folder)
+                            df = pd.read_csv(path)
+                            for index, row in enumerate(
+                                    df.to_dict('records')):
+                                self.add_classification_record(
+                                    row, f'{relative_path}:{index}',
+                                    connection)
+                            number_of_classification_files += 1
+
+                connection.execute(
+                    'INSERT OR REPLACE INTO import_state '
+                    '(id, last_import_time) VALUES (1, ?)', (import_time,))
+        finally:
+            connection.close()
+
+        return (number_of_segmentation_files,
+                number_of_classification_files)
+
+    @enter_function
+    def get_annotator_case_counts(self):
+        """
+        Get the number of cases segmented and classified by each annotator.
+        :return: dataframe with columns annotator, segmented_cases and
+        classified_cases.
+        """
+        connection = self.connect()
+        try:
+            return pd.read_sql_query(
+                'SELECT annotator, '
+                "SUM(kind = 'segmentation') AS segmented_cases, "
+                "SUM(kind = 'classification') AS classified_cases "
+                "FROM (SELECT DISTINCT annotator, case_filename, "
+                "'segmentation' AS kind FROM segmentation_versions "
+                "UNION SELECT DISTINCT annotator, case_filename, "
+                "'classification' AS kind FROM classification_versions) "
+                'GROUP BY annotator ORDER BY annotator', connection)
+        finally:
+            connection.close()
+
+    @enter_function
+    def get_average_label_durations(self, annotator=None):
+        """
+        Get the average segmentation duration of each label.
+        :param annotator: restrict to the segmentations of an annotator.
+        :return: dataframe with columns label, average_duration and count.
+        """
+        query = ('SELECT label, AVG(timers.duration) AS average_duration, '
+                 'COUNT(*) AS count FROM timers '
+                 'JOIN segmentation_versions '
+                 'ON segmentation_versions.id = timers.segmentation_id ')
+        params = ()
+        if annotator is not None:
+            query += 'WHERE annotator = ? '
+            params = (annotator,)
+        query += 'GROUP BY label ORDER BY label'
+
+        connection = self.connect()
+        try:
+            return pd.read_sql_query(query, connection, params=params)
+        finally:
+            connection.close()
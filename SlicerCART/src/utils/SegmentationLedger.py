@@ -0,0 +1,162 @@
+from utils.requirements import *
+from utils.constants import *
+from utils.debugging_helpers import *
+
+
+class SegmentationLedger():
+    """
+    This class manages the segmentation information of a case as an
+    append-only ledger (JSON Lines): each save appends one self-describing
+    record (column name -> value) with a single write and fsync. The former
+    SegmentationInformation.csv layout can be exported on demand; since each
+    record keeps its own columns, rows are never misaligned when columns
+    (e.g. measurement lines) are added.
+    """
+
+    @enter_function
+    def __init__(self, ledger_path):
+        """
+        __init__
+
+        Args:
+            ledger_path: path of the ledger file
+                         (<volume>_SegmentationInformation.jsonl).
+        """
+        self.ledger_path = ledger_path
+        # SegmentationInformation.csv written by previous versions of
+        # SlicerCART (imported in the ledger at the first save).
+        self.csv_path = (ledger_path[:-len(SEGMENTATION_LEDGER_EXTENSION)]
+                         + '.csv')
+
+    def append(self, record):
+        """
+        Append a record to the ledger and flush it to disk. The legacy csv
+        file, if any, is imported first. Not decorated with enter_function:
+        called from the segmentation writer thread.
+        :param record: dictionary column name -> value (JSON serializable).
+                       A record id is added to it, so that a retried append
+                       of the same record is ignored by read_records.
+        """
+        record.setdefault(SEGMENTATION_LEDGER_ID_KEY, uuid.uuid4().hex)
+        record.setdefault(SEGMENTATION_LEDGER_SCHEMA_KEY,
+                          SEGMENTATION_LEDGER_SCHEMA_VERSION)
+
+        records = []
+        if (not os.path.isfile(self.ledger_path)
+                and os.path.isfile(self.csv_path)):
+            records = self.read_csv_records()
+        records.append(record)
+
+        lines = ''.join(json.dumps(element) + '\n' for element in records)
+        with open(self.ledger_path, 'a+') as file:
+            # Complete a line left incomplete by an interrupted write.
+            file.seek(0, os.SEEK_END)
+            if file.tell() > 0:
+                file.seek(file.tell() - 1)
+                if file.read(1) != '\n':
+                    lines = '\n' + lines
+            file.write(lines)
+            file.flush()
+            os.fsync(file.fileno())
+
+    def read_csv_records(self):
+        """
+        Read the rows of the legacy csv file as records. Values that do not
+        correspond to a column (misaligned rows) are ignored.
+        """
+        with open(self.csv_path, 'r', newline='') as file:
+            return [{key: value for key, value in row.items()
+                     if key is not None and value is not None}
+                    for row in csv.DictReader(file)]
+
+    @enter_function
+    def read_records(self):
+        """
+        Read all records of the case (from the legacy csv file if there is
+        no ledger yet). Incomplete lines and duplicated records are ignored.
+        :return: list of records, in saving order.
+        """
+        if not os.path.isfile(self.ledger_path):
+            if os.path.isfile(self.csv_path):
+                return self.read_csv_records()
+            return []
+
+        records = []
+        record_ids = set()
+        with open(self.ledger_path, 'r') as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                record_id = record.get(SEGMENTATION_LEDGER_ID_KEY)
+                if record_id is not None:
+                    if record_id in record_ids:
+                        continue
+                    record_ids.add(record_id)
+                records.append(record)
+        return records
+
+    @enter_function
+    def get_csv_rows(self):
+        """
+        Convert the records to the SegmentationInformation.csv layout: all
+        columns found in the records, in order of appearance, lists joined
+        with semicolons and missing values left empty.
+        :return: tuple (header, rows).
+        """
+        records = self.read_records()
+        header = []
+        for record in records:
+            for key in record:
+                if (key not in header
+                        and key not in (SEGMENTATION_LEDGER_ID_KEY,
+                                        SEGMENTATION_LEDGER_SCHEMA_KEY)):
+                    header.append(key)
+
+        rows = []
+        for record in records:
+            row = []
+            for key in header:
+                value = record.get(key, '')
+                if isinstance(value, list):
+                    value = ';'.join(map(str, value))
+                row.append(value)
+            rows.append(row)
+        return header, rows
+
+    @enter_function
+    def read_dataframe(self):
+        """
+        Get the segmentation information of the case as the dataframe
+        previously read from SegmentationInformation.csv.
+        :return: dataframe or None if nothing was saved for the case.
+        """
+        header, rows = self.get_csv_rows()
+        if not header:
+            return None
+        text = StringIO()
+        writer = csv.writer(text)
+        writer.writerow(header)
+        writer.writerows(rows)
+        text.seek(0)
+        return pd.read_csv(text)
+
+    @enter_function
+    def export_csv(self, csv_path=None):
+        """
+        Write the segmentation information in the SegmentationInformation.csv
+        layout (for downstream scripts).
+        :param csv_path: path of the csv file (by default, the
+                         SegmentationInformation.csv file of the case).
+        """
+        if csv_path is None:
+            csv_path = self.csv_path
+        header, rows = self.get_csv_rows()
+
+        temp_path = f'{csv_path}.tmp'
+        with open(temp_path, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(header)
+            writer.writerows(rows)
+        os.replace(temp_path, csv_path)
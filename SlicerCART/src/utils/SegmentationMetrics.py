@@ -0,0 +1,104 @@
+from utils.requirements import *
+from utils.constants import *
+from utils.debugging_helpers import *
+
+
+class SegmentationMetrics():
+    """
+    This class computes the overlap metrics of pairs of segmentation versions
+    (see batch_workers.get_overlap_metrics) in background threads. Each
+    version file is decoded once per request, and the metrics of a pair are
+    kept in memory for the modification times of its two files, so that
+    reopening the comparison of unchanged versions is immediate.
+    """
+
+    @enter_function
+    def __init__(self, max_workers=4):
+        """
+        __init__
+
+        Args:
+            max_workers: number of threads decoding the files and of threads
+                         computing the metrics.
+        """
+        self.mutex = RLock()
+        # (file key, other file key) -> {label value: metrics}
+        self.cache = {}
+        self.read_executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix='SlicerCARTMetricsRead')
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='SlicerCARTMetrics')
+
+    def get_file_key(self, path):
+        """
+        Get the cache key of a segmentation file in its current state.
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return path, stat.st_mtime_ns, stat.st_size
+
+    @enter_function
+    def submit(self, paths, label_values):
+        """
+        Schedule the metrics of all pairs of segmentation files.
+        :param paths: paths of the segmentation files, e.g. by version order.
+        :param label_values: dictionary label name -> label value of the
+                             configuration.
+        :return: list of tuples (path, other path, future of the dictionary
+        label value -> metrics), by pair order.
+        """
+        keys = {path: self.get_file_key(path) for path in paths}
+        labelmaps = {}
+        jobs = []
+        for index, path in enumerate(paths):
+            for other_path in paths[index + 1:]:
+                pair_key = (keys[path], keys[other_path])
+                with self.mutex:
+                    metrics = self.cache.get(pair_key)
+                if metrics is not None:
+                    future = Future()
+                    future.set_result(metrics)
+                else:
+                    for version_path in (path, other_path):
+                        if version_path not in labelmaps:
+                            labelmaps[version_path] = (
+                                self.read_executor.submit(
+                                    batch_workers.read_labelmap,
+                                    version_path, label_values))
+                    future = self.executor.submit(
+                        self.compute_pair, pair_key, labelmaps[path],
+                        labelmaps[other_path], label_values)
+                jobs.append((path, other_path, future))
+        return jobs
+
+    def compute_pair(self, pair_key, labelmap_future, other_labelmap_future,
+                     label_values):
+        """
+        Compute the metrics of a pair once its files are decoded. Not
+        decorated with enter_function: called from the metrics threads.
+        :return: dictionary label value -> metrics.
+        """
+        labelmap, affine = labelmap_future.result()
+        other_labelmap, other_affine = other_labelmap_future.result()
+        if not batch_workers.is_same_geometry(
+                (labelmap.shape, affine), (other_labelmap.shape, other_affine)):
+            raise ValueError('the versions have different geometries')
+
+        metrics = batch_workers.get_overlap_metrics(
+            labelmap, other_labelmap, affine,
+            sorted(set(label_values.values())))
+        if None not in pair_key:
+            with self.mutex:
+                self.cache[pair_key] = metrics
+        return metrics
+
+    @enter_function
+    def shutdown(self):
+        """
+        Stop the threads (metrics not computed yet are dropped).
+        """
+        self.read_executor.shutdown(wait=False, cancel_futures=True)
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,171 @@
+from utils.requirements import *
+from utils.constants import *
+from utils.debugging_helpers import *
+
+
+class SegmentationVersionCounter():
+    """
+    This class keeps the latest segmentation version number of a case in a
+    small sidecar file of the case output folder, so that the next version
+    does not require to list the output folder at each save and each load of
+    the latest segmentation. The sidecar is replaced atomically once a
+    segmentation is written. It is checked against the segmentation files
+    (latest version present, next version absent): when it is missing or
+    stale, the output folder is scanned once and the sidecar rewritten.
+    Version numbers are not bounded (v99 is followed by v100).
+    """
+
+    @enter_function
+    def __init__(self, output_path, volume_filename, file_extension):
+        """
+        __init__
+
+        Args:
+            output_path: output folder of the case.
+            volume_filename: volume filename of the case without extension.
+            file_extension: input file extension of the configuration (e.g.
+                            '*.nii.gz').
+        """
+        self.output_path = output_path
+        self.volume_filename = volume_filename
+        self.segmentation_extension = self.get_segmentation_extension(
+            file_extension)
+        self.sidecar_path = os.path.join(
+            output_path,
+            f'{volume_filename}{SEGMENTATION_VERSION_SIDECAR_SUFFIX}')
+
+    def get_segmentation_extension(self, file_extension):
+        """
+        Get the extension of the segmentation files saved for volumes of an
+        input file extension ('*.nrrd' volumes are saved as .seg.nrrd, NIfTI
+        volumes as .nii.gz).
+        """
+        if 'nrrd' in file_extension:
+            return '.seg.nrrd'
+        return '.nii.gz'
+
+    def get_segmentation_path(self, version_number):
+        """
+        Get the path of the segmentation file of a version number.
+        """
+        return os.path.join(
+            self.output_path,
+            f'{self.volume_filename}_{self.format_version(version_number)}'
+            f'{self.segmentation_extension}')
+
+    def format_version(self, version_number):
+        """
+        Get the version string of a version number (e.g. 2 -> 'v02').
+        """
+        return f'v{version_number:02d}'
+
+    def parse_version_number(self, path):
+        """
+        Get the version number of a segmentation file of the case.
+        :return: version number or None if the path is not a segmentation
+        file of the case.
+        """
+        filename = os.path.basename(path)
+        prefix = f'{self.volume_filename}_v'
+        if (not filename.startswith(prefix)
+                or not filename.endswith(self.segmentation_extension)):
+            return None
+        number = filename[len(prefix):-len(self.segmentation_extension)]
+        if not number.isdigit():
+            return None
+        return int(number)
+
+    @enter_function
+    def get_latest_version_number(self, pending_paths=()):
+        """
+        Get the latest segmentation version number of the case.
+        :param pending_paths: paths of the segmentations queued but not
+                              written yet (see SegmentationWriter).
+        :return: version number (0 if no segmentation was saved).
+        """
+        latest = self.read_sidecar()
+        if latest is None or not self.is_up_to_date(latest):
+            latest = self.scan()
+            try:
+                self.write_sidecar(latest)
+            except OSError as e:
+                print(f'Segmentation version sidecar not saved '
+                      f'({self.sidecar_path}): {e}')
+
+        for path in pending_paths:
+            number = self.parse_version_number(path)
+            if number is not None:
+                latest = max(latest, number)
+        return latest
+
+    @enter_function
+    def get_next_version(self, pending_paths=()):
+        """
+        Get the version string of the next segmentation of the case.
+        :param pending_paths: see get_latest_version_number.
+        """
+        return self.format_version(
+            self.get_latest_version_number(pending_paths) + 1)
+
+    def is_up_to_date(self, latest):
+        """
+        Check the sidecar against the segmentation files: the latest version
+        must exist and the next one must not.
+        """
+        if latest > 0 and not os.path.exists(
+                self.get_segmentation_path(latest)):
+            return False
+        return not os.path.exists(self.get_segmentation_path(latest + 1))
+
+    @enter_function
+    def scan(self):
+        """
+        List the output folder of the case to find the latest version.
+        :return: version number (0 if none).
+        """
+        latest = 0
+        try:
+            with os.scandir(self.output_path) as entries:
+                for element in entries:
+                    number = self.parse_version_number(element.name)
+                    if number is not None:
+                        latest = max(latest, number)
+        except OSError:
+            pass
+        return latest
+
+    def read_sidecar(self):
+        """
+        Read the latest version number of the sidecar.
+        :return: version number or None if the sidecar is missing or
+        unreadable.
+        """
+        try:
+            with open(self.sidecar_path, 'r') as file:
+                return int(json.load(file)['latest_version'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def write_sidecar(self, latest):
+        """
+        Replace the sidecar atomically (ignored if the output folder does
+        not exist yet). A stale value written concurrently is detected by
+        is_up_to_date.
+        """
+        if not os.path.isdir(self.output_path):
+            return
+        # Temporary file of this call only (main and writer threads).
+        temp_path = f'{self.sidecar_path}.{uuid.uuid4().hex}.tmp'
+        with open(temp_path, 'w') as file:
+            json.dump({'latest_version': latest}, file)
+        os.replace(temp_path, self.sidecar_path)
+
+    def record_save(self, version):
+        """
+        Update the sidecar once the segmentation of a version is written. A
+        more recent version already recorded is kept. Not decorated with
+        enter_function: called from the segmentation writer thread.
+        :param version: saved version string (e.g. 'v03').
+        """
+        latest = max(self.read_sidecar() or 0, int(version[1:]))
+        self.write_sidecar(latest)
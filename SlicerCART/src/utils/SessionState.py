@@ -0,0 +1,118 @@
+from utils.requirements import *
+from utils.constants import *
+from utils.debugging_helpers import *
+
+
+class SessionState():
+    """
+    This class keeps the state of the SlicerCART session of the Slicer
+    process: whether an output folder has been selected and the
+    configuration file to use. The state is kept in memory, so that Slicer
+    instances running on the same computer do not share it. It can also be
+    saved in the _conf folder of the output folder (see save), e.g. to know
+    which process and computer last used an output folder.
+    """
+
+    @enter_function
+    def __init__(self):
+        """
+        __init__
+        """
+        self.output_folder = None
+        self.config_file_path = None
+        self.is_output_folder_selected = False
+
+    @enter_function
+    def reset(self):
+        """
+        Start a session: no output folder selected, the initial
+        configuration file is used.
+        """
+        self.output_folder = None
+        self.config_file_path = None
+        self.is_output_folder_selected = False
+
+    @enter_function
+    def set_output_folder(self, output_folder):
+        """
+        Set the output folder of the session (the configuration file of the
+        output folder is used once set_output_folder_selected is called).
+        """
+        self.output_folder = output_folder
+
+    @enter_function
+    def set_output_folder_selected(self, value=True):
+        """
+        Set whether the output folder has been selected.
+        """
+        self.is_output_folder_selected = value
+
+    @enter_function
+    def set_config_file_path(self, config_file_path):
+        """
+        Set the path of the configuration file of the output folder.
+        """
+        self.config_file_path = config_file_path
+
+    @enter_function
+    def get_state_path(self):
+        """
+        Get the path of the saved session state of the output folder (None
+        if no output folder is set).
+        """
+        if self.output_folder is None:
+            return None
+        return os.path.join(self.output_folder, CONF_FOLDER_NAME,
+                            SESSION_STATE_FILENAME)
+
+    @enter_function
+    def save(self):
+        """
+        Save the session state in the _conf folder of the output folder
+        (replaced atomically). Prints a message if the output folder was
+        last used by another process (e.g. another Slicer instance).
+        """
+        state_path = self.get_state_path()
+        if state_path is None:
+            return
+
+        previous_state = SessionState.load(self, self.output_folder)
+        state = {'output_folder': self.output_folder,
+                 'config_file_path': self.config_file_path,
+                 'is_output_folder_selected': self.is_output_folder_selected,
+                 'hostname': platform.node(),
+                 'pid': os.getpid(),
+                 'updated': datetime.now().isoformat(timespec='seconds')}
+        if (previous_state is not None
+                and (previous_state.get('hostname'),
+                     previous_state.get('pid'))
+                != (state['hostname'], state['pid'])):
+            print(f'Output folder {self.output_folder} was last used by '
+                  f'process {previous_state.get("pid")} on '
+                  f'{previous_state.get("hostname")} '
+                  f'({previous_state.get("updated")}).')
+
+        temp_path = f'{state_path}.{uuid.uuid4().hex}.tmp'
+        try:
+            os.makedirs(os.path.dirname(state_path), exist_ok=True)
+            with open(temp_path, 'w') as file:
+                json.dump(state, file, indent=2)
+            os.replace(temp_path, state_path)
+        except OSError as e:
+            print(f'Session state not saved ({state_path}): {e}')
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    @enter_function
+    def load(self, output_folder):
+        """
+        Read the session state saved in an output folder.
+        :return: dictionary (None if no session state was saved).
+        """
+        state_path = os.path.join(output_folder, CONF_FOLDER_NAME,
+                                  SESSION_STATE_FILENAME)
+        try:
+            with open(state_path, 'r') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
@@ -0,0 +1,192 @@
+from utils.requirements import *
+from utils.constants import *
+from utils.debugging_helpers import *
+from utils.ConfigPath import *
+
+
+class SpanProfiler():
+    """
+    This class records the duration (span) of the stages of the annotation
+    loop when enabled in the configuration (enable_span_profiler). The
+    profiled functions are decorated with enter_function, which times them
+    once this profiler is set as span recorder: no call site is modified.
+    Spans are appended to a JSONL file in the _conf folder of the output
+    folder, rotated when it exceeds SPAN_PROFILER_MAX_BYTES. Spans recorded
+    before an output folder is selected (e.g. case discovery) are kept in
+    memory until then.
+
+    Usage: in the python console, SpanProfiler.print_summary(output_folder)
+    prints the p50/p95/p99 durations of each stage.
+    """
+
+    @enter_function
+    def __init__(self):
+        """
+        __init__
+        """
+        self.mutex = RLock()
+        self.enabled = False
+        self.spans_path = None
+        self.pending_spans = []
+        self.profiled_functions = set(SPAN_PROFILER_FUNCTIONS)
+
+    @enter_function
+    def configure(self, enabled, output_folder=None):
+        """
+        Enable or disable the profiler and select the output folder of the
+        spans file. Enabling or disabling it re-binds the decorated methods
+        of the classes: methods already connected to Qt signals keep their
+        previous binding, so profiled slots must be connected through a
+        lambda resolving the method at each call.
+        :param enabled: record spans (enable_span_profiler configuration
+                        value).
+        :param output_folder: selected output folder (None if not selected
+                              yet).
+        """
+        with self.mutex:
+            if output_folder is not None:
+                self.spans_path = self.get_spans_path(output_folder)
+            if not enabled:
+                self.pending_spans = []
+            was_enabled = self.enabled
+            self.enabled = enabled
+        if enabled != was_enabled:
+            set_span_recorder(self if enabled else None)
+        self.flush()
+
+    def get_spans_path(self, output_folder):
+        """
+        Get the path of the spans file of an output folder.
+        """
+        return os.path.join(output_folder, CONF_FOLDER_NAME,
+                            SPAN_PROFILER_FILENAME)
+
+    def is_profiled(self, func):
+        """
+        Check if a decorated function is timed (see bind_enter_function).
+        """
+        return func.__qualname__ in self.profiled_functions
+
+    def record(self, name, start, duration):
+        """
+        Record a span. Not decorated with enter_function: called for each
+        profiled call, possibly from worker threads.
+        :param name: stage name (qualified name of the function).
+        :param start: start time (seconds since the epoch).
+        :param duration: duration in seconds.
+        """
+        if not self.enabled:
+            return
+        span = {'name': name, 'start': round(start, 6),
+                'duration': round(duration, 6),
+                'thread': current_thread().name}
+        with self.mutex:
+            self.pending_spans.append(span)
+        if self.spans_path is not None:
+            self.flush()
+
+    def flush(self):
+        """
+        Append the pending spans to the spans file (kept in memory if no
+        output folder is selected yet). Not decorated with enter_function:
+        called for each span.
+        """
+        with self.mutex:
+            if self.spans_path is None or not self.pending_spans:
+                return
+            lines = ''.join(json.dumps(span) + '\n'
+                            for span in self.pending_spans)
+            try:
+                os.makedirs(os.path.dirname(self.spans_path), exist_ok=True)
+                self.rotate()
+                with open(self.spans_path, 'a') as file:
+                    file.write(lines)
+                self.pending_spans = []
+            except OSError as e:
+                print(f'Spans not saved ({self.spans_path}): {e}')
+
+    def rotate(self):
+        """
+        Rename the spans file to .1 (and the previous ones to .2, ...) once
+        it exceeds SPAN_PROFILER_MAX_BYTES, keeping SPAN_PROFILER_BACKUP_COUNT
+        files. Not decorated with enter_function: called for each span.
+        """
+        try:
+            if os.path.getsize(self.spans_path) < SPAN_PROFILER_MAX_BYTES:
+                return
+        except OSError:
+            return
+        for index in range(SPAN_PROFILER_BACKUP_COUNT - 1, 0, -1):
+            path = f'{self.spans_path}.{index}'
+            if os.path.exists(path):
+                os.replace(path, f'{self.spans_path}.{index + 1}')
+        os.replace(self.spans_path, f'{self.spans_path}.1')
+
+    @enter_function
+    def read_spans(self, output_folder=None):
+        """
+        Read the spans of the spans file and of its rotated files.
+        :param output_folder: output folder (by default, the configured one).
+        :return: dataframe with columns name, start, duration and thread.
+        """
+        spans_path = self.spans_path
+        if output_folder is not None:
+            spans_path = self.get_spans_path(output_folder)
+        if spans_path is None:
+            return pd.DataFrame(columns=['name', 'start', 'duration',
+                                         'thread'])
+
+        spans = []
+        paths = [f'{spans_path}.{index}'
+                 for index in range(SPAN_PROFILER_BACKUP_COUNT, 0, -1)]
+        for path in paths + [spans_path]:
+            if not os.path.exists(path):
+                continue
+            with open(path, 'r') as file:
+                for line in file:
+                    try:
+                        spans.append(json.loads(line))
+                    except ValueError:
+                        continue
+        return pd.DataFrame(spans, columns=['name', 'start', 'duration',
+                                            'thread'])
+
+    @enter_function
+    def get_summary(self, output_folder=None):
+        """
+        Get the duration percentiles of each stage.
+        :param output_folder: output folder (by default, the configured one).
+        :return: dataframe indexed by stage name with columns count, p50,
+        p95, p99 and total (durations in seconds).
+        """
+        spans = self.read_spans(output_folder)
+        rows = {}
+        for name, durations in spans.groupby('name')['duration']:
+            p50, p95, p99 = np.percentile(durations.to_numpy(),
+                                          [50, 95, 99])
+            rows[name] = {'count': len(durations), 'p50': p50, 'p95': p95,
+                          'p99': p99, 'total': durations.sum()}
+        return pd.DataFrame.from_dict(
+            rows, orient='index',
+            columns=['count', 'p50', 'p95', 'p99', 'total'])
+
+    @enter_function
+    def print_summary(self, output_folder=None):
+        """
+        Print the duration percentiles of each stage (in milliseconds).
+        :param output_folder: output folder (by default, the configured one).
+        """
+        summary = self.get_summary(output_folder)
+        if summary.empty:
+            print('No spans recorded.')
+            return
+        print(f'{"stage":<50} {"count":>6} {"p50 ms":>9} {"p95 ms":>9} '
+              f'{"p99 ms":>9}')
+        for name, row in summary.iterrows():
+            print(f'{name:<50} {int(row["count"]):>6} '
+                  f'{row["p50"] * 1000:>9.1f} {row["p95"] * 1000:>9.1f} '
+                  f'{row["p99"] * 1000:>9.1f}')
+
+
+SpanProfiler = SpanProfiler()
+SpanProfiler.configure(ConfigPath.ENABLE_SPAN_PROFILER)
@@ -0,0 +1,180 @@
+from utils.requirements import *
+from utils.constants import *
+from utils.debugging_helpers import *
+
+
+class VolumeCache():
+    """
+    This class keeps the decoded voxels of the recently loaded volumes on
+    disk, so that revisiting a case (Previous button, review passes, compare
+    segment versions) does not decompress its file again. Each entry is an
+    uncompressed .npy file (KJI indexed, read through a memory map) with a
+    JSON sidecar holding the affine. Entries are named after the source
+    path, modification time and size, so that a modified volume is never
+    read from the cache. The least recently used entries are removed when
+    the cache exceeds its size budget. Entries are written by a background
+    thread.
+    """
+
+    @enter_function
+    def __init__(self, cache_folder, budget_mb):
+        """
+        __init__
+
+        Args:
+            cache_folder: folder of the cached volumes (may be shared by
+                          several output folders).
+            budget_mb: maximum size of the cached volumes (in MB).
+        """
+        self.cache_folder = cache_folder
+        self.budget = budget_mb * 1024 * 1024
+        self.mutex = RLock()
+        # Keys of the entries being written.
+        self.pending_keys = set()
+        self.executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix='SlicerCARTVolumeCache')
+
+    def get_key(self, path):
+        """
+        Get the key of the entry of a volume file in its current state.
+        :return: key or None if the file cannot be read.
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        source = f'{os.path.abspath(path)}|{stat.st_mtime_ns}|{stat.st_size}'
+        return hashlib.sha1(source.encode('utf-8')).hexdigest()
+
+    def get_entry_paths(self, key):
+        """
+        Get the paths of the voxels and sidecar files of an entry.
+        """
+        return (os.path.join(self.cache_folder, f'{key}.npy'),
+                os.path.join(self.cache_folder, f'{key}.json'))
+
+    def get(self, path):
+        """
+        Get the cached voxels of a volume file. Not decorated with
+        enter_function: called from the prefetch threads.
+        :param path: path of the volume file.
+        :return: tuple (KJI indexed read-only array, affine) or None if the
+        volume is not cached (or was modified since).
+        """
+        key = self.get_key(path)
+        if key is None:
+            return None
+        array_path, sidecar_path = self.get_entry_paths(key)
+        try:
+            # The sidecar is written last: an entry without it is incomplete.
+            with open(sidecar_path, 'r') as file:
+                affine = np.array(json.load(file)['affine'], dtype=float)
+            array = np.load(array_path, mmap_mode='r')
+            # The modification time of the sidecar orders the entries for
+            # the eviction.
+            os.utime(sidecar_path)
+        except (OSError, ValueError, KeyError):
+            # Missing or incomplete entry: the volume file is read instead.
+            return None
+        return array, affine
+
+    def put(self, path, array, affine):
+        """
+        Schedule the caching of the voxels of a volume file. The array must
+        not be modified afterwards. Not decorated with enter_function:
+        called from the prefetch threads. Uncompressed NIfTI files are not cached:
+        they are memory-mapped directly (see
+        VolumeIO.read_volume_array_mmap).
+        :param path: path of the volume file.
+        :param array: KJI indexed array of voxels.
+        :param affine: 4x4 IJK to RAS affine.
+        """
+        if path.endswith('.nii'):
+            return
+        key = self.get_key(path)
+        if key is None or array.ndim != 3 or array.nbytes > self.budget:
+            return
+        with self.mutex:
+            if (key in self.pending_keys
+                    or os.path.exists(self.get_entry_paths(key)[1])):
+                return
+            self.pending_keys.add(key)
+        self.executor.submit(self.write_entry, key, path, array, affine)
+
+    def write_entry(self, key, path, array, affine):
+        """
+        Write an entry then evict the least recently used ones. Not decorated
+        with enter_function: called from the cache thread.
+        """
+        array_path, sidecar_path = self.get_entry_paths(key)
+        temp_suffix = f'.{uuid.uuid4().hex}.tmp'
+        try:
+            os.makedirs(self.cache_folder, exist_ok=True)
+            with open(array_path + temp_suffix, 'wb') as file:
+                np.save(file, np.ascontiguousarray(array))
+            os.replace(array_path + temp_suffix, array_path)
+            with open(sidecar_path + temp_suffix, 'w') as file:
+                json.dump({'source': os.path.abspath(path),
+                           'affine': np.asarray(affine).tolist()}, file)
+            os.replace(sidecar_path + temp_suffix, sidecar_path)
+        except OSError as e:
+            print(f'Volume cache entry not saved ({path}): {e}')
+            for temp_path in (array_path + temp_suffix,
+                              sidecar_path + temp_suffix):
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+        finally:
+            with self.mutex:
+                self.pending_keys.discard(key)
+        self.evict()
+
+    def evict(self):
+        """
+        Remove the least recently used entries until the cache fits in its
+        budget. Not decorated with enter_function: called from the cache
+        thread.
+        """
+        entries = []
+        try:
+            with os.scandir(self.cache_folder) as elements:
+                for element in elements:
+                    if (element.name.endswith('.tmp')
+                            and time.time() - element.stat().st_mtime
+                            > VOLUME_CACHE_TEMP_MAX_AGE):
+                        # Left by an interrupted write.
+                        os.remove(element.path)
+                        continue
+                    if not element.name.endswith('.npy'):
+                        continue
+                    key = element.name[:-len('.npy')]
+                    sidecar_path = self.get_entry_paths(key)[1]
+                    try:
+                        last_use = os.stat(sidecar_path).st_mtime
+                    except OSError:
+                        # Incomplete entry (or being written).
+                        last_use = element.stat().st_mtime
+                    entries.append((last_use, key, element.stat().st_size))
+        except OSError:
+            return
+
+        total = sum(size for _, _, size in entries)
+        for _, key, size in sorted(entries):
+            if total <= self.budget:
+                break
+            with self.mutex:
+                if key in self.pending_keys:
+                    continue
+            # Sidecar first, so that the entry is never read half removed.
+            for entry_path in reversed(self.get_entry_paths(key)):
+                try:
+                    os.remove(entry_path)
+                except OSError:
+                    pass
+            total -= size
+
+    @enter_function
+    def shutdown(self):
+        """
+        Stop the cache thread (entries not written yet are dropped).
+        """
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,367 @@
+"""
+This file contains helpers to read volumes as NumPy arrays and to build
+Slicer volume nodes from those arrays. Reading functions do not use the
+Slicer API, so they can safely be called from worker threads.
+"""
+from utils.requirements import *
+from utils.debugging_helpers import *
+
+# Mapping of NRRD type names to NumPy data types (see NRRD specification).
+NRRD_DTYPES = {
+    'signed char': np.int8, 'int8': np.int8, 'int8_t': np.int8,
+    'uchar': np.uint8, 'unsigned char': np.uint8, 'uint8': np.uint8,
+    'uint8_t': np.uint8,
+    'short': np.int16, 'short int': np.int16, 'signed short': np.int16,
+    'signed short int': np.int16, 'int16': np.int16, 'int16_t': np.int16,
+    'ushort': np.uint16, 'unsigned short': np.uint16,
+    'unsigned short int': np.uint16, 'uint16': np.uint16,
+    'uint16_t': np.uint16,
+    'int': np.int32, 'signed int': np.int32, 'int32': np.int32,
+    'int32_t': np.int32,
+    'uint': np.uint32, 'unsigned int': np.uint32, 'uint32': np.uint32,
+    'uint32_t': np.uint32,
+    'longlong': np.int64, 'long long': np.int64, 'long long int': np.int64,
+    'signed long long': np.int64, 'signed long long int': np.int64,
+    'int64': np.int64, 'int64_t': np.int64,
+    'ulonglong': np.uint64, 'unsigned long long': np.uint64,
+    'unsigned long long int': np.uint64, 'uint64': np.uint64,
+    'uint64_t': np.uint64,
+    'float': np.float32, 'double': np.float64,
+}
+
+
+class VolumeIO():
+    """
+    Usage: VolumeIO.function_name(self, *args, **kwargs), as for the Dev
+    class.
+    """
+
+    def __init__(self):
+        pass
+
+    def read_volume_array(self, path):
+        """
+        Read a 3D volume file into an array ordered as Slicer expects it
+        (KJI indexing) and its IJK to RAS affine. Not decorated with
+        enter_function: called from the prefetch threads (see
+        VolumePrefetcher.decode).
+        :param path: path of a .nii, .nii.gz or .nrrd volume.
+        :return: tuple (array, affine) or None if the file cannot be read
+        reliably without the Slicer reader (e.g. 4D volume, unsupported
+        NRRD space or inconsistent NIfTI qform/sform).
+        """
+        if path.endswith('.nii') or path.endswith('.nii.gz'):
+            image = nib.load(path)
+            affine = VolumeIO.get_nifti_affine(self, image)
+            if len(image.shape) != 3 or affine is None:
+                return None
+            data = np.asanyarray(image.dataobj)
+
+        elif path.endswith('.nrrd'):
+            data, header = nrrd.read(path)
+            if data.ndim != 3:
+                return None
+            affine = VolumeIO.get_nrrd_affine(self, header)
+            if affine is None:
+                return None
+
+        else:
+            return None
+
+        # File data is IJK indexed; Slicer arrays are KJI indexed.
+        array = np.ascontiguousarray(data.transpose(2, 1, 0))
+        return array, affine
+
+    @enter_function
+    def read_volume_array_mmap(self, path):
+        """
+        Memory-map an uncompressed volume file (.nii, or .nrrd with raw
+        encoding and attached header) instead of reading it: voxels are
+        read from the file only when the array is copied (e.g. into a
+        volume node), without intermediate buffer.
+        :param path: path of a volume.
+        :return: tuple (KJI indexed read-only array, affine) or None if the
+        file is compressed or cannot be mapped reliably.
+        """
+        try:
+            if path.endswith('.nii'):
+                image = nib.load(path, mmap='r')
+                affine = VolumeIO.get_nifti_affine(self, image)
+                if (len(image.shape) != 3 or affine is None
+                        or image.header.get_slope_inter() not in (
+                            (None, None), (1.0, 0.0))):
+                    return None
+                data = image.dataobj.get_unscaled()
+
+            elif path.endswith('.nrrd'):
+                with open(path, 'rb') as file:
+                    header = nrrd.read_header(file)
+                offset = VolumeIO.get_nrrd_data_offset(self, path)
+                if (header.get('encoding') != 'raw' or 'data file' in header
+                        or 'byte skip' in header or 'line skip' in header
+                        or header['dimension'] != 3 or offset is None):
+                    return None
+                affine = VolumeIO.get_nrrd_affine(self, header)
+                if affine is None:
+                    return None
+                dtype = np.dtype(NRRD_DTYPES[header['type']])
+                if header.get('endian') == 'big':
+                    dtype = dtype.newbyteorder('>')
+                elif header.get('endian') == 'little':
+                    dtype = dtype.newbyteorder('<')
+                data = np.memmap(path, dtype=dtype, mode='r', offset=offset,
+                                 shape=tuple(header['sizes']), order='F')
+
+            else:
+                return None
+        except (OSError, ValueError, KeyError, nrrd.NRRDError) as e:
+            Debug.print(self, f'Cannot memory-map {path}: {e}')
+            return None
+
+        # The files are IJK indexed in Fortran order: the KJI view is C
+        # contiguous, so it is copied without temporary array.
+        return data.transpose(2, 1, 0), affine
+
+    def read_label_mask(self, path, label_value, label_name):
+        """
+        Read the voxels of one label of a segmentation file. Not decorated
+        with enter_function: called from the threads reading the versions
+        compared (see compareSegmentVersions).
+        :param path: path of a .nii.gz labelmap or of a .seg.nrrd file.
+        :param label_value: value of the label in the configuration.
+        :param label_name: name of the label (name of the segment in .seg.nrrd
+                           files).
+        :return: tuple (KJI indexed uint8 mask of the voxels of the label,
+        affine) or None if the file cannot be read without the Slicer reader.
+        """
+        if path.endswith('.nii') or path.endswith('.nii.gz'):
+            image = nib.load(path)
+            affine = VolumeIO.get_nifti_affine(self, image)
+            if len(image.shape) != 3 or affine is None:
+                return None
+            mask = np.asanyarray(image.dataobj) == label_value
+
+        elif path.endswith('.seg.nrrd'):
+            data, header = nrrd.read(path)
+            # Segment of the label, by name or by ID (None if the label is
+            # not segmented in this version).
+            segment = None
+            index = 0
+            while f'Segment{index}_ID' in header:
+                if (header.get(f'Segment{index}_Name') == label_name
+                        or header[f'Segment{index}_ID'] == str(label_value)):
+                    segment = index
+                    break
+                index += 1
+
+            header = dict(header)
+            if data.ndim == 4:
+                # First axis: layers of overlapping segments.
+                layer = 0
+                if segment is not None:
+                    layer = int(header.get(f'Segment{segment}_Layer', 0))
+                data = data[layer]
+                header['space directions'] = header['space directions'][-3:]
+            affine = VolumeIO.get_nrrd_affine(self, header)
+            if data.ndim != 3 or affine is None:
+                return None
+            if segment is None:
+                mask = np.zeros(data.shape, dtype=bool)
+            else:
+                mask = data == int(
+                    header.get(f'Segment{segment}_LabelValue', 1))
+
+        else:
+            return None
+
+        # File data is IJK indexed; Slicer arrays are KJI indexed.
+        return (np.ascontiguousarray(mask.transpose(2, 1, 0), dtype=np.uint8),
+                affine)
+
+    @enter_function
+    def get_nrrd_data_offset(self, path):
+        """
+        Get the position of the data of a NRRD file with attached header
+        (after the first empty line).
+        :return: offset in bytes or None if not found.
+        """
+        with open(path, 'rb') as file:
+            while True:
+                line = file.readline()
+                if not line:
+                    return None
+                if line in (b'\n', b'\r\n'):
+                    return file.tell()
+
+    def get_nifti_affine(self, image):
+        """
+        Get the IJK to RAS affine of a NIfTI image. Not decorated with
+        enter_function: called from worker threads.
+        :return: 4x4 affine or None if the qform and sform are both defined
+        and differ (Slicer (ITK) and nibabel do not always choose the same
+        transform in that case), or both undefined (nibabel then flips the
+        x axis and centers the origin, ITK does not).
+        """
+        qform = image.header.get_qform(coded=True)
+        sform = image.header.get_sform(coded=True)
+        if qform[0] is None and sform[0] is None:
+            return None
+        if (qform[0] is not None and sform[0] is not None
+                and not np.allclose(qform[0], sform[0], atol=1e-4)):
+            return None
+        return np.array(image.affine, dtype=float)
+
+    def get_nrrd_affine(self, header):
+        """
+        Build the IJK to RAS affine from a NRRD header. Not decorated with
+        enter_function: called from worker threads.
+        :param header: NRRD header as returned by pynrrd.
+        :return: 4x4 affine or None if the space is not supported.
+        """
+        return batch_workers.get_nrrd_affine(header)
+
+    def estimate_volume_nbytes(self, path):
+        """
+        Estimate the memory required by a decoded volume by reading its
+        header only. Not decorated with enter_function: called from the
+        prefetch threads.
+        :param path: path of a .nii, .nii.gz or .nrrd volume.
+        :return: number of bytes (0 if it cannot be estimated).
+        """
+        try:
+            if path.endswith('.nii') or path.endswith('.nii.gz'):
+                image = nib.load(path)
+                dtype = image.get_data_dtype()
+                slope, intercept = image.header.get_slope_inter()
+                if slope not in (None, 1.0) or intercept not in (None, 0.0):
+                    dtype = np.dtype(np.float64)
+                return int(np.prod(image.shape)) * dtype.itemsize
+
+            if path.endswith('.nrrd'):
+                header = nrrd.read_header(path)
+                dtype = np.dtype(NRRD_DTYPES.get(header['type'], np.float64))
+                return int(np.prod(header['sizes'])) * dtype.itemsize
+
+        except Exception:
+            pass
+
+        return 0
+
+    @enter_function
+    def create_volume_node(self, array, affine, name):
+        """
+        Create a scalar volume node from an array and display it in the
+        slice viewers (same behavior as slicer.util.loadVolume).
+        :param array: KJI indexed array of voxels.
+        :param affine: 4x4 IJK to RAS affine.
+        :param name: name of the volume node.
+        :return: the created volume node.
+        """
+        volume_node = slicer.mrmlScene.AddNewNodeByClass(
+            'vtkMRMLScalarVolumeNode', name)
+        slicer.util.updateVolumeFromArray(volume_node, array)
+        volume_node.SetIJKToRASMatrix(slicer.util.vtkMatrixFromArray(affine))
+        volume_node.CreateDefaultDisplayNodes()
+        slicer.util.setSliceViewerLayers(background=volume_node, fit=True)
+        return volume_node
+
+    @enter_function
+    def get_labelmap_array(self, labelmap_node, dtype=np.uint8):
+        """
+        Copy the voxels of a labelmap volume node (single cast from the
+        volume memory, no intermediate file). Must be called from the main
+        thread; the result can be written from any thread (see
+        batch_workers.write_labelmap_nifti).
+        :param labelmap_node: labelmap volume node.
+        :param dtype: data type of the copied voxels (None to keep the
+                      scalar type of the labelmap, as slicer.util.saveNode).
+        :return: tuple (IJK indexed array, 4x4 IJK to RAS affine).
+        """
+        # KJI indexed view of the voxels (no copy); NIfTI is IJK indexed.
+        array = slicer.util.arrayFromVolume(labelmap_node)
+        data = array.transpose(2, 1, 0).astype(dtype or array.dtype)
+
+        ijk_to_ras = vtk.vtkMatrix4x4()
+        labelmap_node.GetIJKToRASMatrix(ijk_to_ras)
+        affine = slicer.util.arrayFromVTKMatrix(ijk_to_ras)
+        return data, affine
+
+    @enter_function
+    def get_segmentation_arrays(self, segmentation_node,
+                                reference_volume_node):
+        """
+        Copy the segments of a segmentation node in the geometry of a
+        reference volume, with the properties saved in .seg.nrrd files.
+        Must be called from the main thread; the result can be written from
+        any thread (see batch_workers.write_segmentation_nrrd).
+        :param segmentation_node: segmentation node.
+        :param reference_volume_node: volume node giving the geometry.
+        :return: tuple (array (layer, I, J, K) of the label values of the
+        segments, 4x4 IJK to RAS affine, list of dictionaries of segment
+        properties, dictionary of segmentation properties).
+        """
+        segmentation = segmentation_node.GetSegmentation()
+        shape = slicer.util.arrayFromVolume(reference_volume_node).shape[::-1]
+
+        layers = []
+        segments = []
+        for index in range(segmentation.GetNumberOfSegments()):
+            segment_id = segmentation.GetNthSegmentID(index)
+            segment = segmentation.GetSegment(segment_id)
+            array = slicer.util.arrayFromSegmentBinaryLabelmap(
+                segmentation_node, segment_id, reference_volume_node)
+            if array is None:
+                mask = np.zeros(shape, dtype=bool)
+            else:
+                # KJI indexed; the layers are IJK indexed.
+                mask = array.transpose(2, 1, 0) != 0
+
+            # First layer where the segment does not overlap other ones.
+            layer_index = 0
+            while layer_index < len(layers) and (
+                    np.any(layers[layer_index][mask])
+                    or layers[layer_index].max(initial=0) == 255):
+                layer_index += 1
+            if layer_index == len(layers):
+                layers.append(np.zeros(shape, dtype=np.uint8))
+            label_value = 1 + sum(1 for other in segments
+                                  if other['Layer'] == layer_index)
+            layers[layer_index][mask] = label_value
+
+            tags = []
+            for tag_name in ('TerminologyEntry', 'Segmentation.Status'):
+                tag_value = vtk.mutable('')
+                if segment.GetTag(tag_name, tag_value) and str(tag_value):
+                    tags.append(f'{tag_name}:{tag_value}')
+            segments.append({
+                'ID': segment_id,
+                'Name': segment.GetName(),
+                'NameAutoGenerated': int(segment.GetNameAutoGenerated()),
+                'Color': ' '.join(f'{component:g}'
+                                  for component in segment.GetColor()),
+                'ColorAutoGenerated': int(segment.GetColorAutoGenerated()),
+                'Layer': layer_index,
+                'LabelValue': label_value,
+                'Tags': ''.join(f'{tag}|' for tag in tags)})
+
+        if not layers:
+            layers.append(np.zeros(shape, dtype=np.uint8))
+
+        ijk_to_ras = vtk.vtkMatrix4x4()
+        reference_volume_node.GetIJKToRASMatrix(ijk_to_ras)
+        affine = slicer.util.arrayFromVTKMatrix(ijk_to_ras)
+
+        fields = {
+            'MasterRepresentation': 'Binary labelmap',
+            'ContainedRepresentationNames': 'Binary labelmap|',
+            'ReferenceImageExtentOffset': '0 0 0',
+            'ConversionParameters':
+                segmentation.SerializeAllConversionParameters()}
+        return np.stack(layers), affine, segments, fields
+
+    @enter_function
+    def get_volume_node_name(self, path):
+        """
+        Get the node name Slicer gives to a volume loaded from path.
+        """
+        return os.path.basename(path).split('.')[0]
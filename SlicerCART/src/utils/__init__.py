@@ -3,6 +3,19 @@ from .install_python_packages import *
 from .requirements import *
 from .debugging_helpers import *
 from .development_helpers import *
+from .SessionState import *
 from .ConfigPath import *
 from .UserPath import *
-from .UITheme import *
\ No newline at end of file
+from .CaseRegistry import *
+from .CaseDiscovery import *
+from .SegmentationLedger import *
+from .CaseStatusIndex import *
+from .ClassificationStore import *
+from .SegmentationMetrics import *
+from .SegmentationVersionCounter import *
+from .GeometryValidator import *
+from .MetadataStore import *
+from .SpanProfiler import *
+from .UITheme import *
+from .VolumeCache import *
+from .VolumeIO import *
\ No newline at end of file
@@ -11,6 +11,85 @@ from utils.requirements import *
 CONFIG_FILENAME = "configuration_config.yml"
 CONFIG_COPY_FILENAME = CONFIG_FILENAME.split('.')[0] + '--do-not-modify.yml'
 CONF_FOLDER_NAME = '_conf'
+# Session state saved in the _conf folder (see SessionState).
+SESSION_STATE_FILENAME = 'session_state.json'
+
+# Journal of the remaining list (see CaseRegistry). The journal is compacted
+# into the remaining list file after this number of entries.
+CASE_REGISTRY_JOURNAL_EXTENSION = '.journal'
+CASE_REGISTRY_COMPACT_INTERVAL = 100
+
+# Manifest of the volumes folder (see CaseDiscovery), saved in the _conf
+# folder of the output folder. Directories modified less than
+# CASE_MANIFEST_SAFETY_DELAY_NS before a scan are scanned again next time
+# (filesystems with coarse modification times).
+CASE_MANIFEST_FILENAME = 'case_manifest.json'
+CASE_MANIFEST_SAFETY_DELAY_NS = 2 * 10 ** 9
+
+# Index of the segmentation status of the cases (see CaseStatusIndex), saved
+# in the _conf folder of the output folder.
+CASE_STATUS_INDEX_FILENAME = 'case_status_index.json'
+
+# Segmentation information ledger of each case (see SegmentationLedger):
+# <volume filename>_SegmentationInformation.jsonl in the output folder.
+SEGMENTATION_LEDGER_EXTENSION = '.jsonl'
+SEGMENTATION_LEDGER_SUFFIX = ('_SegmentationInformation'
+                              + SEGMENTATION_LEDGER_EXTENSION)
+SEGMENTATION_LEDGER_ID_KEY = 'Record id'
+SEGMENTATION_LEDGER_SCHEMA_KEY = 'Schema version'
+SEGMENTATION_LEDGER_SCHEMA_VERSION = 1
+
+# Cached results and report of GeometryValidator (in the _conf folder of the
+# output folder).
+GEOMETRY_CACHE_FILENAME = 'geometry_cache.json'
+GEOMETRY_REPORT_FILENAME = 'geometry_report.csv'
+
+# Default report of SlicerCARTLogic.compute_inter_rater_agreement (in the
+# _conf folder of the output folder).
+INTER_RATER_AGREEMENT_FILENAME = 'inter_rater_agreement.csv'
+
+# Classification information file of each case and its schema sidecar (see
+# ClassificationStore). Classification label columns missing from a row are
+# marked with CLASSIFICATION_REMOVED_MARK.
+CLASSIFICATION_INFORMATION_SUFFIX = '_ClassificationInformation.csv'
+CLASSIFICATION_SCHEMA_SUFFIX = '_ClassificationSchema.json'
+CLASSIFICATION_REMOVED_MARK = '--'
+
+# Sidecar file of the case output folder keeping the latest segmentation
+# version of the case (see SegmentationVersionCounter).
+SEGMENTATION_VERSION_SIDECAR_SUFFIX = '_SegmentationVersion.json'
+
+# Spans file of SpanProfiler (in the _conf folder of the output folder),
+# rotated when larger than SPAN_PROFILER_MAX_BYTES.
+SPAN_PROFILER_FILENAME = 'profiling_spans.jsonl'
+SPAN_PROFILER_MAX_BYTES = 5 * 2**20
+SPAN_PROFILER_BACKUP_COUNT = 3
+# Stages of the annotation loop timed by SpanProfiler (qualified names of
+# functions decorated with enter_function).
+SPAN_PROFILER_FUNCTIONS = (
+    'CaseDiscovery.discover',
+    'SlicerCARTWidget.loadPatient',
+    'SlicerCARTWidget.newSegmentation',
+    'SlicerCARTWidget.createNewSegments',
+    'SlicerCARTWidget.onSaveSegmentationButton',
+    'SlicerCARTWidget.saveNiiSegmentation',
+    'SlicerCARTWidget.saveSegmentationInformation',
+    'SlicerCARTWidget.select_next_remaining_case',
+)
+
+# Optional SQLite database of the project (see MetadataStore), saved in the
+# _conf folder of the output folder.
+METADATA_STORE_FILENAME = 'metadata.sqlite'
+
+# Default folder of VolumeCache (in the _conf folder of the output folder).
+# Temporary files of interrupted writes are removed after
+# VOLUME_CACHE_TEMP_MAX_AGE seconds.
+VOLUME_CACHE_FOLDER_NAME = 'volume_cache'
+VOLUME_CACHE_TEMP_MAX_AGE = 24 * 3600
+
+# Maximum time spent waiting for the worker results at each step of a batch
+# operation run by BatchRunner (in seconds), so that the UI stays responsive.
+BATCH_STEP_TIMEOUT = 0.05
 
 TIMER_MUTEX = RLock()
 
@@ -1,7 +1,9 @@
 import functools
 import inspect
+import sys
 import yaml
 import os
+import time
 import pandas as pd
 
 # Import initial configuration filepath associated with SlicerCART module.
@@ -36,6 +38,7 @@ class Debug:
         print('set_debug: ENABLE_DEBUG =', enable)
         global ENABLE_DEBUG
         ENABLE_DEBUG = enable
+        rebind_enter_functions(enable)
 
     def print_dictionary(self, dictionary, name=None):
         """
@@ -70,37 +73,140 @@ class Debug:
         filename = os.path.join(folderpath, 'debug_df.csv')
         df.to_csv(filename, index=False)
 
+# Original functions decorated with enter_function, found back in their
+# class from their module and qualified name when set_debug re-binds them.
+ENTER_FUNCTION_REGISTRY = []
+# Object timing the calls of some decorated functions (see SpanProfiler),
+# set with set_span_recorder.
+SPAN_RECORDER = None
+
+
 def enter_function(func):
     """
     Decorator that enables to print the function name in the python console
-    and the name of the class that the function is associated with.
+    and the name of the class that the function is associated with. The
+    binding is chosen once, at decoration time: when debugging is disabled,
+    the original function is returned (see bind_enter_function), so that
+    decorated functions have no overhead. Debug.set_debug re-binds the
+    decorated methods of the classes.
     """
+    if '<locals>' not in func.__qualname__:
+        # Nested functions are decorated again at each call of their
+        # enclosing function, so they follow ENABLE_DEBUG without re-binding.
+        ENTER_FUNCTION_REGISTRY.append(func)
+    return bind_enter_function(func, ENABLE_DEBUG)
 
-    @functools.wraps(func)
-    def wrapper(self, *args, **kwargs):
-        def print_enter_function(self_of_cls, *args, **kwargs):
-            # This function should not return the func, but rather print the
-            # message
-            if ENABLE_DEBUG:
+
+def bind_enter_function(func, enable):
+    """
+    Get the function bound in place of a function decorated with
+    enter_function (timed if profiled by the span recorder).
+    :param func: original function.
+    :param enable: True to print the function name at each call.
+    :return: func itself, or a wrapper keeping func in its
+    __enter_function_original__ attribute.
+    """
+    parameters = list(inspect.signature(func).parameters.values())
+    # Functions with only self are called without the other arguments given
+    # (e.g. the arguments of Qt signals connected to them).
+    has_only_self = (len(parameters) == 1 and parameters[0].kind in (
+        inspect.Parameter.POSITIONAL_ONLY,
+        inspect.Parameter.POSITIONAL_OR_KEYWORD))
+
+    recorder = SPAN_RECORDER
+    if recorder is not None and recorder.is_profiled(func):
+        name = func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            if enable:
                 print('\n *** enter_function ***:', func.__name__,
-                      '*** from class ***:', self_of_cls.__class__.__name__,
+                      '*** from class ***:', self.__class__.__name__,
                       '\n')
+            start = time.time()
+            start_counter = time.perf_counter()
+            try:
+                if has_only_self:
+                    return func(self)
+                return func(self, *args, **kwargs)
+            finally:
+                recorder.record(name, start,
+                                time.perf_counter() - start_counter)
+
+    elif enable:
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            print('\n *** enter_function ***:', func.__name__,
+                  '*** from class ***:', self.__class__.__name__,
+                  '\n')
+            if has_only_self:
+                return func(self)
+            return func(self, *args, **kwargs)
+
+    elif has_only_self:
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            return func(self)
+
+    else:
+        return func
+
+    wrapper.__enter_function_original__ = func
+    return wrapper
 
-        print_enter_function(self, *args, **kwargs)
-
-        # Use inspect module to get argument names in the original function
-        sig = inspect.signature(func)
-        args_list = list(sig.parameters)
-
-        # Call the original function with the provided arguments and return
-        # its result. Calling method depends on the method signature.
-        if len(args_list) == 1:
-            # Mean that the original function has only self (no other parameter)
-            result = func(self)
-        else:
-            # Mean that the original function uses arguments
-            result = func(self, *args, **kwargs)
-
-        return result
 
-    return wrapper
+def rebind_enter_functions(enable):
+    """
+    Replace the decorated methods of the classes by the binding of
+    bind_enter_function. Methods already connected (e.g. Qt signals) keep
+    the previous binding: connect them through a lambda to follow the
+    re-binding.
+    :param enable: True to print the function name at each call.
+    """
+    originals = {id(func) for func in ENTER_FUNCTION_REGISTRY}
+    owners = {}
+    for func in ENTER_FUNCTION_REGISTRY:
+        owner = sys.modules.get(func.__module__)
+        for name in func.__qualname__.split('.')[:-1]:
+            owner = getattr(owner, name, None)
+        # Modules may replace a class by its instance (e.g. ConfigPath).
+        if owner is not None and not isinstance(owner, type):
+            owner = type(owner)
+        if owner is not None:
+            owners[id(owner)] = owner
+
+    def rebind(function):
+        original = getattr(function, '__enter_function_original__', function)
+        if id(original) not in originals:
+            return function
+        return bind_enter_function(original, enable)
+
+    for owner in owners.values():
+        for name, value in list(vars(owner).items()):
+            if isinstance(value, property):
+                functions = (value.fget, value.fset, value.fdel)
+                rebound = [None if function is None else rebind(function)
+                           for function in functions]
+                if all(new is old for new, old in zip(rebound, functions)):
+                    continue
+                value = property(*rebound, value.__doc__)
+            elif callable(value):
+                rebound = rebind(value)
+                if rebound is value:
+                    continue
+                value = rebound
+            else:
+                continue
+            setattr(owner, name, value)
+
+
+def set_span_recorder(recorder):
+    """
+    Set the object timing the calls of decorated functions and re-bind the
+    decorated methods accordingly.
+    :param recorder: object with methods is_profiled(func) and
+                     record(name, start, duration), or None to stop timing.
+    """
+    global SPAN_RECORDER
+    SPAN_RECORDER = recorder
+    rebind_enter_functions(ENABLE_DEBUG)
@@ -9,9 +9,16 @@ from slicer.util import VTKObservationMixin
 from vtkSegmentationCorePython import vtkSegment
 from glob import glob
 import re
+import json
+import csv
+import sqlite3
+import uuid
+import hashlib
+from io import StringIO
 import time
 from pathlib import Path
-from threading import RLock
+from threading import RLock, Thread, current_thread
+import queue
 from datetime import datetime
 import filecmp
 import shutil
@@ -20,8 +27,14 @@ import vtk
 import random
 import colorsys
 import sys
+import platform
 from functools import partial
 import copy
+from collections import OrderedDict
+from concurrent.futures import (ThreadPoolExecutor, ProcessPoolExecutor, wait,
+                                FIRST_COMPLETED, Future)
+import multiprocessing
+from fnmatch import fnmatch
 
 # Check if python packages are missing due to issue with some module imports
 from utils.install_python_packages import *
@@ -33,6 +46,9 @@ import nrrd
 import pandas as pd
 import slicerio
 import yaml
+# Functions run in worker processes (installed packages must be imported
+# before).
+import batch_workers
 
 import tempfile
 from qt import QApplication, QPalette # Required for color detection